@@ -1,16 +1,21 @@
 # preflight_checks/aws_checks.py
+import concurrent.futures
+import contextvars
 import logging
 import os
 import sys
-from typing import List, Optional, Dict, Any
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Dict, Any
 
-import boto3
+# boto3 is imported lazily in get_aws_client: importing it (and building the
+# default session) costs more than the rest of the module combined, and runs
+# that exit early or only import the check functions never need it.
 from botocore.exceptions import ClientError, NoCredentialsError, BotoCoreError
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
+from preflight_checks.profiling import instrument_client, profiled, span
+from preflight_checks.rate_limiting import limit_client
+
 logger = logging.getLogger(__name__)
 
 # --- Constants ---
@@ -25,13 +30,89 @@ FAILED_STACK_STATUSES = [
     "ROLLBACK_COMPLETE",  # Often indicates a failure during creation/update
     "UPDATE_ROLLBACK_COMPLETE", # Often indicates a failure during update
 ]
+# Concurrency for checks that fan out across accounts, OUs or regions
+MAX_WORKERS_ENV_VAR = "PREFLIGHT_MAX_WORKERS"
+DEFAULT_MAX_WORKERS = 20
+
+# The boto3 Session of the landing zone being checked (see use_session); the
+# default session when unset.
+_current_session: contextvars.ContextVar = contextvars.ContextVar("preflight_session", default=None)
 
 # --- Helper Functions ---
 
-def get_aws_client(service_name: str, region_name: Optional[str] = None):
-    """Initializes and returns a boto3 client."""
+def configure_logging() -> None:
+    """Configures root logging for command line runs (not done at import time)."""
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+
+def env_int(name: str, default: int) -> int:
+    """Reads a positive integer setting from the environment."""
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return max(1, int(value))
+    except ValueError:
+        logger.warning(f"Ignoring invalid {name}={value!r}, using {default}")
+        return default
+
+@contextmanager
+def use_session(session) -> Iterator[None]:
+    """
+    Makes get_aws_client use session when no session is passed explicitly.
+
+    Used by fleet runs (preflight_checks/fleet.py) to point every check at one
+    landing zone's management account without changing the check signatures.
+    The session applies to the current thread, and to the tasks it submits to
+    a ContextThreadPoolExecutor.
+    """
+    token = _current_session.set(session)
+    try:
+        yield
+    finally:
+        _current_session.reset(token)
+
+class ContextThreadPoolExecutor(concurrent.futures.ThreadPoolExecutor):
+    """A ThreadPoolExecutor whose tasks run in a copy of the submitting thread's context."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+def get_aws_client(
+    service_name: str,
+    region_name: Optional[str] = None,
+    session=None,
+    config=None,
+):
+    """
+    Initializes and returns a boto3 client.
+
+    The botocore service model is loaded here, on first use of each service,
+    rather than when the module is imported. Every request the client makes
+    waits for the process-wide rate limiter (see
+    preflight_checks/rate_limiting.py).
+
+    Args:
+        service_name: The AWS service (e.g. "cloudformation").
+        region_name: The region for the client.
+        session: A boto3 Session (e.g. with assumed-role credentials from
+            preflight_checks.credentials); the session set with use_session,
+            or the default session, if omitted.
+        config: An optional botocore Config (timeouts, retries).
+    """
+    import boto3
+
+    if session is None:
+        session = _current_session.get()
     try:
-        return boto3.client(service_name, region_name=region_name)
+        if session is not None:
+            client = session.client(service_name, region_name=region_name, config=config)
+        elif config is not None:
+            client = boto3.client(service_name, region_name=region_name, config=config)
+        else:
+            client = boto3.client(service_name, region_name=region_name)
+        return instrument_client(limit_client(client, session))
     except NoCredentialsError:
         logger.exception("AWS credentials not found.")
         raise
@@ -167,7 +248,8 @@ def check_control_tower_landing_zone(ct_home_region: str) -> bool:
 
     Note: This check verifies the Landing Zone's status, not the compliance
     of every individual account and OU against all controls. A full compliance
-    check typically requires querying AWS Config or Security Hub in the Audit account.
+    check typically requires querying AWS Config or Security Hub in the Audit account,
+    see check_organization_compliance in preflight_checks/compliance_checks.py.
 
     Args:
         ct_home_region: The AWS region where Control Tower is deployed (home region).
@@ -273,63 +355,159 @@ def check_control_tower_landing_zone(ct_home_region: str) -> bool:
 
 # --- Main Execution ---
 
-def run_preflight_checks():
-    """Runs all preflight checks."""
-    logger.info("Starting preflight checks...")
-
-    # --- Configuration ---
+@dataclass
+class PreflightSettings:
+    """What to check in one landing zone; read from the environment, or from a fleet inventory."""
+
+    environment: str = DEFAULT_ENVIRONMENT
+    # Regions for the CloudFormation stack check
+    regions: List[str] = field(default_factory=list)
+    ct_home_region: Optional[str] = None
+    stack_prefix: str = f"{DEFAULT_STACK_PREFIX}-{DEFAULT_ENVIRONMENT}"
+    config_dir: Optional[str] = None
+    accelerator_prefix: str = DEFAULT_STACK_PREFIX
+    aggregator_name: Optional[str] = None
+    compliance_thresholds_file: Optional[str] = None
+    compliance_role_arn: Optional[str] = None
+
+    def log(self) -> None:
+        logger.info(f"Configuration:")
+        logger.info(f"  Environment: {self.environment}")
+        logger.info(f"  Check Region: {', '.join(self.regions)}")
+        logger.info(f"  Control Tower Home Region: {self.ct_home_region}")
+        logger.info(f"  CloudFormation Stack Prefix: {self.stack_prefix}")
+        if self.config_dir:
+            logger.info(f"  LZA Config Directory: {self.config_dir}")
+            logger.info(f"  Accelerator Prefix: {self.accelerator_prefix}")
+
+
+def settings_from_env() -> Optional[PreflightSettings]:
+    """Reads the settings of a single landing zone run, or returns None if AWS_REGION is not set."""
     # Get environment from environment variable with default 'lz'
     environment = os.getenv("ENVIRONMENT", DEFAULT_ENVIRONMENT)
-    logger.info(f"Using environment: {environment}")
-    
+
     # Region for CloudFormation checks (can be different from CT home region)
     check_region = os.getenv("AWS_REGION", os.getenv("AWS_DEFAULT_REGION"))
     if not check_region:
-        logger.error(
-            "AWS_REGION environment variable not set. Please set the AWS region."
-        )
-        sys.exit(1)
-        return # Add return to stop execution after sys.exit
+        return None
+
+    return PreflightSettings(
+        environment=environment,
+        regions=[check_region],
+        # Control Tower Home Region (required for Control Tower API calls).
+        # Often the same as check_region but not always.
+        ct_home_region=os.getenv("CT_HOME_REGION", check_region),
+        # Use environment in stack prefix if appropriate
+        stack_prefix=os.getenv("STACK_PREFIX", f"{DEFAULT_STACK_PREFIX}-{environment}"),
+        # Checks driven by the LZA configuration files run only when the config
+        # directory is given, as they fan out across every account in it.
+        config_dir=os.getenv("LZA_CONFIG_DIR"),
+        accelerator_prefix=os.getenv("ACCELERATOR_PREFIX", DEFAULT_STACK_PREFIX),
+        aggregator_name=os.getenv("CONFIG_AGGREGATOR_NAME"),
+        compliance_thresholds_file=os.getenv("COMPLIANCE_THRESHOLDS_FILE"),
+        compliance_role_arn=os.getenv("COMPLIANCE_ROLE_ARN"),
+    )
 
-    # Control Tower Home Region (required for Control Tower API calls)
-    # Determine this based on your environment. Often same as check_region but not always.
-    # Defaulting to check_region, but make this configurable if needed.
-    ct_home_region = os.getenv("CT_HOME_REGION", check_region)
 
-    # Use environment in stack prefix if appropriate
-    stack_prefix = os.getenv("STACK_PREFIX", f"{DEFAULT_STACK_PREFIX}-{environment}")
+def run_checks(settings: PreflightSettings) -> Dict[str, bool]:
+    """
+    Runs every check that applies to settings and returns {check name: passed}.
 
-    logger.info(f"Configuration:")
-    logger.info(f"  Environment: {environment}")
-    logger.info(f"  Check Region: {check_region}")
-    logger.info(f"  Control Tower Home Region: {ct_home_region}")
-    logger.info(f"  CloudFormation Stack Prefix: {stack_prefix}")
+    AWS calls use the session set with use_session, or the default session.
 
-    # --- Run Checks ---
-    results = {}
-    all_passed = True
+    Raises:
+        NoCredentialsError, BotoCoreError: On AWS configuration or connection issues.
+    """
+    results: Dict[str, bool] = {}
+    ct_home_region = settings.ct_home_region
+    config_dir = settings.config_dir
+
+    # Check 1: CloudFormation Stacks, in every region
+    cloudformation = []
+    for region in settings.regions:
+        with span("check_cloudformation_stacks", cat="check", region=region):
+            cloudformation.append(check_cloudformation_stacks(region, settings.stack_prefix))
+    results["cloudformation"] = all(cloudformation)
+
+    # Check 2: Control Tower Landing Zone
+    # Note: Pass the CT Home Region here
+    with span("check_control_tower_landing_zone", cat="check", region=ct_home_region):
+        results["control_tower"] = check_control_tower_landing_zone(ct_home_region)
 
-    try:
-        # Check 1: CloudFormation Stacks
-        results["cloudformation"] = check_cloudformation_stacks(
-            check_region, stack_prefix
-        )
-        if not results["cloudformation"]:
-            all_passed = False
+    if config_dir:
+        from preflight_checks.bootstrap_checks import check_account_bootstrap
 
-        # Check 2: Control Tower Landing Zone
-        # Note: Pass the CT Home Region here
-        results["control_tower"] = check_control_tower_landing_zone(ct_home_region)
-        if not results["control_tower"]:
-            all_passed = False
+        # Check 3: Per-account access role and CDK bootstrap stacks
+        with span("check_account_bootstrap", cat="check"):
+            results["account_bootstrap"] = check_account_bootstrap(config_dir, settings.accelerator_prefix)
+
+        from preflight_checks.organization_checks import check_organization_structure
+
+        # Check 4: Live OU tree and account placement vs the configuration
+        with span("check_organization_structure", cat="check"):
+            results["organization_structure"] = check_organization_structure(config_dir)
+
+        from preflight_checks.quota_checks import check_service_quotas
+
+        # Check 5: Service quota headroom for the resources in network-config.yaml
+        with span("check_service_quotas", cat="check"):
+            results["service_quotas"] = check_service_quotas(config_dir)
+
+        from preflight_checks.stackset_checks import check_stackset_instances
+
+        # Check 6: Stack instances of the customizations StackSets
+        with span("check_stackset_instances", cat="check"):
+            results["stackset_instances"] = check_stackset_instances(config_dir, ct_home_region)
+
+    if settings.aggregator_name:
+        from preflight_checks.compliance_checks import check_organization_compliance
+
+        # Check 7: Config rule compliance and Security Hub findings per OU
+        with span("check_organization_compliance", cat="check", region=ct_home_region):
+            results["organization_compliance"] = check_organization_compliance(
+                settings.aggregator_name,
+                ct_home_region,
+                settings.compliance_thresholds_file,
+                settings.compliance_role_arn,
+            )
+
+    return results
 
 
+@profiled("preflight_checks")
+def run_preflight_checks():
+    """
+    Runs all preflight checks.
+
+    Set LZA_PROFILE=1 (or pass --profile) to write a cProfile dump and a
+    Chrome trace of the run, see preflight_checks/profiling.py. To check
+    several landing zones at once, see preflight_checks/fleet.py.
+    """
+    configure_logging()
+    logger.info("Starting preflight checks...")
+
+    # --- Configuration ---
+    settings = settings_from_env()
+    if settings is None:
+        logger.error(
+            "AWS_REGION environment variable not set. Please set the AWS region."
+        )
+        sys.exit(1)
+        return # Add return to stop execution after sys.exit
+    logger.info(f"Using environment: {settings.environment}")
+    settings.log()
+
+    # --- Run Checks ---
+    try:
+        results = run_checks(settings)
     except (NoCredentialsError, BotoCoreError):
         logger.error("Preflight checks failed due to AWS configuration or connection issues.")
         sys.exit(1)
+        return
     except Exception as e:
         logger.exception(f"An unexpected error occurred during preflight checks: {e}")
         sys.exit(1)
+        return
 
 
     # --- Report Summary ---
@@ -340,7 +518,7 @@ def run_preflight_checks():
     logger.info("-----------------------------")
 
 
-    if all_passed:
+    if all(results.values()):
         logger.info("All preflight checks passed successfully.")
         sys.exit(0)
     else:
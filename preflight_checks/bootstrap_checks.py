@@ -0,0 +1,246 @@
+# preflight_checks/bootstrap_checks.py
+"""
+Per-account bootstrap prerequisites for every account in accounts-config.yaml.
+
+LZA deploys into each account by assuming ``managementAccountAccessRole``
+(from global-config.yaml) and needs the ``<prefix>-CDKToolkit`` bootstrap stack
+in every enabled region. This check:
+
+1. resolves account emails to account IDs (``accountIds`` in
+   accounts-config.yaml, then Organizations ``ListAccounts``),
+2. assumes the access role in each account concurrently on a bounded thread
+   pool, with STS credentials cached by preflight_checks.credentials, and
+3. checks the bootstrap stack in each enabled region.
+
+Each account has its own time budget, so one slow or unreachable account is
+reported as timed out instead of stalling the run. The budget is checked
+before each call, and each call's timeouts and retries are capped by the time
+left, so an account can overrun its budget by at most the retry backoff.
+"""
+import concurrent.futures
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from preflight_checks.aws_checks import (
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_STACK_PREFIX,
+    MAX_WORKERS_ENV_VAR,
+    ContextThreadPoolExecutor,
+    env_int,
+    get_aws_client,
+)
+from preflight_checks.credentials import assume_role_session, role_arn
+from preflight_checks.lza_config import enabled_regions, iter_accounts, load_configs
+from preflight_checks.profiling import span
+
+logger = logging.getLogger(__name__)
+
+ACCOUNT_TIMEOUT_ENV_VAR = "PREFLIGHT_ACCOUNT_TIMEOUT"
+DEFAULT_ACCOUNT_TIMEOUT_SECONDS = 60
+DEFAULT_ACCESS_ROLE = "AWSControlTowerExecution"
+CDK_TOOLKIT_STACK_SUFFIX = "-CDKToolkit"
+BOOTSTRAPPED_STACK_STATUSES = {"CREATE_COMPLETE", "UPDATE_COMPLETE", "IMPORT_COMPLETE"}
+MAX_ATTEMPTS = 3
+
+
+@dataclass
+class AccountResult:
+    """Bootstrap check result for one account."""
+
+    name: str
+    account_id: Optional[str] = None
+    problems: List[str] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return not self.problems
+
+
+def client_config(timeout_seconds: float):
+    """botocore Config that keeps a call, with its retries, within timeout_seconds."""
+    from botocore.config import Config
+
+    per_attempt = max(1.0, timeout_seconds / MAX_ATTEMPTS)
+    connect_timeout = min(10.0, per_attempt / 4)
+    return Config(
+        connect_timeout=connect_timeout,
+        read_timeout=min(30.0, per_attempt - connect_timeout),
+        retries={"max_attempts": MAX_ATTEMPTS, "mode": "standard"},
+    )
+
+
+def resolve_account_ids(accounts_config: Dict[str, Any], org_client) -> Dict[str, Tuple[str, str]]:
+    """
+    Maps lower-cased account email to (account ID, status).
+
+    accountIds in accounts-config.yaml take precedence; every other account is
+    looked up with Organizations ListAccounts.
+    """
+    resolved: Dict[str, Tuple[str, str]] = {}
+    for entry in (accounts_config or {}).get("accountIds") or []:
+        if entry.get("email") and entry.get("accountId"):
+            resolved[entry["email"].lower()] = (str(entry["accountId"]), "ACTIVE")
+
+    wanted = {account["email"].lower() for account in iter_accounts(accounts_config) if account.get("email")}
+    if wanted - set(resolved):
+        paginator = org_client.get_paginator("list_accounts")
+        for page in paginator.paginate():
+            for account in page.get("Accounts", []):
+                email = account.get("Email", "").lower()
+                if email in wanted and email not in resolved:
+                    resolved[email] = (account["Id"], account.get("Status", "ACTIVE"))
+    return resolved
+
+
+def check_bootstrap_stack(cf_client, stack_name: str, region_name: str) -> Optional[str]:
+    """Returns a problem description, or None if the bootstrap stack is deployed."""
+    try:
+        stacks = cf_client.describe_stacks(StackName=stack_name).get("Stacks", [])
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ValidationError" and "does not exist" in str(e):
+            return f"bootstrap stack {stack_name} not found in {region_name}"
+        return f"could not describe {stack_name} in {region_name}: {e.response['Error']['Code']}"
+    status = stacks[0].get("StackStatus") if stacks else None
+    if status not in BOOTSTRAPPED_STACK_STATUSES:
+        return f"bootstrap stack {stack_name} in {region_name} is {status}"
+    return None
+
+
+def check_account(
+    result: AccountResult,
+    regions: List[str],
+    access_role: str,
+    stack_prefix: str,
+    caller_account: str,
+    partition: str,
+    timeout_seconds: int,
+) -> AccountResult:
+    """Assumes the access role in one account and checks every region."""
+    deadline = time.monotonic() + timeout_seconds
+    stack_name = f"{stack_prefix}{CDK_TOOLKIT_STACK_SUFFIX}"
+    with span("account", cat="account", account=result.name):
+        session = None
+        if result.account_id != caller_account:
+            arn = role_arn(result.account_id, access_role, partition)
+            config = client_config(deadline - time.monotonic())
+            try:
+                session = assume_role_session(arn, regions[0] if regions else None, config)
+            except ClientError as e:
+                result.problems.append(f"cannot assume {arn}: {e.response['Error']['Code']}")
+                return result
+            except BotoCoreError as e:
+                result.problems.append(f"cannot assume {arn}: {e}")
+                return result
+        for region in regions:
+            remaining = deadline - time.monotonic()
+            if remaining < 0:
+                result.problems.append(
+                    f"timed out after {timeout_seconds}s; regions not checked from {region}"
+                )
+                break
+            config = client_config(remaining)
+            try:
+                cf_client = get_aws_client("cloudformation", region_name=region, session=session, config=config)
+                problem = check_bootstrap_stack(cf_client, stack_name, region)
+            except BotoCoreError as e:
+                problem = f"error checking {region}: {e}"
+            if problem:
+                result.problems.append(problem)
+    return result
+
+
+def check_account_bootstrap(
+    config_dir: str,
+    stack_prefix: str = DEFAULT_STACK_PREFIX,
+    max_workers: Optional[int] = None,
+    account_timeout: Optional[int] = None,
+) -> bool:
+    """
+    Checks that every account in accounts-config.yaml can be accessed with the
+    management access role and is CDK-bootstrapped in every enabled region.
+
+    Args:
+        config_dir: Directory containing the LZA configuration files.
+        stack_prefix: The accelerator prefix (bootstrap stack is <prefix>-CDKToolkit).
+        max_workers: Accounts checked concurrently (default PREFLIGHT_MAX_WORKERS or 20).
+        account_timeout: Seconds allowed per account (default PREFLIGHT_ACCOUNT_TIMEOUT or 60).
+
+    Returns:
+        True if every account passed, False otherwise.
+    """
+    max_workers = max_workers or env_int(MAX_WORKERS_ENV_VAR, DEFAULT_MAX_WORKERS)
+    account_timeout = account_timeout or env_int(ACCOUNT_TIMEOUT_ENV_VAR, DEFAULT_ACCOUNT_TIMEOUT_SECONDS)
+
+    configs = load_configs(Path(config_dir), ["accounts-config.yaml", "global-config.yaml"])
+    accounts_config = configs["accounts-config.yaml"] or {}
+    global_config = configs["global-config.yaml"] or {}
+    regions = enabled_regions(global_config)
+    home_region = global_config.get("homeRegion")
+    access_role = global_config.get("managementAccountAccessRole", DEFAULT_ACCESS_ROLE)
+    accounts = iter_accounts(accounts_config)
+
+    logger.info(
+        f"Checking bootstrap prerequisites for {len(accounts)} account(s) in {len(regions)} region(s) "
+        f"(role '{access_role}', {max_workers} workers, {account_timeout}s per account)..."
+    )
+
+    try:
+        identity = get_aws_client("sts", region_name=home_region).get_caller_identity()
+        caller_account = identity["Account"]
+        partition = identity["Arn"].split(":")[1]
+        resolved = resolve_account_ids(accounts_config, get_aws_client("organizations", region_name=home_region))
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ["AccessDeniedException", "AWSOrganizationsNotInUseException"]:
+            logger.warning(f"Could not list organization accounts. Skipping bootstrap check. Error: {e}")
+            return True
+        logger.exception(f"Error resolving organization accounts: {e}")
+        return False
+
+    results: List[AccountResult] = []
+    futures = []
+    start = time.monotonic()
+    with ContextThreadPoolExecutor(max_workers=max_workers) as executor:
+        for account in accounts:
+            result = AccountResult(account["name"])
+            results.append(result)
+            account_id, status = resolved.get(account.get("email", "").lower(), (None, None))
+            if account_id is None:
+                result.problems.append(f"no account with email {account.get('email')} in the organization")
+                continue
+            result.account_id = account_id
+            if status != "ACTIVE":
+                result.problems.append(f"account status is {status}")
+                continue
+            futures.append(executor.submit(
+                check_account, result, regions, access_role, stack_prefix,
+                caller_account, partition, account_timeout,
+            ))
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                logger.exception(f"Unexpected error checking account bootstrap: {e}")
+                return False
+
+    passed = True
+    for result in results:
+        label = f"{result.name} ({result.account_id})" if result.account_id else result.name
+        if result.passed:
+            logger.info(f"Account {label}: bootstrap prerequisites OK")
+        else:
+            passed = False
+            for problem in result.problems:
+                logger.error(f"Account {label}: {problem}")
+
+    failed = sum(1 for result in results if not result.passed)
+    elapsed = time.monotonic() - start
+    if passed:
+        logger.info(f"All {len(results)} account(s) are bootstrapped ({elapsed:.1f}s).")
+    else:
+        logger.error(f"{failed} of {len(results)} account(s) are missing bootstrap prerequisites ({elapsed:.1f}s).")
+    return passed
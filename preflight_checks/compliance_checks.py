@@ -0,0 +1,232 @@
+# preflight_checks/compliance_checks.py
+"""
+Organization-wide compliance from an AWS Config aggregator and Security Hub.
+
+Instead of querying every account, this check makes two paginated queries in
+the account that owns the aggregator (normally the Audit / delegated admin
+account):
+
+- ``DescribeAggregateComplianceByConfigRules`` filtered to NON_COMPLIANT, which
+  returns the non-compliant rules of every account and region in one listing.
+- Security Hub ``GetFindings`` with server-side filters (active, unresolved
+  findings at the severities that have thresholds), which returns findings for
+  every account and, with region aggregation, every region.
+
+Results are grouped by the account's OU (from the live organization tree,
+shared with preflight_checks.organization_checks) and compared with per-OU
+thresholds. Thresholds come from a YAML file (COMPLIANCE_THRESHOLDS_FILE):
+
+    default:
+      nonCompliantRules: null   # null: report only
+      criticalFindings: 0
+      highFindings: null
+    organizationalUnits:
+      Sandbox:                  # applies to Sandbox and the OUs below it
+        criticalFindings: 5
+
+The most specific OU entry wins for each threshold.
+"""
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+import yaml
+from botocore.exceptions import ClientError
+
+from preflight_checks.aws_checks import get_aws_client
+from preflight_checks.credentials import assume_role_session
+from preflight_checks.lza_config import ROOT_OU, YAML_LOADER, ou_ancestors
+from preflight_checks.profiling import span
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_OU = "(unknown OU)"
+THRESHOLD_KEYS = ("nonCompliantRules", "criticalFindings", "highFindings")
+DEFAULT_THRESHOLDS: Dict[str, Optional[int]] = {
+    "nonCompliantRules": None,
+    "criticalFindings": 0,
+    "highFindings": None,
+}
+# Security Hub severity label counted by each findings threshold
+SEVERITY_THRESHOLDS = {"CRITICAL": "criticalFindings", "HIGH": "highFindings"}
+# Rules or findings listed per OU in the log; the rest are only counted
+MAX_LISTED = 10
+
+
+@dataclass
+class OUCompliance:
+    """Compliance summary for one OU."""
+
+    non_compliant_rules: Set[str] = field(default_factory=set)
+    non_compliant_accounts: Set[str] = field(default_factory=set)
+    findings: Dict[str, List[str]] = field(default_factory=lambda: defaultdict(list))
+
+    def count(self, key: str) -> int:
+        if key == "nonCompliantRules":
+            return len(self.non_compliant_rules)
+        severity = next(label for label, name in SEVERITY_THRESHOLDS.items() if name == key)
+        return len(self.findings.get(severity, []))
+
+
+def load_thresholds(path: Optional[str]) -> Dict[str, Any]:
+    """Loads the thresholds file, or the defaults if path is not given."""
+    thresholds: Dict[str, Any] = {"default": dict(DEFAULT_THRESHOLDS), "organizationalUnits": {}}
+    if not path:
+        return thresholds
+    data = yaml.load(Path(path).read_text(encoding="utf-8"), Loader=YAML_LOADER) or {}
+    thresholds["default"].update(data.get("default") or {})
+    thresholds["organizationalUnits"] = data.get("organizationalUnits") or {}
+    for section in [thresholds["default"], *thresholds["organizationalUnits"].values()]:
+        unknown = set(section) - set(THRESHOLD_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown threshold(s) {sorted(unknown)} in {path}; expected {list(THRESHOLD_KEYS)}")
+    return thresholds
+
+
+def thresholds_for(ou: str, thresholds: Dict[str, Any]) -> Dict[str, Optional[int]]:
+    """Resolves the thresholds for ou; entries for nearer ancestors override further ones."""
+    resolved = dict(thresholds["default"])
+    by_ou = thresholds["organizationalUnits"]
+    for ancestor in ou_ancestors(ou):
+        resolved.update(by_ou.get(ancestor) or {})
+    return resolved
+
+
+def fetch_non_compliant_rules(config_client, aggregator_name: str) -> List[Dict[str, Any]]:
+    """All NON_COMPLIANT (rule, account, region) results in the aggregator."""
+    results: List[Dict[str, Any]] = []
+    paginator = config_client.get_paginator("describe_aggregate_compliance_by_config_rules")
+    with span("aggregate_compliance", cat="compliance", aggregator=aggregator_name):
+        for page in paginator.paginate(
+            ConfigurationAggregatorName=aggregator_name,
+            Filters={"ComplianceType": "NON_COMPLIANT"},
+        ):
+            results.extend(page.get("AggregateComplianceByConfigRules", []))
+    return results
+
+
+def fetch_findings(securityhub_client, severities: List[str]) -> List[Dict[str, Any]]:
+    """Active, unresolved Security Hub findings with the given severity labels."""
+    filters = {
+        "SeverityLabel": [{"Value": label, "Comparison": "EQUALS"} for label in severities],
+        "RecordState": [{"Value": "ACTIVE", "Comparison": "EQUALS"}],
+        "WorkflowStatus": [
+            {"Value": "NEW", "Comparison": "EQUALS"},
+            {"Value": "NOTIFIED", "Comparison": "EQUALS"},
+        ],
+    }
+    findings: List[Dict[str, Any]] = []
+    paginator = securityhub_client.get_paginator("get_findings")
+    with span("security_hub_findings", cat="compliance", severities=",".join(severities)):
+        for page in paginator.paginate(Filters=filters, PaginationConfig={"PageSize": 100}):
+            findings.extend(page.get("Findings", []))
+    return findings
+
+
+def account_ou_map() -> Dict[str, str]:
+    """Account ID to OU path from the (memoized) live organization tree, if readable."""
+    from preflight_checks.organization_checks import fetch_organization_tree
+
+    try:
+        tree = fetch_organization_tree(get_aws_client("organizations"))
+    except ClientError as e:
+        logger.warning(f"Could not read the organization tree, findings are not grouped by OU. Error: {e}")
+        return {}
+    return {account.account_id: account.ou for account in tree.accounts.values()}
+
+
+def summarise_by_ou(
+    rule_results: List[Dict[str, Any]], findings: List[Dict[str, Any]], ous_by_account: Dict[str, str]
+) -> Dict[str, OUCompliance]:
+    summary: Dict[str, OUCompliance] = defaultdict(OUCompliance)
+    for result in rule_results:
+        account_id = result.get("AccountId", "")
+        ou = summary[ous_by_account.get(account_id, UNKNOWN_OU)]
+        ou.non_compliant_rules.add(result.get("ConfigRuleName", ""))
+        ou.non_compliant_accounts.add(account_id)
+    for finding in findings:
+        account_id = finding.get("AwsAccountId", "")
+        severity = (finding.get("Severity") or {}).get("Label", "")
+        summary[ous_by_account.get(account_id, UNKNOWN_OU)].findings[severity].append(
+            f"{finding.get('Title', finding.get('Id'))} ({account_id}, {finding.get('Region', '')})"
+        )
+    return summary
+
+
+def check_organization_compliance(
+    aggregator_name: str,
+    region_name: str,
+    thresholds_file: Optional[str] = None,
+    role_arn: Optional[str] = None,
+) -> bool:
+    """
+    Checks aggregated Config rule compliance and Security Hub findings per OU
+    against thresholds.
+
+    Args:
+        aggregator_name: Name of the organization Config aggregator.
+        region_name: Region of the aggregator and the Security Hub aggregation region.
+        thresholds_file: YAML thresholds file (see module docstring).
+        role_arn: Role to assume in the aggregator's account (e.g. Audit);
+            current credentials if omitted.
+
+    Returns:
+        True if every OU is within its thresholds (or the services are not
+        accessible), False otherwise.
+    """
+    logger.info(
+        f"Checking organization compliance with Config aggregator '{aggregator_name}' "
+        f"and Security Hub in region '{region_name}'..."
+    )
+    thresholds = load_thresholds(thresholds_file)
+    all_limits = [thresholds["default"], *thresholds["organizationalUnits"].values()]
+    severities = [
+        label for label, key in SEVERITY_THRESHOLDS.items()
+        if any(limits.get(key) is not None for limits in all_limits)
+    ]
+
+    try:
+        session = assume_role_session(role_arn, region_name) if role_arn else None
+        config_client = get_aws_client("config", region_name=region_name, session=session)
+        rule_results = fetch_non_compliant_rules(config_client, aggregator_name)
+        findings: List[Dict[str, Any]] = []
+        if severities:
+            securityhub_client = get_aws_client("securityhub", region_name=region_name, session=session)
+            findings = fetch_findings(securityhub_client, severities)
+    except ClientError as e:
+        error_code = e.response["Error"]["Code"]
+        if error_code in ["AccessDeniedException", "NoSuchConfigurationAggregatorException", "InvalidAccessException"]:
+            logger.warning(f"Could not query organization compliance. Skipping check. Error: {e}")
+            return True
+        logger.exception(f"Error querying organization compliance: {e}")
+        return False
+
+    summary = summarise_by_ou(rule_results, findings, account_ou_map())
+    passed = True
+    for ou_name in sorted(summary):
+        ou = summary[ou_name]
+        limits = thresholds_for(ou_name if ou_name != UNKNOWN_OU else ROOT_OU, thresholds)
+        counted = ["nonCompliantRules"] + [SEVERITY_THRESHOLDS[label] for label in severities]
+        counts = ", ".join(f"{key}={ou.count(key)}" for key in counted)
+        exceeded = [key for key in counted if limits.get(key) is not None and ou.count(key) > limits[key]]
+        log = logger.error if exceeded else logger.info
+        log(f"OU {ou_name}: {counts} ({len(ou.non_compliant_accounts)} account(s) with non-compliant rules)")
+        for rule in sorted(ou.non_compliant_rules)[:MAX_LISTED]:
+            log(f"  Non-compliant rule: {rule}")
+        for severity in severities:
+            for title in ou.findings.get(severity, [])[:MAX_LISTED]:
+                log(f"  {severity.title()} finding: {title}")
+        for key in exceeded:
+            logger.error(f"OU {ou_name}: {key} is {ou.count(key)}, above the threshold of {limits[key]}")
+            passed = False
+
+    if passed:
+        logger.info(
+            f"Organization compliance is within thresholds ({len(rule_results)} non-compliant rule result(s), "
+            f"{len(findings)} finding(s))."
+        )
+    else:
+        logger.error("Organization compliance check failed.")
+    return passed
@@ -0,0 +1,118 @@
+# preflight_checks/credentials.py
+"""
+Cached STS credentials for checks that run inside member accounts.
+
+Checks that fan out across accounts assume the LZA management access role
+(``managementAccountAccessRole`` in global-config.yaml) in each account. The
+temporary credentials are cached per role ARN until shortly before they
+expire, so several checks (and several regions) in the same account share one
+AssumeRole call. Concurrent requests for the same role wait for a single
+AssumeRole call, while requests for different roles run in parallel.
+"""
+import datetime
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from preflight_checks.aws_checks import get_aws_client
+from preflight_checks.rate_limiting import SESSION_ACCOUNT_ATTRIBUTE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION_NAME = "lza-preflight-checks"
+DEFAULT_DURATION_SECONDS = 3600
+# Refresh credentials this long before they expire, so a call that starts
+# just before expiry does not fail half way through a check.
+EXPIRY_MARGIN = datetime.timedelta(minutes=5)
+
+
+def role_arn(account_id: str, role_name: str, partition: str = "aws") -> str:
+    """Returns the ARN of role_name in account_id."""
+    return f"arn:{partition}:iam::{account_id}:role/{role_name}"
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class AssumedRoleCredentialCache:
+    """Thread-safe cache of AssumeRole credentials keyed by role ARN."""
+
+    def __init__(
+        self,
+        session_name: str = DEFAULT_SESSION_NAME,
+        duration_seconds: int = DEFAULT_DURATION_SECONDS,
+        clock: Callable[[], datetime.datetime] = _utcnow,
+    ) -> None:
+        self.session_name = session_name
+        self.duration_seconds = duration_seconds
+        self._clock = clock
+        self._credentials: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def _lock_for(self, arn: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(arn, threading.Lock())
+
+    def _is_fresh(self, credentials: Optional[Dict[str, Any]]) -> bool:
+        return credentials is not None and credentials["Expiration"] - EXPIRY_MARGIN > self._clock()
+
+    def get_credentials(self, arn: str, region_name: Optional[str] = None, config=None) -> Dict[str, Any]:
+        """
+        Returns cached credentials for arn, calling sts:AssumeRole if there are
+        none or they are about to expire. config is the botocore Config of the
+        STS client (e.g. timeouts within a caller's time budget).
+
+        Raises:
+            botocore.exceptions.ClientError: If the role cannot be assumed.
+        """
+        credentials = self._credentials.get(arn)
+        if self._is_fresh(credentials):
+            return credentials
+        with self._lock_for(arn):
+            # Another thread may have refreshed the credentials while we waited
+            credentials = self._credentials.get(arn)
+            if self._is_fresh(credentials):
+                return credentials
+            sts_client = get_aws_client("sts", region_name=region_name, config=config)
+            response = sts_client.assume_role(
+                RoleArn=arn,
+                RoleSessionName=self.session_name,
+                DurationSeconds=self.duration_seconds,
+            )
+            credentials = response["Credentials"]
+            self._credentials[arn] = credentials
+            logger.debug(f"Assumed {arn} (credentials expire {credentials['Expiration']})")
+            return credentials
+
+    def session(self, arn: str, region_name: Optional[str] = None, config=None):
+        """Returns a new boto3 Session using the cached credentials for arn."""
+        import boto3
+
+        credentials = self.get_credentials(arn, region_name, config)
+        # Sessions are not thread-safe, so each caller gets its own; only the
+        # credentials are shared.
+        session = boto3.Session(
+            aws_access_key_id=credentials["AccessKeyId"],
+            aws_secret_access_key=credentials["SecretAccessKey"],
+            aws_session_token=credentials["SessionToken"],
+            region_name=region_name,
+        )
+        # Clients of the session are rate limited per member account
+        setattr(session, SESSION_ACCOUNT_ATTRIBUTE, arn.split(":")[4])
+        return session
+
+    def clear(self) -> None:
+        """Drops all cached credentials."""
+        with self._locks_lock:
+            self._credentials.clear()
+
+
+# Process-wide cache shared by all checks in a run
+credential_cache = AssumedRoleCredentialCache()
+
+
+def assume_role_session(arn: str, region_name: Optional[str] = None, config=None):
+    """Returns a boto3 Session for arn using the process-wide credential cache."""
+    return credential_cache.session(arn, region_name, config)
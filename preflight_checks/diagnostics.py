@@ -0,0 +1,105 @@
+# preflight_checks/diagnostics.py
+"""
+Positioned diagnostics for YAML and JSON files.
+
+Shared by the validation scripts (scripts/watch_config.py,
+scripts/validate_environments.py, scripts/validate_cfn_templates.py), so that
+one script does not have to import another: files are parsed once into both
+their data and their node tree, and messages point at the line and column of
+the node they are about.
+"""
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional, Tuple
+
+import yaml
+
+from preflight_checks.lza_config import YAML_LOADER
+
+
+@dataclass(frozen=True)
+class Diagnostic:
+    """A single validation message tied to a file position (1-based)."""
+
+    path: str
+    line: int
+    column: int
+    severity: str
+    message: str
+
+    def format(self) -> str:
+        message = " ".join(self.message.split())
+        return f"{self.path}:{self.line}:{self.column}: {self.severity}: {message}"
+
+
+def parse_yaml_with_nodes(text: str) -> Tuple[Any, Optional[yaml.Node]]:
+    """Parse YAML text once, returning both the data and its node tree (for positions)."""
+    loader = YAML_LOADER(text)
+    try:
+        node = loader.get_single_node()
+        data = loader.construct_document(node) if node is not None else None
+    finally:
+        loader.dispose()
+    return data, node
+
+
+def locate(node: Optional[yaml.Node], path: Iterable[Any]) -> Tuple[int, int]:
+    """Return the (line, column) of the deepest node along a JSON path, 1-based."""
+    if node is None:
+        return 1, 1
+    for part in path:
+        child = None
+        if isinstance(node, yaml.MappingNode):
+            for key_node, value_node in node.value:
+                if key_node.value == part:
+                    child = value_node
+                    break
+        elif isinstance(node, yaml.SequenceNode) and isinstance(part, int):
+            if 0 <= part < len(node.value):
+                child = node.value[part]
+        if child is None:
+            break
+        node = child
+    return node.start_mark.line + 1, node.start_mark.column + 1
+
+
+# --- CloudFormation templates ---
+
+# Short-form intrinsic function tags (!Ref, !Sub, ...)
+SHORT_FORM_TAGS = {
+    "Ref", "Condition", "Base64", "Cidr", "FindInMap", "GetAtt", "GetAZs", "ImportValue",
+    "Join", "Select", "Split", "Sub", "Transform", "And", "Equals", "If", "Not", "Or",
+    "ToJsonString", "Length",
+}
+
+
+def _construct_short_form(loader, suffix, node):
+    """!Ref x -> {"Ref": x}, !GetAtt a.b -> {"Fn::GetAtt": ["a", "b"]}, !Sub s -> {"Fn::Sub": s}."""
+    if suffix not in SHORT_FORM_TAGS:
+        raise yaml.constructor.ConstructorError(None, None, f"unknown tag !{suffix}", node.start_mark)
+    if isinstance(node, yaml.ScalarNode):
+        value = loader.construct_scalar(node)
+        if suffix == "GetAtt":
+            value = value.split(".", 1)
+    elif isinstance(node, yaml.SequenceNode):
+        value = loader.construct_sequence(node, deep=True)
+    else:
+        value = loader.construct_mapping(node, deep=True)
+    return {suffix if suffix in ("Ref", "Condition") else f"Fn::{suffix}": value}
+
+
+class CfnLoader(YAML_LOADER):
+    """YAML loader for CloudFormation templates: short-form tags, and dates kept as strings."""
+
+
+CfnLoader.add_multi_constructor("!", _construct_short_form)
+CfnLoader.add_constructor("tag:yaml.org,2002:timestamp", CfnLoader.construct_yaml_str)
+
+
+def load_template(text: str) -> Tuple[Any, Optional[yaml.Node]]:
+    """Parses a YAML or JSON template, returning its data and node tree (for positions)."""
+    loader = CfnLoader(text)
+    try:
+        node = loader.get_single_node()
+        return (loader.construct_document(node) if node is not None else None), node
+    finally:
+        loader.dispose()
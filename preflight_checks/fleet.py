@@ -0,0 +1,254 @@
+# preflight_checks/fleet.py
+"""
+Fleet mode: run the preflight checks against several landing zones at once.
+
+Each landing zone is an independent LZA installation with its own management
+account, described in an inventory file:
+
+    landingZones:
+      - name: prod
+        roleArn: arn:aws:iam::111111111111:role/LzaPreflightRole
+        regions: [ap-southeast-2, us-east-1]   # CloudFormation stack check
+        ctHomeRegion: ap-southeast-2           # default: the first region
+        stackPrefix: AWSAccelerator-prod       # default: AWSAccelerator-<name>
+        # Optional, as the environment variables of the single landing zone run:
+        configDir: environments/prod/config    # LZA_CONFIG_DIR, relative to the inventory
+        acceleratorPrefix: AWSAccelerator      # ACCELERATOR_PREFIX
+        configAggregatorName: org-aggregator   # CONFIG_AGGREGATOR_NAME
+        complianceRoleArn: arn:aws:iam::222222222222:role/Audit  # COMPLIANCE_ROLE_ARN
+        complianceThresholdsFile: thresholds.yaml                # COMPLIANCE_THRESHOLDS_FILE
+
+Every landing zone runs the full check suite (aws_checks.run_checks)
+concurrently with the others, in its own boto3 Session with the credentials of
+roleArn. The session is made current with aws_checks.use_session, so the
+checks, their worker pools and the member-account role assumptions all use
+that landing zone's management account. The rate limiter keeps separate
+buckets per management account, and per organization for the Organizations
+and Control Tower APIs.
+
+One JSON line per landing zone is written to stdout as soon as it finishes:
+
+    {"landingZone": "prod", "account": "111111111111", "passed": false,
+     "checks": {"cloudformation": true, "control_tower": false}, "error": null,
+     "durationSeconds": 41.2}
+
+Log lines go to stderr, prefixed with the landing zone. The exit code is 0 if
+every landing zone passed and 1 otherwise, including landing zones whose role
+could not be assumed.
+
+Usage:
+    python -m preflight_checks.fleet landing-zones.yaml [--only prod staging] [--jobs 4]
+"""
+import argparse
+import concurrent.futures
+import contextvars
+import json
+import logging
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import yaml
+from botocore.exceptions import BotoCoreError, ClientError
+
+from preflight_checks.aws_checks import (
+    DEFAULT_STACK_PREFIX,
+    ContextThreadPoolExecutor,
+    PreflightSettings,
+    run_checks,
+    use_session,
+)
+from preflight_checks.credentials import assume_role_session
+from preflight_checks.lza_config import YAML_LOADER
+from preflight_checks.profiling import profiled, span
+from preflight_checks.rate_limiting import SESSION_ORGANIZATION_ATTRIBUTE
+
+logger = logging.getLogger(__name__)
+
+# Optional inventory keys and the PreflightSettings field they set
+OPTIONAL_SETTINGS = {
+    "acceleratorPrefix": "accelerator_prefix",
+    "configAggregatorName": "aggregator_name",
+    "complianceRoleArn": "compliance_role_arn",
+}
+# Optional inventory keys holding paths, resolved relative to the inventory file
+PATH_SETTINGS = {
+    "configDir": "config_dir",
+    "complianceThresholdsFile": "compliance_thresholds_file",
+}
+
+# The landing zone the current thread (or worker task) is checking, for log lines
+_current_landing_zone: contextvars.ContextVar = contextvars.ContextVar("preflight_landing_zone", default=None)
+
+
+@dataclass
+class LandingZone:
+    name: str
+    role_arn: str
+    settings: PreflightSettings
+
+    @property
+    def account_id(self) -> str:
+        return self.role_arn.split(":")[4]
+
+
+def parse_landing_zone(entry: Dict[str, Any], base_dir: Path) -> LandingZone:
+    """
+    Builds a LandingZone from one inventory entry.
+
+    Raises:
+        ValueError: If a required key is missing or malformed.
+    """
+    name = entry.get("name")
+    role_arn = entry.get("roleArn") or ""
+    regions = entry.get("regions") or []
+    if isinstance(regions, str):
+        regions = [regions]
+    if not name:
+        raise ValueError(f"Landing zone without a name: {entry}")
+    if len(role_arn.split(":")) < 6:
+        raise ValueError(f"Landing zone {name}: roleArn {role_arn!r} is not an IAM role ARN")
+    if not regions:
+        raise ValueError(f"Landing zone {name}: no regions")
+    settings = PreflightSettings(
+        environment=name,
+        regions=list(regions),
+        ct_home_region=entry.get("ctHomeRegion") or regions[0],
+        stack_prefix=entry.get("stackPrefix") or f"{DEFAULT_STACK_PREFIX}-{name}",
+    )
+    for key, attribute in OPTIONAL_SETTINGS.items():
+        if entry.get(key):
+            setattr(settings, attribute, entry[key])
+    for key, attribute in PATH_SETTINGS.items():
+        if entry.get(key):
+            setattr(settings, attribute, str(base_dir / entry[key]))
+    return LandingZone(name, role_arn, settings)
+
+
+def load_inventory(path: str) -> List[LandingZone]:
+    """
+    Loads the landing zones of an inventory file.
+
+    Raises:
+        ValueError: If an entry is invalid or two landing zones share a name.
+    """
+    data = yaml.load(Path(path).read_text(encoding="utf-8"), Loader=YAML_LOADER) or {}
+    base_dir = Path(path).parent
+    landing_zones = [parse_landing_zone(entry or {}, base_dir) for entry in data.get("landingZones") or []]
+    names = [landing_zone.name for landing_zone in landing_zones]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate landing zone name(s) {duplicates} in {path}")
+    return landing_zones
+
+
+class LandingZoneLogFilter(logging.Filter):
+    """Adds the landing zone being checked to log records, as ``%(landing_zone)s``."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        name = _current_landing_zone.get()
+        record.landing_zone = f"[{name}] " if name else ""
+        return True
+
+
+def configure_logging() -> None:
+    """Logs to stderr with the landing zone of each line, keeping stdout for results."""
+    handler = logging.StreamHandler(sys.stderr)
+    handler.addFilter(LandingZoneLogFilter())
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(landing_zone)s%(message)s"))
+    logging.basicConfig(level=logging.INFO, handlers=[handler])
+
+
+def landing_zone_session(landing_zone: LandingZone):
+    """A session with the credentials of the landing zone's role, labelled with its organization."""
+    session = assume_role_session(landing_zone.role_arn, landing_zone.settings.ct_home_region)
+    # Organizations and Control Tower limits apply per landing zone
+    setattr(session, SESSION_ORGANIZATION_ATTRIBUTE, landing_zone.name)
+    return session
+
+
+def check_landing_zone(landing_zone: LandingZone) -> Dict[str, Any]:
+    """Runs the check suite against one landing zone and returns its result record."""
+    token = _current_landing_zone.set(landing_zone.name)
+    start = time.monotonic()
+    record: Dict[str, Any] = {
+        "landingZone": landing_zone.name,
+        "account": landing_zone.account_id,
+        "passed": False,
+        "checks": {},
+        "error": None,
+    }
+    with span("check_landing_zone", cat="fleet", landing_zone=landing_zone.name):
+        try:
+            session = landing_zone_session(landing_zone)
+            landing_zone.settings.log()
+            with use_session(session):
+                record["checks"] = run_checks(landing_zone.settings)
+            record["passed"] = all(record["checks"].values())
+        except (ClientError, BotoCoreError, OSError, ValueError) as e:
+            logger.error(f"Could not check landing zone {landing_zone.name}: {e}")
+            record["error"] = str(e)
+        except Exception as e:
+            logger.exception(f"An unexpected error occurred checking landing zone {landing_zone.name}: {e}")
+            record["error"] = str(e)
+    record["durationSeconds"] = round(time.monotonic() - start, 1)
+    status = "PASSED" if record["passed"] else "FAILED"
+    logger.info(f"Landing zone {landing_zone.name}: {status} in {record['durationSeconds']}s")
+    _current_landing_zone.reset(token)
+    return record
+
+
+def run_fleet(landing_zones: List[LandingZone], max_workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Checks the landing zones concurrently, yielding each result record as it finishes."""
+    if not landing_zones:
+        return
+    with ContextThreadPoolExecutor(max_workers=max_workers or len(landing_zones)) as executor:
+        futures = [executor.submit(check_landing_zone, landing_zone) for landing_zone in landing_zones]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+
+@profiled("preflight_fleet")
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the preflight checks against several landing zones")
+    parser.add_argument("inventory", help="YAML or JSON file listing the landing zones")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="Only check these landing zones")
+    parser.add_argument("--jobs", type=int, help="Landing zones checked concurrently (default: all)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write a cProfile dump and Chrome trace of the run (same as LZA_PROFILE=1)")
+    args = parser.parse_args()
+
+    configure_logging()
+    try:
+        landing_zones = load_inventory(args.inventory)
+    except (OSError, ValueError, yaml.YAMLError) as e:
+        logger.error(f"Could not load inventory {args.inventory}: {e}")
+        sys.exit(2)
+    if args.only:
+        unknown = sorted(set(args.only) - {landing_zone.name for landing_zone in landing_zones})
+        if unknown:
+            logger.error(f"Landing zone(s) {unknown} are not in {args.inventory}")
+            sys.exit(2)
+        landing_zones = [landing_zone for landing_zone in landing_zones if landing_zone.name in args.only]
+    if not landing_zones:
+        logger.error(f"No landing zones in {args.inventory}")
+        sys.exit(2)
+
+    logger.info(f"Checking {len(landing_zones)} landing zone(s)...")
+    failed = []
+    for record in run_fleet(landing_zones, args.jobs):
+        print(json.dumps(record), flush=True)
+        if not record["passed"]:
+            failed.append(record["landingZone"])
+
+    if failed:
+        logger.error(f"{len(failed)} of {len(landing_zones)} landing zone(s) failed: {', '.join(sorted(failed))}")
+        sys.exit(1)
+    logger.info(f"All {len(landing_zones)} landing zone(s) passed.")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+# preflight_checks/lza_config.py
+"""
+Helpers for loading rendered Landing Zone Accelerator configuration files.
+
+Config files reference values from replacements-config.yaml as ``{{ Key }}``.
+Placeholders can appear unquoted (e.g. ``destination: {{ AwsCidr }}``), so
+files are rendered as text before they are parsed, the same way
+scripts/validate_landing_zone_schema.py does.
+"""
+import functools
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import yaml
+
+REPLACEMENTS_FILE_NAME = "replacements-config.yaml"
+ROOT_OU = "Root"
+
+RE_KEY_PATTERN = re.compile(r"\{\{\s*([A-Za-z0-9_]+)\s*\}\}")
+
+# libyaml's parser is several times faster than the pure-Python one
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def parse_replacements(data: Any) -> Dict[str, Any]:
+    """Extract {key: value} from a parsed replacements-config.yaml document."""
+    replacements: Dict[str, Any] = {}
+    if isinstance(data, dict):
+        for item in data.get("globalReplacements") or []:
+            if isinstance(item, dict) and "key" in item and "value" in item:
+                replacements[item["key"]] = item["value"]
+    return replacements
+
+
+def load_replacements(config_dir: Path) -> Dict[str, Any]:
+    """Load replacements from config_dir, or an empty dict if the file is absent."""
+    path = Path(config_dir) / REPLACEMENTS_FILE_NAME
+    if not path.exists():
+        return {}
+    return parse_replacements(yaml.load(path.read_text(encoding="utf-8"), Loader=YAML_LOADER))
+
+
+def render(text: str, replacements: Dict[str, Any]) -> str:
+    """Apply replacements in a single pass; unknown keys are left untouched."""
+    def _substitute(match):
+        key = match.group(1)
+        return str(replacements[key]) if key in replacements else match.group(0)
+
+    return RE_KEY_PATTERN.sub(_substitute, text)
+
+
+def load_config(config_dir: Path, name: str, replacements: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    Load a rendered config file.
+
+    Args:
+        config_dir: Directory containing the configuration files.
+        name: File name relative to config_dir (e.g. "network-config.yaml").
+        replacements: Replacement values; loaded from config_dir if omitted.
+
+    Returns:
+        The parsed document, or None if the file does not exist.
+    """
+    path = Path(config_dir) / name
+    if not path.exists():
+        return None
+    text = path.read_text(encoding="utf-8")
+    if name != REPLACEMENTS_FILE_NAME:
+        if replacements is None:
+            replacements = load_replacements(config_dir)
+        text = render(text, replacements)
+    return yaml.load(text, Loader=YAML_LOADER)
+
+
+def load_configs(config_dir: Path, names: Iterable[str]) -> Dict[str, Any]:
+    """Load several rendered config files, reading replacements once."""
+    replacements = load_replacements(config_dir)
+    return {name: load_config(config_dir, name, replacements) for name in names}
+
+
+# --- Parse once, render per environment ---
+
+# Placeholders are swapped for a token that is a valid plain YAML scalar, so a
+# file can be parsed before its replacement values are known. Keys never
+# contain "-", which terminates the token.
+PLACEHOLDER_TOKEN = "LZA-PLACEHOLDER-{}-"
+RE_PLACEHOLDER_TOKEN = re.compile(r"LZA-PLACEHOLDER-([A-Za-z0-9_]+)-")
+
+
+class _PlaceholderScalar(str):
+    """A parsed scalar containing placeholder tokens; plain scalars are re-resolved after rendering."""
+
+    plain = False
+
+
+def _construct_str(loader, node):
+    value = loader.construct_scalar(node)
+    if "LZA-PLACEHOLDER-" not in value:
+        return value
+    scalar = _PlaceholderScalar(value)
+    # libyaml reports plain scalars with style "", the pure-Python parser with None
+    scalar.plain = not node.style
+    return scalar
+
+
+class _TemplateLoader(YAML_LOADER):
+    pass
+
+
+_TemplateLoader.add_constructor("tag:yaml.org,2002:str", _construct_str)
+
+
+@functools.lru_cache(maxsize=4096)
+def _resolve_plain(text: str) -> Any:
+    """The value YAML gives a plain scalar, e.g. "65521" -> 65521."""
+    return yaml.load(text, Loader=YAML_LOADER)
+
+
+class ConfigTemplate:
+    """
+    A config file parsed once with its placeholders unresolved.
+
+    ``render`` builds the document for a set of replacement values by
+    re-rendering only the scalars that contain placeholders. Containers on the
+    path to those scalars are copied; everything else is shared between the
+    rendered documents, so they must be treated as read-only.
+
+    Files where a placeholder is a mapping key, or that only parse once
+    rendered, fall back to rendering the text and parsing it for every call.
+    """
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.keys: Set[str] = set(RE_KEY_PATTERN.findall(text))
+        self.document: Any = None
+        self.node: Optional[yaml.Node] = None
+        self.slots: List[Tuple[Tuple[Any, ...], _PlaceholderScalar]] = []
+        self.fallback = False
+        if not self.keys:
+            self.document, self.node = self._parse(text, YAML_LOADER)
+            return
+        tokenised = RE_KEY_PATTERN.sub(lambda match: PLACEHOLDER_TOKEN.format(match.group(1)), text)
+        try:
+            self.document, self.node = self._parse(tokenised, _TemplateLoader)
+            self._collect(self.document, ())
+        except (yaml.YAMLError, TypeError):
+            self.fallback = True
+
+    @staticmethod
+    def _parse(text: str, loader_class) -> Tuple[Any, Optional[yaml.Node]]:
+        loader = loader_class(text)
+        try:
+            node = loader.get_single_node()
+            return (loader.construct_document(node) if node is not None else None), node
+        finally:
+            loader.dispose()
+
+    def _collect(self, value: Any, path: Tuple[Any, ...]) -> None:
+        if isinstance(value, _PlaceholderScalar):
+            self.slots.append((path, value))
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                if isinstance(key, _PlaceholderScalar):
+                    raise TypeError("placeholder in a mapping key")
+                self._collect(item, path + (key,))
+        elif isinstance(value, list):
+            for index, item in enumerate(value):
+                self._collect(item, path + (index,))
+
+    @staticmethod
+    def _render_scalar(scalar: _PlaceholderScalar, replacements: Dict[str, Any]) -> Any:
+        missing = False
+
+        def _substitute(match):
+            nonlocal missing
+            key = match.group(1)
+            if key in replacements:
+                return str(replacements[key])
+            missing = True
+            return f"{{{{ {key} }}}}"
+
+        text = RE_PLACEHOLDER_TOKEN.sub(_substitute, scalar)
+        if scalar.plain and not missing:
+            return _resolve_plain(text)
+        return text
+
+    def render(self, replacements: Dict[str, Any]) -> Any:
+        """The document with replacements applied (unknown keys are left as "{{ Key }}")."""
+        if self.fallback:
+            return yaml.load(render(self.text, replacements), Loader=YAML_LOADER)
+        if not self.slots:
+            return self.document
+        copies: Dict[Tuple[Any, ...], Any] = {(): _shallow_copy(self.document)}
+        for path, scalar in self.slots:
+            parent = copies[()]
+            for depth in range(1, len(path)):
+                prefix = path[:depth]
+                child = copies.get(prefix)
+                if child is None:
+                    child = copies[prefix] = _shallow_copy(parent[path[depth - 1]])
+                    parent[path[depth - 1]] = child
+                parent = child
+            if path:
+                parent[path[-1]] = self._render_scalar(scalar, replacements)
+            else:
+                return self._render_scalar(scalar, replacements)
+        return copies[()]
+
+
+def _shallow_copy(value: Any) -> Any:
+    return dict(value) if isinstance(value, dict) else list(value)
+
+
+def load_template(config_dir: Path, name: str) -> Optional[ConfigTemplate]:
+    """Parse a config file once for rendering with several sets of replacements, or None if absent."""
+    path = Path(config_dir) / name
+    if not path.exists():
+        return None
+    return ConfigTemplate(path.read_text(encoding="utf-8"))
+
+
+# --- Organization structure ---
+
+def ou_ancestors(ou: str) -> List[str]:
+    """
+    Return the OU path from Root down to ou, inclusive.
+
+    >>> ou_ancestors("SomeEnv/Production")
+    ['Root', 'SomeEnv', 'SomeEnv/Production']
+    """
+    if not ou or ou == ROOT_OU:
+        return [ROOT_OU]
+    parts = ou.split("/")
+    return [ROOT_OU] + ["/".join(parts[:index]) for index in range(1, len(parts) + 1)]
+
+
+def iter_accounts(accounts_config: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Return mandatory and workload accounts from accounts-config.yaml."""
+    if not accounts_config:
+        return []
+    return list(accounts_config.get("mandatoryAccounts") or []) + list(
+        accounts_config.get("workloadAccounts") or []
+    )
+
+
+def account_ous(accounts_config: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Map account name to its organizational unit path."""
+    return {
+        account["name"]: account.get("organizationalUnit") or ROOT_OU
+        for account in iter_accounts(accounts_config)
+        if "name" in account
+    }
+
+
+def resolve_deployment_targets(
+    targets: Optional[Dict[str, Any]], accounts_config: Optional[Dict[str, Any]]
+) -> Set[str]:
+    """
+    Resolve an LZA deploymentTargets block to account names.
+
+    Organizational units include accounts in nested OUs, and "Root" includes
+    every account. excludedAccounts are removed from the result.
+    """
+    if not targets:
+        return set()
+    ous_by_account = account_ous(accounts_config)
+    target_ous = set(targets.get("organizationalUnits") or [])
+    accounts = set(targets.get("accounts") or [])
+    if target_ous:
+        for account, ou in ous_by_account.items():
+            if target_ous & set(ou_ancestors(ou)):
+                accounts.add(account)
+    return accounts - set(targets.get("excludedAccounts") or [])
+
+
+def vpc_instances(
+    network_config: Optional[Dict[str, Any]], accounts_config: Optional[Dict[str, Any]]
+) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """Yields (account, region, vpc) for vpcs and every target account of vpcTemplates."""
+    for vpc in (network_config or {}).get("vpcs") or []:
+        yield vpc.get("account"), vpc.get("region"), vpc
+    for template in (network_config or {}).get("vpcTemplates") or []:
+        for account in sorted(resolve_deployment_targets(template.get("deploymentTargets"), accounts_config)):
+            yield account, template.get("region"), template
+
+
+def enabled_regions(global_config: Optional[Dict[str, Any]]) -> List[str]:
+    """Return the home region followed by the other enabled regions."""
+    if not global_config:
+        return []
+    regions = [global_config["homeRegion"]] if global_config.get("homeRegion") else []
+    for region in global_config.get("enabledRegions") or []:
+        if region not in regions:
+            regions.append(region)
+    return regions
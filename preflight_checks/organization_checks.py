@@ -0,0 +1,218 @@
+# preflight_checks/organization_checks.py
+"""
+Compare the live AWS Organizations tree with organization-config.yaml and
+accounts-config.yaml.
+
+The live tree is fetched level by level: every OU on one level is expanded
+(ListOrganizationalUnitsForParent and ListAccountsForParent) concurrently on a
+bounded thread pool, so an organization with hundreds of OUs needs one round
+of parallel calls per level (Organizations allows at most five levels below
+the root) rather than one call after another. The fetched tree is memoized per
+organization for the rest of the run, so later checks can reuse it.
+
+Reported differences:
+
+- misplaced accounts: in a different OU than accounts-config.yaml says (error)
+- extra OUs and accounts: in the organization but not in the config (warning)
+- missing OUs and accounts: in the config but not yet in the organization
+  (info, LZA creates them on the next deployment)
+
+OUs with ``ignore: true`` (and everything below them) are left out of the
+comparison.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from botocore.exceptions import ClientError
+
+from preflight_checks.aws_checks import (
+    DEFAULT_MAX_WORKERS,
+    MAX_WORKERS_ENV_VAR,
+    ContextThreadPoolExecutor,
+    env_int,
+    get_aws_client,
+)
+from preflight_checks.lza_config import ROOT_OU, iter_accounts, load_configs
+from preflight_checks.profiling import span
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LiveAccount:
+    account_id: str
+    name: str
+    email: str
+    status: str
+    ou: str
+
+
+@dataclass
+class OrganizationTree:
+    """The live organization: OU paths ("SomeEnv/Production") and accounts by lower-cased email."""
+
+    organization_id: str
+    root_id: str
+    ous: Dict[str, str] = field(default_factory=dict)
+    accounts: Dict[str, LiveAccount] = field(default_factory=dict)
+
+
+# Trees fetched during this run, by organization ID
+_tree_cache: Dict[str, OrganizationTree] = {}
+_tree_cache_lock = threading.Lock()
+
+
+def _paginate(org_client, operation: str, key: str, **kwargs) -> List[dict]:
+    items: List[dict] = []
+    for page in org_client.get_paginator(operation).paginate(**kwargs):
+        items.extend(page.get(key, []))
+    return items
+
+
+def _expand(org_client, parent_id: str) -> Tuple[List[dict], List[dict]]:
+    """Returns the child OUs and accounts of one parent."""
+    with span("expand_ou", cat="organizations", parent=parent_id):
+        ous = _paginate(org_client, "list_organizational_units_for_parent", "OrganizationalUnits", ParentId=parent_id)
+        accounts = _paginate(org_client, "list_accounts_for_parent", "Accounts", ParentId=parent_id)
+    return ous, accounts
+
+
+def fetch_organization_tree(org_client, max_workers: Optional[int] = None, refresh: bool = False) -> OrganizationTree:
+    """
+    Fetches the live OU tree and account placement, memoized per organization.
+
+    Args:
+        org_client: Organizations boto3 client (management account credentials).
+        max_workers: Parents expanded concurrently (default PREFLIGHT_MAX_WORKERS or 20).
+        refresh: Ignore a tree cached earlier in the run.
+    """
+    organization_id = org_client.describe_organization()["Organization"]["Id"]
+    with _tree_cache_lock:
+        if not refresh and organization_id in _tree_cache:
+            return _tree_cache[organization_id]
+
+    root_id = org_client.list_roots()["Roots"][0]["Id"]
+    tree = OrganizationTree(organization_id, root_id)
+    max_workers = max_workers or env_int(MAX_WORKERS_ENV_VAR, DEFAULT_MAX_WORKERS)
+
+    # (parent ID, parent path); the root's path is "Root" and its children are top level OUs
+    level: List[Tuple[str, str]] = [(root_id, ROOT_OU)]
+    with ContextThreadPoolExecutor(max_workers=max_workers) as executor:
+        while level:
+            expanded = executor.map(lambda parent: _expand(org_client, parent[0]), level)
+            next_level: List[Tuple[str, str]] = []
+            for (parent_id, parent_path), (ous, accounts) in zip(level, expanded):
+                for ou in ous:
+                    path = ou["Name"] if parent_path == ROOT_OU else f"{parent_path}/{ou['Name']}"
+                    tree.ous[path] = ou["Id"]
+                    next_level.append((ou["Id"], path))
+                for account in accounts:
+                    email = account.get("Email", "").lower()
+                    tree.accounts[email] = LiveAccount(
+                        account["Id"], account.get("Name", ""), email, account.get("Status", ""), parent_path
+                    )
+            level = next_level
+
+    with _tree_cache_lock:
+        _tree_cache[organization_id] = tree
+    return tree
+
+
+def _is_ignored(path: str, ignored: Set[str]) -> bool:
+    return any(path == ou or path.startswith(f"{ou}/") for ou in ignored)
+
+
+def diff_organization(
+    organization_config: dict, accounts_config: dict, tree: OrganizationTree
+) -> Dict[str, List[str]]:
+    """
+    Compares the configuration with the live tree.
+
+    Returns:
+        Messages keyed by "misplaced", "extra" and "missing".
+    """
+    declared = {ou["name"] for ou in organization_config.get("organizationalUnits") or [] if ou.get("name")}
+    ignored = {ou["name"] for ou in organization_config.get("organizationalUnits") or [] if ou.get("ignore")}
+    declared -= ignored
+
+    differences: Dict[str, List[str]] = {"misplaced": [], "extra": [], "missing": []}
+    for path in sorted(declared - set(tree.ous)):
+        differences["missing"].append(f"OU '{path}' does not exist yet")
+    for path in sorted(set(tree.ous) - declared):
+        if not _is_ignored(path, ignored):
+            differences["extra"].append(f"OU '{path}' is not in organization-config.yaml")
+
+    configured_emails = set()
+    for account in iter_accounts(accounts_config):
+        email = (account.get("email") or "").lower()
+        configured_emails.add(email)
+        expected_ou = account.get("organizationalUnit") or ROOT_OU
+        live = tree.accounts.get(email)
+        if live is None:
+            differences["missing"].append(f"account '{account.get('name')}' ({email}) does not exist yet")
+        elif live.ou != expected_ou and not _is_ignored(live.ou, ignored):
+            differences["misplaced"].append(
+                f"account '{account.get('name')}' ({live.account_id}) is in OU '{live.ou}', "
+                f"accounts-config.yaml expects '{expected_ou}'"
+            )
+
+    for email, live in sorted(tree.accounts.items()):
+        if email not in configured_emails and not _is_ignored(live.ou, ignored):
+            differences["extra"].append(
+                f"account '{live.name}' ({live.account_id}, {email}) in OU '{live.ou}' is not in accounts-config.yaml"
+            )
+    return differences
+
+
+def check_organization_structure(config_dir: str, max_workers: Optional[int] = None) -> bool:
+    """
+    Checks that the live organization matches organization-config.yaml and
+    accounts-config.yaml.
+
+    Args:
+        config_dir: Directory containing the LZA configuration files.
+        max_workers: Parents expanded concurrently.
+
+    Returns:
+        True if no account is misplaced, False otherwise. Extra and missing
+        OUs and accounts are only reported.
+    """
+    configs = load_configs(
+        Path(config_dir), ["organization-config.yaml", "accounts-config.yaml", "global-config.yaml"]
+    )
+    home_region = (configs["global-config.yaml"] or {}).get("homeRegion")
+    logger.info("Comparing the live organization with organization-config.yaml and accounts-config.yaml...")
+
+    start = time.monotonic()
+    try:
+        tree = fetch_organization_tree(get_aws_client("organizations", region_name=home_region), max_workers)
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ["AccessDeniedException", "AWSOrganizationsNotInUseException"]:
+            logger.warning(f"Could not read the organization structure. Skipping check. Error: {e}")
+            return True
+        logger.exception(f"Error reading the organization structure: {e}")
+        return False
+    logger.info(
+        f"Found {len(tree.ous)} OU(s) and {len(tree.accounts)} account(s) "
+        f"in {time.monotonic() - start:.1f}s."
+    )
+
+    differences = diff_organization(
+        configs["organization-config.yaml"] or {}, configs["accounts-config.yaml"] or {}, tree
+    )
+    for message in differences["missing"]:
+        logger.info(f"Organization: {message} (LZA will create it)")
+    for message in differences["extra"]:
+        logger.warning(f"Organization: {message}")
+    for message in differences["misplaced"]:
+        logger.error(f"Organization: {message}")
+
+    if differences["misplaced"]:
+        logger.error(f"{len(differences['misplaced'])} account(s) are not in their configured OU.")
+        return False
+    logger.info("Organization structure matches the configuration.")
+    return True
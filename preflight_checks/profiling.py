@@ -0,0 +1,234 @@
+# preflight_checks/profiling.py
+"""
+Opt-in profiling for the preflight checks and the validation scripts.
+
+Profiling is enabled by setting ``LZA_PROFILE=1`` or by passing ``--profile``
+on the command line. When enabled, each run writes two files to
+``LZA_PROFILE_DIR`` (default ``profiles/``):
+
+* ``<name>-<timestamp>.prof``: a cProfile dump of the main thread
+  (inspect with ``python -m pstats`` or snakeviz).
+* ``<name>-<timestamp>.trace.json``: a Chrome trace-event file with one span
+  per check, AWS API call, file parse/render/validate step and worker task
+  (open in chrome://tracing or https://ui.perfetto.dev). Spans carry the
+  thread they ran on, so overlapping worker-pool activity is visible.
+
+When profiling is disabled, ``span`` and ``instrument_client`` are no-ops.
+"""
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+PROFILE_ENV_VAR = "LZA_PROFILE"
+PROFILE_DIR_ENV_VAR = "LZA_PROFILE_DIR"
+DEFAULT_PROFILE_DIR = "profiles"
+PROFILE_FLAG = "--profile"
+
+# Key used to carry the API call start time between botocore events
+_CONTEXT_START_KEY = "lza_trace_start"
+
+
+class TraceRecorder:
+    """Collects Chrome trace events ("X" complete events) from any thread."""
+
+    def __init__(self) -> None:
+        self._events: List[Dict[str, Any]] = []
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+
+    def now(self) -> float:
+        """Returns the current time in the recorder's clock (seconds)."""
+        return time.perf_counter()
+
+    def add_span(
+        self, name: str, cat: str, start: float, end: float, args: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Records a completed span measured with ``now()``."""
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": round((start - self._origin) * 1_000_000, 3),
+            "dur": round((end - start) * 1_000_000, 3),
+            "pid": self._pid,
+            "tid": thread.ident,
+        }
+        if args:
+            event["args"] = {key: _json_safe(value) for key, value in args.items()}
+        with self._lock:
+            self._events.append(event)
+            self._threads.setdefault(thread.ident, thread.name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the trace in Chrome trace-event JSON object format."""
+        with self._lock:
+            metadata = [
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": self._pid,
+                    "tid": tid,
+                    "args": {"name": thread_name},
+                }
+                for tid, thread_name in self._threads.items()
+            ]
+            events = sorted(self._events, key=lambda event: event["ts"])
+        return {"traceEvents": metadata + events, "displayTimeUnit": "ms"}
+
+    def write(self, path: str) -> None:
+        """Writes the trace to ``path``."""
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file)
+
+
+_active_recorder: Optional[TraceRecorder] = None
+
+
+def _json_safe(value: Any) -> Any:
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def profiling_requested(argv: Optional[List[str]] = None) -> bool:
+    """
+    Returns True if profiling was requested via the environment or command line.
+
+    Args:
+        argv: Command line arguments to inspect. Defaults to ``sys.argv[1:]``.
+    """
+    if os.getenv(PROFILE_ENV_VAR, "").lower() in ("1", "true", "yes", "on"):
+        return True
+    if argv is None:
+        argv = sys.argv[1:]
+    return PROFILE_FLAG in argv
+
+
+def is_active() -> bool:
+    """Returns True while a profiling session is recording."""
+    return _active_recorder is not None
+
+
+@contextmanager
+def span(name: str, cat: str = "function", **args: Any) -> Iterator[None]:
+    """Records the enclosed block as a trace span when profiling is active."""
+    recorder = _active_recorder
+    if recorder is None:
+        yield
+        return
+    start = recorder.now()
+    try:
+        yield
+    finally:
+        recorder.add_span(name, cat, start, recorder.now(), args)
+
+
+def instrument_client(client: Any) -> Any:
+    """
+    Registers botocore event handlers that record one span per AWS API call.
+
+    Returns the client unchanged so it can wrap client construction inline.
+    """
+    if _active_recorder is None:
+        return client
+
+    region_name = client.meta.region_name
+
+    def _before_call(model=None, context=None, **kwargs):
+        recorder = _active_recorder
+        if recorder is not None and context is not None:
+            context[_CONTEXT_START_KEY] = recorder.now()
+
+    def _finish(span_name: str, context, args: Dict[str, Any]) -> None:
+        recorder = _active_recorder
+        if recorder is None or not context or _CONTEXT_START_KEY not in context:
+            return
+        start = context.pop(_CONTEXT_START_KEY)
+        args["region"] = region_name
+        recorder.add_span(span_name, "aws_api", start, recorder.now(), args)
+
+    def _after_call(http_response=None, parsed=None, model=None, context=None, **kwargs):
+        args: Dict[str, Any] = {}
+        if http_response is not None:
+            args["status"] = http_response.status_code
+        if parsed and "Error" in parsed:
+            args["error"] = parsed["Error"].get("Code")
+        _finish(f"{model.service_model.service_name}.{model.name}", context, args)
+
+    def _after_call_error(exception=None, context=None, event_name="", **kwargs):
+        # after-call-error does not carry the operation model, so recover it
+        # from the event name ("after-call-error.<service>.<operation>").
+        _, _, span_name = event_name.partition(".")
+        _finish(span_name or "aws_api_error", context, {"error": type(exception).__name__})
+
+    client.meta.events.register("before-call", _before_call)
+    client.meta.events.register("after-call", _after_call)
+    client.meta.events.register("after-call-error", _after_call_error)
+    return client
+
+
+@contextmanager
+def profile_session(
+    name: str, enabled: Optional[bool] = None, output_dir: Optional[str] = None
+) -> Iterator[Optional[TraceRecorder]]:
+    """
+    Profiles the enclosed block and writes the cProfile and trace files on exit.
+
+    Files are written even if the block raises (including ``SystemExit``).
+
+    Args:
+        name: Base name for the output files and the top-level span.
+        enabled: Force profiling on or off. Defaults to ``profiling_requested()``.
+        output_dir: Output directory. Defaults to ``LZA_PROFILE_DIR`` or ``profiles``.
+    """
+    global _active_recorder
+    if enabled is None:
+        enabled = profiling_requested()
+    if not enabled or _active_recorder is not None:
+        # Nested sessions record into the outer session
+        yield _active_recorder
+        return
+
+    import cProfile
+
+    recorder = TraceRecorder()
+    profiler = cProfile.Profile()
+    _active_recorder = recorder
+    profiler.enable()
+    try:
+        with span(name, cat="session"):
+            yield recorder
+    finally:
+        profiler.disable()
+        _active_recorder = None
+        output_dir = output_dir or os.getenv(PROFILE_DIR_ENV_VAR, DEFAULT_PROFILE_DIR)
+        os.makedirs(output_dir, exist_ok=True)
+        base_path = os.path.join(output_dir, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}")
+        profiler.dump_stats(f"{base_path}.prof")
+        recorder.write(f"{base_path}.trace.json")
+        print(
+            f"Profile written to {base_path}.prof and {base_path}.trace.json",
+            file=sys.stderr,
+        )
+
+
+def profiled(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator that runs an entry point inside ``profile_session(name)``."""
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with profile_session(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
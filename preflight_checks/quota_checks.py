@@ -0,0 +1,341 @@
+# preflight_checks/quota_checks.py
+"""
+Service-quota headroom for the resources network-config.yaml will create.
+
+The rendered network-config.yaml is projected onto per-account, per-region
+resource counts (VPCs, subnets, route table routes, NAT and internet gateways,
+interface endpoints, transit gateways, their attachments and the routes of
+their route tables, Network Firewall firewalls). Each count is compared with
+the account's applied quota from Service Quotas. For VPCs, NAT gateways,
+internet gateways, transit gateways and transit gateway attachments, resources
+that already exist but are not in the config (matched by Name tag) are added,
+since they use the same quota. Existing attachments are only counted if their
+resource is in the transit gateway's own account, so unmanaged attachments
+from other accounts are not included. Routes are counted from the config only:
+propagated routes and routes added outside LZA are not included.
+
+Quota values are fetched with one paginated ListServiceQuotas call per
+service, account and region (falling back to the AWS default values), and
+cached for the run. Accounts and regions are checked concurrently on a bounded
+thread pool.
+"""
+import concurrent.futures
+import logging
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from preflight_checks.aws_checks import (
+    DEFAULT_MAX_WORKERS,
+    MAX_WORKERS_ENV_VAR,
+    ContextThreadPoolExecutor,
+    env_int,
+    get_aws_client,
+)
+from preflight_checks.lza_config import iter_accounts, load_configs, vpc_instances
+
+logger = logging.getLogger(__name__)
+
+# Warn when a projected count reaches this share of the quota
+WARNING_RATIO = 0.8
+
+
+@dataclass(frozen=True)
+class QuotaSpec:
+    """A Service Quotas quota, looked up by code and then by name."""
+
+    service_code: str
+    quota_code: str
+    quota_name: str
+
+
+QUOTAS = {
+    "vpcs": QuotaSpec("vpc", "L-F678F1CE", "VPCs per Region"),
+    "subnets": QuotaSpec("vpc", "L-407747CB", "Subnets per VPC"),
+    "routes": QuotaSpec("vpc", "L-93826ACB", "Routes per route table"),
+    "nat_gateways": QuotaSpec("vpc", "L-FE5A380F", "NAT gateways per Availability Zone"),
+    "internet_gateways": QuotaSpec("vpc", "L-A4707A72", "Internet gateways per Region"),
+    "interface_endpoints": QuotaSpec("vpc", "L-29B6F2EB", "Interface VPC endpoints per VPC"),
+    "transit_gateways": QuotaSpec("ec2", "L-A2478D36", "Transit gateways per account"),
+    "transit_gateway_attachments": QuotaSpec("ec2", "L-E0233F82", "Attachments per transit gateway"),
+    "transit_gateway_routes": QuotaSpec("ec2", "", "Routes per transit gateway route table"),
+    "firewalls": QuotaSpec("network-firewall", "", "Firewalls per account"),
+}
+
+# (account name, region) -> Counter of (quota key, scope) where scope names the
+# VPC, AZ, route table or transit gateway the quota applies to ("" for
+# per-region quotas)
+Projection = Dict[Tuple[str, str], Counter]
+
+
+def project_network_usage(network_config: Dict[str, Any], accounts_config: Dict[str, Any]) -> Projection:
+    """Counts the quota-relevant resources network-config.yaml creates per account and region."""
+    projection: Projection = defaultdict(Counter)
+    vpc_locations: Dict[str, Tuple[str, str]] = {}
+    tgw_regions = {
+        (tgw.get("name"), tgw.get("account")): tgw.get("region")
+        for tgw in network_config.get("transitGateways") or []
+    }
+
+    for tgw in network_config.get("transitGateways") or []:
+        counts = projection[(tgw.get("account"), tgw.get("region"))]
+        counts["transit_gateways", ""] += 1
+        for route_table in tgw.get("routeTables") or []:
+            routes = route_table.get("routes") or []
+            if routes:
+                counts["transit_gateway_routes", f"{tgw.get('name')}/{route_table.get('name')}"] += len(routes)
+
+    for account, region, vpc in vpc_instances(network_config, accounts_config):
+        counts = projection[(account, region)]
+        name = vpc.get("name")
+        vpc_locations.setdefault(name, (account, region))
+        counts["vpcs", ""] += 1
+        if vpc.get("internetGateway"):
+            counts["internet_gateways", ""] += 1
+        subnets = vpc.get("subnets") or []
+        counts["subnets", name] += len(subnets)
+        subnet_azs = {subnet.get("name"): str(subnet.get("availabilityZone", "")) for subnet in subnets}
+        for nat in vpc.get("natGateways") or []:
+            counts["nat_gateways", f"{region}{subnet_azs.get(nat.get('subnet'), '')}"] += 1
+        for route_table in vpc.get("routeTables") or []:
+            counts["routes", f"{name}/{route_table.get('name')}"] += len(route_table.get("routes") or [])
+        endpoints = (vpc.get("interfaceEndpoints") or {}).get("endpoints") or []
+        if endpoints:
+            counts["interface_endpoints", name] += len(endpoints)
+        for attachment in vpc.get("transitGatewayAttachments") or []:
+            tgw = attachment.get("transitGateway") or {}
+            tgw_key = (tgw.get("name"), tgw.get("account"))
+            tgw_region = tgw_regions.get(tgw_key, region)
+            projection[(tgw.get("account"), tgw_region)]["transit_gateway_attachments", tgw.get("name")] += 1
+
+    firewalls = ((network_config.get("centralNetworkServices") or {}).get("networkFirewall") or {}).get("firewalls") or []
+    for firewall in firewalls:
+        location = vpc_locations.get(firewall.get("vpc"))
+        if location:
+            projection[location]["firewalls", ""] += 1
+    return dict(projection)
+
+
+class ServiceQuotaCache:
+    """Applied (or default) quota values per (account, region, service), fetched once."""
+
+    def __init__(self) -> None:
+        self._values: Dict[Tuple[str, str, str], Dict[str, float]] = {}
+        self._locks: Dict[Tuple[str, str, str], threading.Lock] = defaultdict(threading.Lock)
+        self._locks_lock = threading.Lock()
+
+    def _fetch(self, client, service_code: str) -> Dict[str, float]:
+        values: Dict[str, float] = {}
+        # Defaults first, so applied values override them
+        for operation in ("list_aws_default_service_quotas", "list_service_quotas"):
+            try:
+                for page in client.get_paginator(operation).paginate(ServiceCode=service_code):
+                    for quota in page.get("Quotas", []):
+                        values[quota["QuotaCode"]] = quota["Value"]
+                        values[quota["QuotaName"].lower()] = quota["Value"]
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "NoSuchResourceException":
+                    raise
+        return values
+
+    def get(self, client, account: str, region: str, spec: QuotaSpec) -> Optional[float]:
+        key = (account, region, spec.service_code)
+        with self._locks_lock:
+            lock = self._locks[key]
+        with lock:
+            if key not in self._values:
+                self._values[key] = self._fetch(client, spec.service_code)
+        values = self._values[key]
+        if spec.quota_code and spec.quota_code in values:
+            return values[spec.quota_code]
+        return values.get(spec.quota_name.lower())
+
+
+quota_cache = ServiceQuotaCache()
+
+
+def _names(resources: List[Dict[str, Any]]) -> List[str]:
+    return [
+        next((tag["Value"] for tag in resource.get("Tags", []) if tag.get("Key") == "Name"), "")
+        for resource in resources
+    ]
+
+
+def existing_unmanaged(ec2_client, counts: Counter, config_names: Dict[str, Set[str]], account_id: str) -> Counter:
+    """
+    Per-region resources that exist but are not in the config (matched by Name tag).
+
+    Transit gateway attachments are only counted if their VPC (or other
+    resource) is in account_id: LZA creates VPC attachments in the VPC's
+    account, and their tags are not visible from the transit gateway owner.
+    """
+    extra: Counter = Counter()
+    vpcs = ec2_client.describe_vpcs().get("Vpcs", []) if counts.get(("vpcs", "")) else []
+    config_vpc_ids = set()
+    for vpc, name in zip(vpcs, _names(vpcs)):
+        if name in config_names["vpcs"]:
+            config_vpc_ids.add(vpc["VpcId"])
+        elif not vpc.get("IsDefault"):
+            # LZA deletes default VPCs (defaultVpc.delete), so they are not counted
+            extra["vpcs", ""] += 1
+    if counts.get(("internet_gateways", "")):
+        for igw in ec2_client.describe_internet_gateways().get("InternetGateways", []):
+            attached = {attachment.get("VpcId") for attachment in igw.get("Attachments", [])}
+            if not attached & config_vpc_ids:
+                extra["internet_gateways", ""] += 1
+    count_attachments = any(key == "transit_gateway_attachments" for key, _ in counts)
+    if counts.get(("transit_gateways", "")) or count_attachments:
+        tgws = [
+            tgw for tgw in ec2_client.describe_transit_gateways().get("TransitGateways", [])
+            if tgw.get("State") not in ("deleted", "deleting")
+        ]
+        tgw_names = dict(zip((tgw["TransitGatewayId"] for tgw in tgws), _names(tgws)))
+        if counts.get(("transit_gateways", "")):
+            extra["transit_gateways", ""] = sum(
+                1 for name in tgw_names.values() if name not in config_names["transit_gateways"]
+            )
+        if count_attachments and tgw_names:
+            paginator = ec2_client.get_paginator("describe_transit_gateway_attachments")
+            attachments = [
+                attachment
+                for page in paginator.paginate(Filters=[
+                    {"Name": "transit-gateway-id", "Values": list(tgw_names)},
+                    {"Name": "state", "Values": ["initiating", "pendingAcceptance", "pending", "available", "modifying"]},
+                ])
+                for attachment in page.get("TransitGatewayAttachments", [])
+            ]
+            for attachment, name in zip(attachments, _names(attachments)):
+                if attachment.get("ResourceOwnerId", account_id) != account_id:
+                    continue
+                if name not in config_names["transit_gateway_attachments"]:
+                    extra["transit_gateway_attachments", tgw_names.get(attachment["TransitGatewayId"], "")] += 1
+    if any(key == "nat_gateways" for key, _ in counts):
+        nats = ec2_client.describe_nat_gateways(
+            Filters=[{"Name": "state", "Values": ["pending", "available"]}]
+        ).get("NatGateways", [])
+        subnet_azs = {}
+        if nats:
+            subnets = ec2_client.describe_subnets(SubnetIds=[nat["SubnetId"] for nat in nats]).get("Subnets", [])
+            subnet_azs = {subnet["SubnetId"]: subnet["AvailabilityZone"] for subnet in subnets}
+        for nat, name in zip(nats, _names(nats)):
+            if name not in config_names["nat_gateways"]:
+                extra["nat_gateways", subnet_azs.get(nat["SubnetId"], "")] += 1
+    return extra
+
+
+def check_location(
+    account: str,
+    account_id: str,
+    region: str,
+    counts: Counter,
+    config_names: Dict[str, Set[str]],
+    session,
+) -> List[Tuple[str, str]]:
+    """Returns (severity, message) for every quota at or near its limit in one account and region."""
+    quotas_client = get_aws_client("service-quotas", region_name=region, session=session)
+    ec2_client = get_aws_client("ec2", region_name=region, session=session)
+    projected = counts + existing_unmanaged(ec2_client, counts, config_names, account_id)
+
+    messages: List[Tuple[str, str]] = []
+    for (key, scope), count in sorted(projected.items()):
+        spec = QUOTAS[key]
+        quota = quota_cache.get(quotas_client, account_id, region, spec)
+        if quota is None:
+            logger.debug(f"Quota '{spec.quota_name}' not found for {account} in {region}")
+            continue
+        where = f"{account} {region}" + (f" {scope}" if scope else "")
+        if count > quota:
+            messages.append(("error", f"{where}: {spec.quota_name} would be {count}, quota is {quota:g}"))
+        elif count >= quota * WARNING_RATIO:
+            messages.append(("warning", f"{where}: {spec.quota_name} would be {count} of {quota:g}"))
+    return messages
+
+
+def _config_names(network_config: Dict[str, Any]) -> Dict[str, Set[str]]:
+    vpcs = (network_config.get("vpcs") or []) + (network_config.get("vpcTemplates") or [])
+    return {
+        "vpcs": {vpc.get("name") for vpc in vpcs},
+        "nat_gateways": {nat.get("name") for vpc in vpcs for nat in vpc.get("natGateways") or []},
+        "transit_gateways": {tgw.get("name") for tgw in network_config.get("transitGateways") or []},
+        "transit_gateway_attachments": {
+            attachment.get("name") for vpc in vpcs for attachment in vpc.get("transitGatewayAttachments") or []
+        },
+    }
+
+
+def check_service_quotas(config_dir: str, max_workers: Optional[int] = None) -> bool:
+    """
+    Checks that the resources network-config.yaml will create fit within the
+    service quotas of each account and region.
+
+    Args:
+        config_dir: Directory containing the LZA configuration files.
+        max_workers: Account/region pairs checked concurrently.
+
+    Returns:
+        True if no quota would be exceeded, False otherwise.
+    """
+    from preflight_checks.bootstrap_checks import DEFAULT_ACCESS_ROLE, resolve_account_ids
+    from preflight_checks.credentials import assume_role_session, role_arn
+
+    max_workers = max_workers or env_int(MAX_WORKERS_ENV_VAR, DEFAULT_MAX_WORKERS)
+    configs = load_configs(
+        Path(config_dir), ["network-config.yaml", "accounts-config.yaml", "global-config.yaml"]
+    )
+    network_config = configs["network-config.yaml"] or {}
+    accounts_config = configs["accounts-config.yaml"] or {}
+    global_config = configs["global-config.yaml"] or {}
+    home_region = global_config.get("homeRegion")
+    access_role = global_config.get("managementAccountAccessRole", DEFAULT_ACCESS_ROLE)
+
+    projection = project_network_usage(network_config, accounts_config)
+    config_names = _config_names(network_config)
+    logger.info(f"Checking service quota headroom for {len(projection)} account/region pair(s)...")
+
+    try:
+        identity = get_aws_client("sts", region_name=home_region).get_caller_identity()
+        partition = identity["Arn"].split(":")[1]
+        resolved = resolve_account_ids(accounts_config, get_aws_client("organizations", region_name=home_region))
+    except ClientError as e:
+        logger.warning(f"Could not resolve account IDs. Skipping service quota check. Error: {e}")
+        return True
+    emails = {account["name"]: account.get("email", "").lower() for account in iter_accounts(accounts_config)}
+
+    def _check(location: Tuple[str, str]) -> List[Tuple[str, str]]:
+        account, region = location
+        account_id = resolved.get(emails.get(account, ""), (None,))[0]
+        if account_id is None:
+            return [("info", f"{account} {region}: account does not exist yet, skipping")]
+        session = None
+        if account_id != identity["Account"]:
+            session = assume_role_session(role_arn(account_id, access_role, partition), home_region)
+        return check_location(account, account_id, region, projection[location], config_names, session)
+
+    passed = True
+    with ContextThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_check, location): location for location in sorted(projection)}
+        for future in concurrent.futures.as_completed(futures):
+            account, region = futures[future]
+            try:
+                messages = future.result()
+            except (ClientError, BotoCoreError) as e:
+                logger.warning(f"Could not check service quotas for {account} in {region}: {e}")
+                continue
+            for severity, message in messages:
+                if severity == "error":
+                    passed = False
+                    logger.error(f"Service quota exceeded: {message}")
+                elif severity == "warning":
+                    logger.warning(f"Service quota nearly reached: {message}")
+                else:
+                    logger.info(message)
+
+    if passed:
+        logger.info("Projected network resources fit within service quotas.")
+    else:
+        logger.error("Projected network resources exceed one or more service quotas.")
+    return passed
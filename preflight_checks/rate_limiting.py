@@ -0,0 +1,237 @@
+# preflight_checks/rate_limiting.py
+"""
+Process-wide client-side rate limiting of AWS API calls.
+
+Checks run concurrently across accounts and regions, and botocore's retries
+only react once a call has been throttled, with every client backing off on
+its own. Instead, every client from get_aws_client waits for a token from a
+shared token bucket before each request attempt. There is one bucket per
+(service, operation, region, account):
+
+- the account is the one a client's credentials belong to (see
+  preflight_checks.credentials), so member accounts do not share limits;
+  organization-level services (ORGANIZATION_SERVICES) have one bucket per
+  organization, since their limits apply to the organization (one for the
+  whole run, unless a fleet run labels each landing zone's session)
+- global services (GLOBAL_SERVICES) have one bucket for every region
+
+Rates are requests per second. Defaults come from DEFAULT_RATES and can be
+overridden with PREFLIGHT_API_RATES, a comma-separated list of
+``service[.Operation]=rate[/burst]`` entries, where ``*`` sets the default
+for every other API and a rate of 0 disables limiting:
+
+    PREFLIGHT_API_RATES="cloudformation.DescribeStackEvents=4,organizations=2/4,*=0"
+
+When a response is throttled, the bucket's rate is halved (down to
+MIN_RATE_RATIO of the configured rate) and its tokens are drained, so every
+waiting caller slows down together. Each successful response then restores
+RECOVERY_STEP of the configured rate.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from preflight_checks.profiling import span
+
+logger = logging.getLogger(__name__)
+
+RATES_ENV_VAR = "PREFLIGHT_API_RATES"
+DEFAULT_KEY = "*"
+# Requests per second; (service, None) applies to every operation of the service
+DEFAULT_RATES: Dict[Tuple[str, Optional[str]], float] = {
+    ("*", None): 20,
+    ("cloudformation", None): 10,
+    ("cloudformation", "DescribeStackEvents"): 5,
+    ("controltower", None): 2,
+    ("organizations", None): 5,
+    ("service-quotas", None): 5,
+}
+# Limits that apply to the organization rather than to the calling account
+ORGANIZATION_SERVICES = {"organizations", "controltower"}
+# Services with one endpoint for every region
+GLOBAL_SERVICES = {"organizations", "iam"}
+THROTTLING_ERROR_CODES = {
+    "Throttling", "ThrottlingException", "ThrottledException", "RequestThrottledException",
+    "TooManyRequestsException", "RequestLimitExceeded", "SlowDown", "RequestThrottled",
+    "PriorRequestNotComplete", "ProvisionedThroughputExceededException", "BandwidthLimitExceeded",
+}
+DECREASE_FACTOR = 0.5
+MIN_RATE_RATIO = 1 / 16
+RECOVERY_STEP = 0.05
+# Attributes of a boto3 Session holding the account its credentials belong
+# to, and the organization (landing zone) the account is in
+SESSION_ACCOUNT_ATTRIBUTE = "preflight_account_id"
+SESSION_ORGANIZATION_ATTRIBUTE = "preflight_organization"
+
+BucketKey = Tuple[str, str, str, str]  # (service, operation, region, account or organization)
+
+
+class TokenBucket:
+    """A token bucket whose rate backs off on throttling and recovers on success."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.configured_rate = rate
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Takes a token, sleeping until it is available. Returns the time waited."""
+        with self._lock:
+            self._refill(self._clock())
+            # Tokens may go negative: each waiting caller reserves its place in line
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def throttled(self) -> None:
+        """Halves the rate and drains the bucket."""
+        with self._lock:
+            self._refill(self._clock())
+            self.rate = max(self.configured_rate * MIN_RATE_RATIO, self.rate * DECREASE_FACTOR)
+            self._tokens = min(self._tokens, 0.0)
+
+    def succeeded(self) -> None:
+        """Moves the rate back towards the configured rate."""
+        if self.rate < self.configured_rate:
+            with self._lock:
+                self.rate = min(self.configured_rate, self.rate + self.configured_rate * RECOVERY_STEP)
+
+
+def parse_rates(value: Optional[str]) -> Dict[Tuple[str, Optional[str]], Tuple[float, Optional[float]]]:
+    """Parses PREFLIGHT_API_RATES into {(service, operation or None): (rate, burst or None)}."""
+    rates: Dict[Tuple[str, Optional[str]], Tuple[float, Optional[float]]] = {}
+    for entry in (value or "").split(","):
+        if not entry.strip():
+            continue
+        try:
+            name, _, limit = entry.partition("=")
+            service, _, operation = name.strip().partition(".")
+            rate, _, burst = limit.partition("/")
+            rates[(service, operation or None)] = (float(rate), float(burst) if burst else None)
+        except ValueError:
+            logger.warning(f"Ignoring invalid {RATES_ENV_VAR} entry {entry!r}; expected service[.Operation]=rate[/burst]")
+    return rates
+
+
+class RateLimiter:
+    """The token buckets of a run, created on first use of each key."""
+
+    def __init__(self, rates: Optional[Dict[Tuple[str, Optional[str]], Tuple[float, Optional[float]]]] = None) -> None:
+        self.rates = {key: (rate, None) for key, rate in DEFAULT_RATES.items()}
+        self.rates.update(parse_rates(os.getenv(RATES_ENV_VAR)) if rates is None else rates)
+        self._buckets: Dict[BucketKey, Optional[TokenBucket]] = {}
+        self._lock = threading.Lock()
+
+    def _limit(self, service: str, operation: str) -> Tuple[float, Optional[float]]:
+        for key in ((service, operation), (service, None), (DEFAULT_KEY, None)):
+            if key in self.rates:
+                return self.rates[key]
+        return (0.0, None)
+
+    def bucket(
+        self,
+        service: str,
+        operation: str,
+        region: Optional[str],
+        account: Optional[str],
+        organization: Optional[str] = None,
+    ) -> Optional[TokenBucket]:
+        """The bucket for an API call, or None if the API is not limited."""
+        key = (
+            service,
+            operation,
+            "global" if service in GLOBAL_SERVICES else region or "",
+            (organization or "") if service in ORGANIZATION_SERVICES else (account or ""),
+        )
+        bucket = self._buckets.get(key, False)
+        if bucket is not False:
+            return bucket
+        with self._lock:
+            if key not in self._buckets:
+                rate, burst = self._limit(service, operation)
+                self._buckets[key] = TokenBucket(rate, burst) if rate > 0 else None
+            return self._buckets[key]
+
+    def register(self, client: Any, account: Optional[str] = None, organization: Optional[str] = None) -> Any:
+        """Limits every request attempt of client. Returns the client unchanged."""
+        region = client.meta.region_name
+
+        def _bucket_for(event_name: str) -> Optional[TokenBucket]:
+            # "<event>.<service id>.<operation>"
+            _, service, operation = event_name.split(".", 2)
+            return self.bucket(service, operation, region, account, organization)
+
+        def _before_send(event_name: str = "", **kwargs) -> None:
+            bucket = _bucket_for(event_name)
+            if bucket is None:
+                return
+            with span("rate_limit", cat="aws_api", api=event_name.split(".", 1)[-1], region=region):
+                bucket.acquire()
+
+        def _needs_retry(event_name: str = "", response=None, **kwargs) -> None:
+            bucket = _bucket_for(event_name)
+            if bucket is None or response is None:
+                return
+            http_response, parsed = response
+            code = (parsed or {}).get("Error", {}).get("Code")
+            if code in THROTTLING_ERROR_CODES:
+                bucket.throttled()
+                logger.info(
+                    f"Throttled on {event_name.split('.', 1)[-1]} ({region or 'default region'}); "
+                    f"lowering the client-side rate to {bucket.rate:g}/s"
+                )
+            elif http_response is not None and http_response.status_code < 400:
+                bucket.succeeded()
+
+        client.meta.events.register("before-send", _before_send)
+        client.meta.events.register("needs-retry", _needs_retry)
+        return client
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """The process-wide rate limiter, configured from the environment on first use."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter()
+    return _rate_limiter
+
+
+def reset_rate_limiter() -> None:
+    """Drops the process-wide buckets, so the next client re-reads PREFLIGHT_API_RATES."""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        _rate_limiter = None
+
+
+def limit_client(client: Any, session=None) -> Any:
+    """Registers client with the process-wide rate limiter, for the account session's credentials belong to."""
+    return get_rate_limiter().register(
+        client,
+        getattr(session, SESSION_ACCOUNT_ATTRIBUTE, None),
+        getattr(session, SESSION_ORGANIZATION_ATTRIBUTE, None),
+    )
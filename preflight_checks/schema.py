@@ -0,0 +1,87 @@
+# preflight_checks/schema.py
+"""
+LZA JSON schemas: which schema validates which config file, and how to fetch
+and compile them.
+
+Shared by scripts/validate_landing_zone_schema.py, scripts/watch_config.py,
+scripts/validate_environments.py and scripts/diff_deployed_config.py, so that
+one script does not have to import another. requests and jsonschema are
+imported in the functions that use them.
+"""
+import contextlib
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from preflight_checks.profiling import span
+
+# Configuration mapping between YAML files and their schema URLs
+CONFIG_SCHEMAS = {
+    "accounts-config.yaml": "accounts-config.json",
+    "customizations-config.yaml": "customizations-config.json",
+    "global-config.yaml": "global-config.json",
+    "iam-config.yaml": "iam-config.json",
+    "network-config.yaml": "network-config.json",
+    "organization-config.yaml": "organization-config.json",
+    "replacements-config.yaml": "replacements-config.json",
+    "security-config.yaml": "security-config.json"
+}
+
+# GitHub schema URL
+GITHUB_BASE_URL = "https://raw.githubusercontent.com/awslabs/landing-zone-accelerator-on-aws/{}/source/packages/@aws-accelerator/config/lib/schemas/{}"
+
+# SchemaStore URL
+SCHEMASTORE_BASE_URL = "https://www.schemastore.org/api/json/schema/landing-zone-accelerator-on-aws/{}"
+
+
+def fetch_schema(schema_name, version, schema_source="github"):
+    """Fetch JSON schema from GitHub or SchemaStore."""
+    import requests
+
+    if schema_source.lower() == "schemastore":
+        url = SCHEMASTORE_BASE_URL.format(schema_name)
+    else:  # Default to GitHub
+        url = GITHUB_BASE_URL.format(version, schema_name)
+
+    try:
+        print(f"Fetching schema from {url}")
+        with span("fetch_schema", cat="network", schema=schema_name):
+            response = requests.get(url)
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching schema {url}: {str(e)}")
+        return None
+
+
+def load_validators(schema_names: Iterable[str], version: str, schema_source: str,
+                    schema_dir: Optional[Path]) -> Dict[str, Any]:
+    """
+    Load and compile the JSON schemas once, from schema_dir if given, else the network.
+
+    Schemas are fetched concurrently; a schema that cannot be loaded is skipped
+    (its file is still parsed and checked for replacement keys).
+    """
+    import jsonschema
+    from concurrent.futures import ThreadPoolExecutor
+
+    def _load(schema_name: str):
+        with span("load_schema", cat="worker", schema=schema_name):
+            if schema_dir is not None:
+                path = schema_dir / schema_name
+                if not path.exists():
+                    print(f"⚠️ schema {path} not found, skipping", file=sys.stderr)
+                    return schema_name, None
+                return schema_name, json.loads(path.read_text(encoding="utf-8"))
+            with contextlib.redirect_stdout(sys.stderr):
+                return schema_name, fetch_schema(schema_name, version, schema_source)
+
+    validators: Dict[str, Any] = {}
+    names = sorted(set(schema_names))
+    with ThreadPoolExecutor(max_workers=len(names) or 1) as pool:
+        for schema_name, schema in pool.map(_load, names):
+            if schema is not None:
+                validator_cls = jsonschema.validators.validator_for(schema)
+                validators[schema_name] = validator_cls(schema)
+    return validators
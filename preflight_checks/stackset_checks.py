@@ -0,0 +1,221 @@
+# preflight_checks/stackset_checks.py
+"""
+Health of the stack instances of the StackSets in customizations-config.yaml.
+
+LZA deploys each ``customizations.cloudFormationStackSets`` entry as a
+StackSet of the same name in the home region. A stack instance that failed,
+was cancelled or became inoperable in one member account blocks later
+customizations runs, and check_cloudformation_stacks never sees it because it
+only lists stacks in the local account.
+
+For each StackSet this check makes a handful of paginated calls, however many
+instances it has:
+
+- ``ListStackInstances`` once per unhealthy detailed status (UNHEALTHY_STATUSES),
+  filtered server side, so healthy instances are never listed
+- ``ListStackSetOperations``, first page only, for operations still running
+- ``ListStackSetOperationResults`` filtered to FAILED, once per distinct last
+  operation of the unhealthy instances, for the reason each one failed
+
+StackSets are checked concurrently on a bounded thread pool.
+"""
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from preflight_checks.aws_checks import (
+    DEFAULT_MAX_WORKERS,
+    MAX_WORKERS_ENV_VAR,
+    ContextThreadPoolExecutor,
+    env_int,
+    get_aws_client,
+)
+from preflight_checks.lza_config import load_configs
+from preflight_checks.profiling import span
+
+logger = logging.getLogger(__name__)
+
+# Stack instance detailed statuses that block the next customizations run.
+# SKIPPED_SUSPENDED_ACCOUNT is expected for suspended accounts and not listed.
+UNHEALTHY_STATUSES = ("FAILED", "INOPERABLE", "CANCELLED", "FAILED_IMPORT")
+ACTIVE_OPERATION_STATUSES = ("RUNNING", "QUEUED", "STOPPING")
+# Instances listed per StackSet in the log; the rest are only counted
+MAX_LISTED = 10
+
+
+@dataclass
+class StackSetHealth:
+    """Unhealthy instances and running operations of one StackSet."""
+
+    name: str
+    exists: bool = True
+    # detailed status -> instance summaries
+    unhealthy: Dict[str, List[Dict[str, Any]]] = field(default_factory=lambda: defaultdict(list))
+    active_operations: List[Dict[str, Any]] = field(default_factory=list)
+    # (account, region) -> reason from the instance's last operation
+    reasons: Dict[Tuple[str, str], str] = field(default_factory=dict)
+
+    @property
+    def unhealthy_count(self) -> int:
+        return sum(len(instances) for instances in self.unhealthy.values())
+
+
+def list_instances(cf_client, stackset_name: str, detailed_status: str) -> List[Dict[str, Any]]:
+    """Stack instances of stackset_name with the given detailed status."""
+    instances: List[Dict[str, Any]] = []
+    paginator = cf_client.get_paginator("list_stack_instances")
+    with span("list_stack_instances", cat="stackset", stackset=stackset_name, status=detailed_status):
+        for page in paginator.paginate(
+            StackSetName=stackset_name,
+            Filters=[{"Name": "DETAILED_STATUS", "Values": detailed_status}],
+            PaginationConfig={"PageSize": 100},
+        ):
+            instances.extend(page.get("Summaries", []))
+    return instances
+
+
+def list_active_operations(cf_client, stackset_name: str) -> List[Dict[str, Any]]:
+    """Operations on stackset_name that have not finished, from the most recent page of operations."""
+    with span("list_stack_set_operations", cat="stackset", stackset=stackset_name):
+        response = cf_client.list_stack_set_operations(StackSetName=stackset_name, MaxResults=20)
+    return [
+        operation for operation in response.get("Summaries", [])
+        if operation.get("Status") in ACTIVE_OPERATION_STATUSES
+    ]
+
+
+def failed_operation_results(cf_client, stackset_name: str, operation_id: str) -> Dict[Tuple[str, str], str]:
+    """(account, region) -> status reason for the FAILED results of one StackSet operation."""
+    reasons: Dict[Tuple[str, str], str] = {}
+    paginator = cf_client.get_paginator("list_stack_set_operation_results")
+    with span("list_stack_set_operation_results", cat="stackset", stackset=stackset_name, operation=operation_id):
+        for page in paginator.paginate(
+            StackSetName=stackset_name,
+            OperationId=operation_id,
+            Filters=[{"Name": "OPERATION_RESULT_STATUS", "Values": "FAILED"}],
+            PaginationConfig={"PageSize": 100},
+        ):
+            for result in page.get("Summaries", []):
+                reasons[(result.get("Account", ""), result.get("Region", ""))] = result.get("StatusReason", "")
+    return reasons
+
+
+def fetch_stackset_health(
+    cf_client, stackset_names: List[str], max_workers: int
+) -> Dict[str, StackSetHealth]:
+    """Lists the unhealthy instances of every StackSet concurrently, then the failures of their last operations."""
+    health = {name: StackSetHealth(name) for name in stackset_names}
+
+    def _list(name: str, status: Optional[str]) -> Tuple[str, Optional[str], List[Dict[str, Any]]]:
+        try:
+            if status is None:
+                return name, status, list_active_operations(cf_client, name)
+            return name, status, list_instances(cf_client, name, status)
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "StackSetNotFoundException":
+                health[name].exists = False
+                return name, status, []
+            raise
+
+    with ContextThreadPoolExecutor(max_workers=max_workers) as executor:
+        # None lists the running operations
+        tasks = [(name, status) for name in stackset_names for status in (None,) + UNHEALTHY_STATUSES]
+        for name, status, items in executor.map(lambda task: _list(*task), tasks):
+            if status is None:
+                health[name].active_operations = items
+            elif items:
+                health[name].unhealthy[status] = items
+
+        operations = sorted({
+            (name, instance["LastOperationId"])
+            for name, stackset in health.items()
+            for instances in stackset.unhealthy.values()
+            for instance in instances
+            if instance.get("LastOperationId")
+        })
+        results = executor.map(lambda operation: failed_operation_results(cf_client, *operation), operations)
+        for (name, _operation_id), reasons in zip(operations, results):
+            health[name].reasons.update(reasons)
+    return health
+
+
+def _instance_line(stackset: StackSetHealth, status: str, instance: Dict[str, Any]) -> str:
+    account, region = instance.get("Account", ""), instance.get("Region", "")
+    reason = stackset.reasons.get((account, region)) or instance.get("StatusReason") or "no reason given"
+    ou = f" ({instance['OrganizationalUnitId']})" if instance.get("OrganizationalUnitId") else ""
+    return f"  {status} {instance.get('Status', '')}: {account}{ou} {region}: {reason}"
+
+
+def check_stackset_instances(config_dir: str, region_name: str, max_workers: Optional[int] = None) -> bool:
+    """
+    Checks that no stack instance of the StackSets in customizations-config.yaml
+    is failed, cancelled or inoperable.
+
+    Args:
+        config_dir: Directory containing the LZA configuration files.
+        region_name: Region of the StackSets if global-config.yaml has no homeRegion.
+        max_workers: Concurrent listing calls.
+
+    Returns:
+        True if every instance is healthy (or the StackSets are not accessible),
+        False otherwise.
+    """
+    max_workers = max_workers or env_int(MAX_WORKERS_ENV_VAR, DEFAULT_MAX_WORKERS)
+    configs = load_configs(Path(config_dir), ["customizations-config.yaml", "global-config.yaml"])
+    customizations = (configs["customizations-config.yaml"] or {}).get("customizations") or {}
+    stackset_names = [stackset.get("name") for stackset in customizations.get("cloudFormationStackSets") or []]
+    home_region = (configs["global-config.yaml"] or {}).get("homeRegion") or region_name
+    if not stackset_names:
+        logger.info("No StackSets in customizations-config.yaml, skipping StackSet instance check.")
+        return True
+    logger.info(f"Checking stack instances of {len(stackset_names)} StackSet(s) in region '{home_region}'...")
+
+    try:
+        cf_client = get_aws_client("cloudformation", region_name=home_region)
+        health = fetch_stackset_health(cf_client, stackset_names, max_workers)
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ["AccessDenied", "AccessDeniedException"]:
+            logger.warning(f"Could not list StackSet instances. Skipping check. Error: {e}")
+            return True
+        logger.exception(f"Error listing StackSet instances: {e}")
+        return False
+    except BotoCoreError as e:
+        logger.exception(f"Error listing StackSet instances: {e}")
+        return False
+
+    passed = True
+    for name in stackset_names:
+        stackset = health[name]
+        if not stackset.exists:
+            logger.info(f"StackSet {name} does not exist yet; LZA creates it.")
+            continue
+        for operation in stackset.active_operations:
+            logger.warning(
+                f"StackSet {name}: operation {operation.get('OperationId')} ({operation.get('Action')}) "
+                f"is {operation.get('Status')}; the next customizations run waits for it or fails."
+            )
+        if not stackset.unhealthy_count:
+            logger.info(f"StackSet {name}: no failed, cancelled or inoperable stack instances.")
+            continue
+        passed = False
+        counts = ", ".join(f"{status}={len(stackset.unhealthy[status])}" for status in sorted(stackset.unhealthy))
+        logger.error(f"StackSet {name}: {stackset.unhealthy_count} unhealthy stack instance(s) ({counts})")
+        lines = [
+            _instance_line(stackset, status, instance)
+            for status in sorted(stackset.unhealthy)
+            for instance in stackset.unhealthy[status]
+        ]
+        for line in lines[:MAX_LISTED]:
+            logger.error(line)
+        if len(lines) > MAX_LISTED:
+            logger.error(f"  ... and {len(lines) - MAX_LISTED} more")
+
+    if passed:
+        logger.info("All StackSet stack instances are healthy.")
+    else:
+        logger.error("StackSet instance check failed.")
+    return passed
@@ -0,0 +1,636 @@
+#!/usr/bin/env python3
+"""
+Analyze the transit gateway routing in network-config.yaml: which VPCs can
+reach which, whether the traffic passes a Network Firewall, and where it is
+dropped.
+
+The rendered config is compiled into a routing graph:
+
+- every VPC route table (local routes for the VPC CIDRs plus its routes) and
+  every transit gateway route table (static routes first, then the CIDRs of
+  the attachments that propagate to it) becomes a longest-prefix-match table,
+  stored as one dict per prefix length, so a lookup is at most one masked dict
+  probe per distinct prefix length in the table;
+- VPC transit gateway attachments link the two: the attachment's associated
+  route table is used for traffic leaving the VPC, and the route table of the
+  attachment subnet in the packet's Availability Zone for traffic entering it;
+- Network Firewall routes continue in the route table of the firewall subnet
+  in the target Availability Zone.
+
+A packet is walked hop by hop from the source VPC's route tables. Every
+intermediate hop result is memoized by (hop, destination), which forms the
+reachability index: the walk from a transit gateway route table to a
+destination VPC is computed once and shared by every source VPC that reaches
+it, so all-pairs analysis of hundreds of VPCs takes milliseconds.
+
+Source route tables are the ones with a transitGateway or networkFirewall
+route, preferring subnets that are not also attachment subnets; firewall
+subnets never originate traffic.
+
+Without --query, every pair of transit gateway attached VPCs that does not
+host a Network Firewall (inspection and egress VPCs are transit hops, not
+endpoints) is checked:
+
+- dangling references (routes to transit gateways, attachments, route tables
+  or firewalls that do not exist) are errors
+- asymmetric paths (both directions delivered, but only one of them through
+  a firewall, or through different firewalls) are errors, because stateful
+  inspection drops the return traffic
+- blackholes (traffic sent to a transit gateway whose route table has no
+  route for it) and one-way reachability are warnings
+- hits on explicit blackhole routes are listed with --verbose
+
+Sources and destinations in queries are OU paths (every VPC in accounts in the
+OU or below), account names or VPC names.
+
+Usage:
+    python scripts/analyze_tgw_routing.py [--config-dir config]
+    python scripts/analyze_tgw_routing.py --query SomeEnv/Development SomeEnv/Production --expect inspected
+    python scripts/analyze_tgw_routing.py --queries-file reachability.txt --json
+"""
+
+import argparse
+import ipaddress
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+# Allow running as `python scripts/<name>.py` from the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from preflight_checks.lza_config import account_ous, load_configs, ou_ancestors, vpc_instances
+from preflight_checks.profiling import profiled, span
+
+DELIVERED = "DELIVERED"
+DROPPED = "DROPPED"
+EXITED = "EXITED"
+LOOP = "LOOP"
+
+# Query expectations
+INSPECTED = "inspected"
+REACHABLE = "reachable"
+UNREACHABLE = "unreachable"
+
+# Route kinds in the longest-prefix-match tables
+LOCAL = "local"
+TGW = "tgw"
+FIREWALL = "firewall"
+ATTACHMENT = "attachment"
+BLACKHOLE = "blackhole"
+EXIT = "exit"
+
+# VPC route types that leave the routing graph
+EXIT_ROUTE_TYPES = {
+    "internetGateway", "natGateway", "virtualPrivateGateway", "vpcPeering",
+    "localGateway", "gatewayLoadBalancerEndpoint",
+}
+
+VpcKey = Tuple[str, str]  # (account, VPC name)
+TgwKey = Tuple[str, str]  # (account, transit gateway name)
+
+
+class Route(NamedTuple):
+    cidr: str
+    kind: str
+    target: Any = None
+    az: Optional[str] = None
+
+
+class LpmTable:
+    """IPv4 longest-prefix-match table: {prefix length: {network: route}}."""
+
+    def __init__(self) -> None:
+        self._by_length: Dict[int, Dict[int, Route]] = {}
+        self._lengths: List[int] = []
+
+    def add(self, route: Route) -> bool:
+        """Adds route unless its prefix is already present (earlier routes win). False for non-IPv4 CIDRs."""
+        try:
+            network = ipaddress.IPv4Network(route.cidr, strict=False)
+        except ValueError:
+            return False
+        table = self._by_length.get(network.prefixlen)
+        if table is None:
+            table = self._by_length[network.prefixlen] = {}
+            self._lengths = sorted(self._by_length, reverse=True)
+        table.setdefault(int(network.network_address), route)
+        return True
+
+    def lookup(self, address: int) -> Optional[Route]:
+        for length in self._lengths:
+            mask = (0xFFFFFFFF << (32 - length)) & 0xFFFFFFFF
+            route = self._by_length[length].get(address & mask)
+            if route is not None:
+                return route
+        return None
+
+    def routes(self) -> Iterator[Route]:
+        for table in self._by_length.values():
+            yield from table.values()
+
+
+class Trace(NamedTuple):
+    """Result of walking a packet: outcome, hops taken and the firewalls it passed."""
+
+    outcome: str
+    hops: Tuple[str, ...]
+    firewalls: Tuple[str, ...] = ()
+    delivered_to: Optional[VpcKey] = None
+    # "route" for an explicit blackhole route, "implicit" for a transit gateway route table without a route
+    blackhole: Optional[str] = None
+
+    def after(self, hop: str, firewall: Optional[str] = None) -> "Trace":
+        firewalls = (firewall,) + self.firewalls if firewall else self.firewalls
+        return self._replace(hops=(hop,) + self.hops, firewalls=firewalls)
+
+
+@dataclass
+class Vpc:
+    key: VpcKey
+    region: str
+    ou: str
+    cidrs: List[str] = field(default_factory=list)
+    route_tables: Dict[str, LpmTable] = field(default_factory=dict)
+    # subnet -> (route table, AZ)
+    subnets: Dict[str, Tuple[str, str]] = field(default_factory=dict)
+    # transit gateway name -> attachment
+    attachments: Dict[str, "Attachment"] = field(default_factory=dict)
+    attachment_subnets: Set[str] = field(default_factory=set)
+    firewall_subnets: Set[str] = field(default_factory=set)
+    tgw_route_tables: Set[str] = field(default_factory=set)
+
+    @property
+    def label(self) -> str:
+        return f"{self.key[1]} ({self.key[0]})"
+
+    @cached_property
+    def probe_address(self) -> Optional[int]:
+        """An address inside the VPC's first IPv4 CIDR, used as the destination of queries."""
+        for cidr in self.cidrs:
+            try:
+                network = ipaddress.IPv4Network(cidr, strict=False)
+            except ValueError:
+                continue
+            return int(network.network_address) + (1 if network.num_addresses > 1 else 0)
+        return None
+
+
+@dataclass
+class Attachment:
+    name: str
+    vpc: VpcKey
+    tgw: TgwKey
+    association: Optional[str]
+    # AZ -> route table of the attachment subnet
+    subnet_route_tables: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class TransitGateway:
+    key: TgwKey
+    region: str
+    route_tables: Dict[str, LpmTable] = field(default_factory=dict)
+
+
+class RoutingGraph:
+    """The compiled routing graph and its memoized reachability index."""
+
+    def __init__(self) -> None:
+        self.vpcs: Dict[VpcKey, Vpc] = {}
+        self.tgws: Dict[TgwKey, TransitGateway] = {}
+        # firewall name -> {AZ: (VPC, route table of the firewall subnet)}
+        self.firewalls: Dict[str, Dict[str, Tuple[VpcKey, str]]] = {}
+        self.problems: List[str] = []
+        self._index: Dict[Tuple[Any, ...], Trace] = {}
+        self._in_progress: Set[Tuple[Any, ...]] = set()
+        self._sources: Dict[VpcKey, List[Tuple[str, str]]] = {}
+
+    # --- Walking ---
+
+    def _memoized(self, key: Tuple[Any, ...], walk) -> Trace:
+        path = self._index.get(key)
+        if path is not None:
+            return path
+        if key in self._in_progress:
+            return Trace(LOOP, ("routing loop",))
+        self._in_progress.add(key)
+        try:
+            path = walk()
+        finally:
+            self._in_progress.discard(key)
+        self._index[key] = path
+        return path
+
+    def walk_vpc(self, vpc_key: VpcKey, route_table: str, az: str, address: int) -> Trace:
+        """Walks a packet from a VPC route table."""
+        return self._memoized(("vpc", vpc_key, route_table, az, address),
+                              lambda: self._walk_vpc(vpc_key, route_table, az, address))
+
+    def _walk_vpc(self, vpc_key: VpcKey, route_table: str, az: str, address: int) -> Trace:
+        vpc = self.vpcs[vpc_key]
+        here = f"{vpc_key[1]}/{route_table}"
+        route = vpc.route_tables[route_table].lookup(address)
+        if route is None:
+            return Trace(DROPPED, (f"{here}: no route",))
+        if route.kind == LOCAL:
+            return Trace(DELIVERED, (f"{here}: local {route.cidr}",), delivered_to=vpc_key)
+        if route.kind == EXIT:
+            return Trace(EXITED, (f"{here}: {route.cidr} -> {route.target}",))
+        if route.kind == FIREWALL:
+            endpoints = self.firewalls.get(route.target) or {}
+            endpoint = endpoints.get(route.az or az) or next(iter(endpoints.values()), None)
+            if endpoint is None:
+                return Trace(DROPPED, (f"{here}: {route.cidr} -> unknown firewall {route.target}",))
+            firewall_vpc, firewall_route_table = endpoint
+            return self.walk_vpc(firewall_vpc, firewall_route_table, route.az or az, address).after(
+                f"{here}: {route.cidr} -> firewall {route.target}", route.target
+            )
+        attachment = vpc.attachments.get(route.target)
+        if attachment is None or attachment.association is None:
+            return Trace(DROPPED, (f"{here}: {route.cidr} -> {route.target}, but the VPC is not attached "
+                                  f"(or the attachment has no route table association)",))
+        return self.walk_tgw(attachment.tgw, attachment.association, az, address).after(
+            f"{here}: {route.cidr} -> {route.target}"
+        )
+
+    def walk_tgw(self, tgw_key: TgwKey, route_table: str, az: str, address: int) -> Trace:
+        """Walks a packet from a transit gateway route table."""
+        return self._memoized(("tgw", tgw_key, route_table, az, address),
+                              lambda: self._walk_tgw(tgw_key, route_table, az, address))
+
+    def _walk_tgw(self, tgw_key: TgwKey, route_table: str, az: str, address: int) -> Trace:
+        tgw = self.tgws[tgw_key]
+        here = f"{tgw_key[1]}/{route_table}"
+        table = tgw.route_tables.get(route_table)
+        route = table.lookup(address) if table is not None else None
+        if route is None:
+            return Trace(DROPPED, (f"{here}: no route (blackhole)",), blackhole="implicit")
+        if route.kind == BLACKHOLE:
+            return Trace(DROPPED, (f"{here}: {route.cidr} blackhole route",), blackhole="route")
+        if route.kind == EXIT:
+            return Trace(EXITED, (f"{here}: {route.cidr} -> {route.target}",))
+        attachment: Attachment = route.target
+        subnet_route_tables = attachment.subnet_route_tables
+        entry_route_table = subnet_route_tables.get(az) or next(iter(subnet_route_tables.values()), None)
+        hop = f"{here}: {route.cidr} -> attachment {attachment.name}"
+        if entry_route_table is None:
+            vpc = self.vpcs[attachment.vpc]
+            if any(_contains(cidr, address) for cidr in vpc.cidrs):
+                return Trace(DELIVERED, (hop,), delivered_to=attachment.vpc)
+            return Trace(DROPPED, (hop, f"{attachment.vpc[1]}: attachment has no subnets"))
+        return self.walk_vpc(attachment.vpc, entry_route_table, az, address).after(hop)
+
+    # --- Queries ---
+
+    def source_route_tables(self, vpc: Vpc) -> List[Tuple[str, str]]:
+        """
+        (route table, AZ) pairs that originate traffic in vpc: route tables with a transit gateway or firewall
+        route, preferring those of subnets that are not also attachment subnets. Firewall subnets never originate.
+        """
+        sources = self._sources.get(vpc.key)
+        if sources is not None:
+            return sources
+        workload, attached, others = [], [], []
+        seen = set()
+        for subnet, (route_table, az) in vpc.subnets.items():
+            if subnet in vpc.firewall_subnets or route_table in seen or route_table not in vpc.route_tables:
+                continue
+            seen.add(route_table)
+            if not any(route.kind in (TGW, FIREWALL) for route in vpc.route_tables[route_table].routes()):
+                others.append((route_table, az))
+            elif subnet in vpc.attachment_subnets:
+                attached.append((route_table, az))
+            else:
+                workload.append((route_table, az))
+        sources = self._sources[vpc.key] = workload or attached or others
+        return sources
+
+    def reach(self, source: VpcKey, destination: VpcKey) -> List[Tuple[str, Trace]]:
+        """Paths from each source route table of source to destination."""
+        address = self.vpcs[destination].probe_address
+        if address is None:
+            return []
+        results = []
+        for route_table, az in self.source_route_tables(self.vpcs[source]):
+            path = self.walk_vpc(source, route_table, az, address)
+            if path.outcome == DELIVERED and path.delivered_to != destination:
+                path = path._replace(outcome=DROPPED, hops=path.hops + (
+                    f"delivered to {path.delivered_to[1]} instead (overlapping CIDRs)",
+                ))
+            results.append((route_table, path))
+        return results
+
+    def resolve(self, selector: str) -> List[VpcKey]:
+        """VPCs selected by an OU path, account name or VPC name."""
+        return sorted(
+            key for key, vpc in self.vpcs.items()
+            if selector in (key[0], key[1]) or selector in ou_ancestors(vpc.ou)
+        )
+
+    def attached_vpcs(self) -> List[VpcKey]:
+        """Attached VPCs with a static IPv4 CIDR, except the ones hosting a firewall."""
+        return sorted(
+            key for key, vpc in self.vpcs.items()
+            if vpc.attachments and not vpc.firewall_subnets and vpc.probe_address is not None
+        )
+
+
+def _contains(cidr: str, address: int) -> bool:
+    try:
+        network = ipaddress.IPv4Network(cidr, strict=False)
+    except ValueError:
+        return False
+    return int(network.network_address) <= address <= int(network.broadcast_address)
+
+
+def build_graph(network_config: Dict[str, Any], accounts_config: Dict[str, Any]) -> RoutingGraph:
+    """Compiles the rendered network-config.yaml into a routing graph."""
+    graph = RoutingGraph()
+    ous = account_ous(accounts_config)
+    tgw_by_name: Dict[str, TgwKey] = {}
+    for tgw_config in network_config.get("transitGateways") or []:
+        key = (tgw_config.get("account"), tgw_config.get("name"))
+        tgw = graph.tgws[key] = TransitGateway(key, tgw_config.get("region"))
+        tgw_by_name.setdefault(key[1], key)
+        for route_table in tgw_config.get("routeTables") or []:
+            tgw.route_tables[route_table.get("name")] = LpmTable()
+
+    vpc_routes: List[Tuple[Vpc, str, Dict[str, Any]]] = []
+    for account, _, vpc_config in vpc_instances(network_config, accounts_config):
+        key = (account, vpc_config.get("name"))
+        vpc = graph.vpcs[key] = Vpc(key, vpc_config.get("region"), ous.get(account, ""))
+        vpc.cidrs = [str(cidr) for cidr in vpc_config.get("cidrs") or []]
+        for route_table in vpc_config.get("routeTables") or []:
+            table = vpc.route_tables[route_table.get("name")] = LpmTable()
+            for cidr in vpc.cidrs:
+                table.add(Route(cidr, LOCAL))
+            for route in route_table.get("routes") or []:
+                vpc_routes.append((vpc, route_table.get("name"), route))
+        for subnet in vpc_config.get("subnets") or []:
+            vpc.subnets[subnet.get("name")] = (subnet.get("routeTable"), str(subnet.get("availabilityZone", "")))
+        for attachment_config in vpc_config.get("transitGatewayAttachments") or []:
+            tgw_ref = attachment_config.get("transitGateway") or {}
+            tgw_key = (tgw_ref.get("account"), tgw_ref.get("name"))
+            if tgw_key not in graph.tgws:
+                graph.problems.append(f"{vpc.label}: attachment {attachment_config.get('name')} "
+                                      f"references unknown transit gateway {tgw_ref.get('name')}")
+                continue
+            associations = attachment_config.get("routeTableAssociations") or []
+            attachment = Attachment(attachment_config.get("name"), key, tgw_key, associations[0] if associations else None)
+            for subnet_name in attachment_config.get("subnets") or []:
+                route_table, az = vpc.subnets.get(subnet_name, (None, None))
+                if route_table is None:
+                    graph.problems.append(f"{vpc.label}: attachment {attachment.name} uses unknown subnet {subnet_name}")
+                    continue
+                attachment.subnet_route_tables.setdefault(az, route_table)
+                vpc.attachment_subnets.add(subnet_name)
+            vpc.attachments[tgw_key[1]] = attachment
+            tgw = graph.tgws[tgw_key]
+            for route_table in associations + (attachment_config.get("routeTablePropagations") or []):
+                if route_table not in tgw.route_tables:
+                    graph.problems.append(f"{vpc.label}: attachment {attachment.name} references unknown "
+                                          f"route table {route_table} of {tgw_key[1]}")
+            vpc.tgw_route_tables.update(attachment_config.get("routeTablePropagations") or [])
+
+    firewalls = ((network_config.get("centralNetworkServices") or {}).get("networkFirewall") or {}).get("firewalls") or []
+    for firewall in firewalls:
+        vpc = next((vpc for vpc in graph.vpcs.values() if vpc.key[1] == firewall.get("vpc")), None)
+        if vpc is None:
+            graph.problems.append(f"firewall {firewall.get('name')} is in unknown VPC {firewall.get('vpc')}")
+            continue
+        endpoints = graph.firewalls.setdefault(firewall.get("name"), {})
+        for subnet_name in firewall.get("subnets") or []:
+            route_table, az = vpc.subnets.get(subnet_name, (None, None))
+            if route_table is not None:
+                endpoints.setdefault(az, (vpc.key, route_table))
+                vpc.firewall_subnets.add(subnet_name)
+
+    for vpc, route_table, route in vpc_routes:
+        destination = route.get("destination")
+        route_type = route.get("type")
+        if route_type == "gatewayEndpoint" or not destination:
+            continue
+        where = f"{vpc.label} route table {route_table}"
+        if route_type == "transitGateway":
+            if route.get("target") not in tgw_by_name:
+                graph.problems.append(f"{where}: route to unknown transit gateway {route.get('target')}")
+            entry = Route(destination, TGW, route.get("target"))
+        elif route_type == "networkFirewall":
+            if route.get("target") not in graph.firewalls:
+                graph.problems.append(f"{where}: route to unknown firewall {route.get('target')}")
+            entry = Route(destination, FIREWALL, route.get("target"), route.get("targetAvailabilityZone"))
+        elif route_type in EXIT_ROUTE_TYPES:
+            entry = Route(destination, EXIT, f"{route_type} {route.get('target')}")
+        else:
+            continue
+        vpc.route_tables[route_table].add(entry)
+
+    # Transit gateway route tables: static routes take precedence over propagated ones
+    attachments = {
+        (attachment.tgw, vpc.key[0], vpc.key[1]): attachment
+        for vpc in graph.vpcs.values() for attachment in vpc.attachments.values()
+    }
+    for tgw_config in network_config.get("transitGateways") or []:
+        tgw = graph.tgws[(tgw_config.get("account"), tgw_config.get("name"))]
+        for route_table in tgw_config.get("routeTables") or []:
+            table = tgw.route_tables[route_table.get("name")]
+            for route in route_table.get("routes") or []:
+                destination = route.get("destinationCidrBlock")
+                if not destination:
+                    continue
+                target = route.get("attachment") or {}
+                if route.get("blackhole"):
+                    table.add(Route(destination, BLACKHOLE))
+                elif target.get("vpcName"):
+                    attachment = attachments.get((tgw.key, target.get("account"), target.get("vpcName")))
+                    if attachment is None:
+                        graph.problems.append(
+                            f"{tgw.key[1]}/{route_table.get('name')}: static route {destination} to "
+                            f"{target.get('vpcName')} ({target.get('account')}), which is not attached"
+                        )
+                        continue
+                    table.add(Route(destination, ATTACHMENT, attachment))
+                elif target:
+                    table.add(Route(destination, EXIT, " ".join(f"{k} {v}" for k, v in target.items())))
+    for vpc in graph.vpcs.values():
+        for attachment in vpc.attachments.values():
+            tgw = graph.tgws[attachment.tgw]
+            for route_table in vpc.tgw_route_tables:
+                if route_table in tgw.route_tables:
+                    for cidr in vpc.cidrs:
+                        tgw.route_tables[route_table].add(Route(cidr, ATTACHMENT, attachment))
+    return graph
+
+
+# --- Reports ---
+
+class PairResult(NamedTuple):
+    source: VpcKey
+    destination: VpcKey
+    paths: List[Tuple[str, Trace]]
+
+    @property
+    def delivered(self) -> bool:
+        return bool(self.paths) and all(path.outcome == DELIVERED for _route_table, path in self.paths)
+
+    @property
+    def inspected(self) -> bool:
+        return self.delivered and all(path.firewalls for _route_table, path in self.paths)
+
+    def firewalls(self) -> Set[str]:
+        return {firewall for _route_table, path in self.paths for firewall in path.firewalls}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "source": list(self.source),
+            "destination": list(self.destination),
+            "delivered": self.delivered,
+            "inspected": self.inspected,
+            "paths": [
+                {"routeTable": route_table, "outcome": path.outcome, "firewalls": list(path.firewalls), "hops": list(path.hops)}
+                for route_table, path in self.paths
+            ],
+        }
+
+
+def query(graph: RoutingGraph, sources: Iterable[VpcKey], destinations: Iterable[VpcKey]) -> List[PairResult]:
+    destinations = list(destinations)
+    return [
+        PairResult(source, destination, graph.reach(source, destination))
+        for source in sources for destination in destinations if source != destination
+    ]
+
+
+def check_graph(graph: RoutingGraph) -> Dict[str, List[str]]:
+    """All-pairs analysis of attached VPCs. Returns messages keyed by "errors", "warnings" and "info"."""
+    findings: Dict[str, List[str]] = {"errors": list(graph.problems), "warnings": [], "info": []}
+    attached = graph.attached_vpcs()
+    results = {(result.source, result.destination): result for result in query(graph, attached, attached)}
+    for (source, destination), result in sorted(results.items()):
+        source_label, destination_label = graph.vpcs[source].label, graph.vpcs[destination].label
+        for route_table, path in result.paths:
+            if path.outcome != DROPPED:
+                continue
+            message = f"{source_label} [{route_table}] -> {destination_label}: {path.hops[-1]}"
+            if path.blackhole == "route":
+                findings["info"].append(message)
+            elif path.blackhole == "implicit":
+                findings["warnings"].append(f"blackhole: {message}")
+        if source >= destination:
+            continue
+        reverse = results.get((destination, source))
+        if reverse is None:
+            continue
+        if result.delivered and reverse.delivered:
+            if result.firewalls() != reverse.firewalls():
+                forward_firewalls = ", ".join(sorted(result.firewalls())) or "no firewall"
+                reverse_firewalls = ", ".join(sorted(reverse.firewalls())) or "no firewall"
+                findings["errors"].append(
+                    f"asymmetric path: {source_label} -> {destination_label} passes {forward_firewalls}, "
+                    f"the return path passes {reverse_firewalls}"
+                )
+        elif result.delivered != reverse.delivered:
+            reachable, unreachable = (source_label, destination_label) if result.delivered else (destination_label, source_label)
+            findings["warnings"].append(f"one-way: {reachable} reaches {unreachable}, but not the other way")
+    return findings
+
+
+def _expectation_met(result: PairResult, expect: Optional[str]) -> bool:
+    if expect == INSPECTED:
+        return result.inspected
+    if expect == REACHABLE:
+        return result.delivered
+    if expect == UNREACHABLE:
+        return not any(path.outcome == DELIVERED for _route_table, path in result.paths)
+    return True
+
+
+def _read_queries(args) -> List[Tuple[str, str, Optional[str]]]:
+    queries = [(source, destination, args.expect) for source, destination in args.query or []]
+    if args.queries_file:
+        for line in Path(args.queries_file).read_text(encoding="utf-8").splitlines():
+            parts = line.split("#", 1)[0].split()
+            if len(parts) in (2, 3):
+                queries.append((parts[0], parts[1], parts[2] if len(parts) == 3 else args.expect))
+    return queries
+
+
+@profiled("analyze_tgw_routing")
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Analyze transit gateway routing in network-config.yaml")
+    parser.add_argument("--config-dir", default="config", type=Path, help="Directory containing configuration files")
+    parser.add_argument("--query", nargs=2, action="append", metavar=("SOURCE", "DESTINATION"),
+                        help="OU path, account or VPC name pair to check (repeatable)")
+    parser.add_argument("--queries-file", help="File with one 'SOURCE DESTINATION [EXPECT]' query per line")
+    parser.add_argument("--expect", choices=[INSPECTED, REACHABLE, UNREACHABLE],
+                        help="Fail queries that do not meet this expectation")
+    parser.add_argument("--verbose", action="store_true", help="Print every hop, and explicit blackhole route hits")
+    parser.add_argument("--json", action="store_true", help="Print query results as JSON lines")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write a cProfile dump and Chrome trace of the run (same as LZA_PROFILE=1)")
+    args = parser.parse_args()
+
+    configs = load_configs(args.config_dir, ["network-config.yaml", "accounts-config.yaml"])
+    with span("build_graph", cat="routing"):
+        graph = build_graph(configs["network-config.yaml"] or {}, configs["accounts-config.yaml"] or {})
+
+    queries = _read_queries(args)
+    start = time.perf_counter()
+    if not queries:
+        with span("check", cat="routing"):
+            findings = check_graph(graph)
+        for message in findings["errors"]:
+            print(f"❌ {message}")
+        for message in findings["warnings"]:
+            print(f"⚠️  {message}")
+        if args.verbose:
+            for message in findings["info"]:
+                print(f"ℹ️  {message}")
+        print(f"\nChecked {len(graph.attached_vpcs())} attached VPCs in {(time.perf_counter() - start) * 1000:.1f} ms: "
+              f"{len(findings['errors'])} error(s), {len(findings['warnings'])} warning(s)", file=sys.stderr)
+        sys.exit(1 if findings["errors"] else 0)
+
+    failed = 0
+    count = 0
+    for source_selector, destination_selector, expect in queries:
+        sources, destinations = graph.resolve(source_selector), graph.resolve(destination_selector)
+        if not sources or not destinations:
+            missing = source_selector if not sources else destination_selector
+            print(f"❌ no VPCs match '{missing}'")
+            failed += 1
+            continue
+        with span("query", cat="routing", source=source_selector, destination=destination_selector):
+            results = query(graph, sources, destinations)
+        for result in results:
+            count += 1
+            met = _expectation_met(result, expect)
+            failed += 0 if met else 1
+            if args.json:
+                print(json.dumps({**result.to_dict(), **({"expect": expect, "met": met} if expect else {})}))
+                continue
+            if result.inspected:
+                status = f"INSPECTED by {', '.join(sorted(result.firewalls()))}"
+            elif result.delivered:
+                status = "REACHABLE without inspection"
+            elif not result.paths:
+                status = "UNKNOWN (destination has no static IPv4 CIDR)"
+            else:
+                outcomes = sorted({path.outcome for _route_table, path in result.paths})
+                status = "/".join(outcomes)
+            marker = "✅" if met else "❌"
+            print(f"{marker} {graph.vpcs[result.source].label} -> {graph.vpcs[result.destination].label}: {status}")
+            for route_table, path in result.paths:
+                if args.verbose or not met:
+                    print(f"    [{route_table}] {path.outcome}")
+                    for hop in path.hops:
+                        print(f"      {hop}")
+    print(f"\nEvaluated {count} VPC pairs in {(time.perf_counter() - start) * 1000:.1f} ms: {failed} failed",
+          file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
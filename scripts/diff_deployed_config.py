@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Structural diff of the rendered configuration against the last deployed
+aws-accelerator-config.zip, with the LZA stages each change touches.
+
+Both trees are rendered with their own replacements-config.yaml before they
+are compared, so a changed replacement value shows up as the config nodes it
+changes. The diff is keyed: list items that carry an identity field (name,
+key, id or email) are matched by it rather than by position, so inserting a
+VPC reports one added VPC instead of every later one as changed. Lists of
+scalars are compared as multisets, reporting the items added and removed.
+Every node is visited once, so the diff is linear in the size of the
+configuration.
+
+Files other than the config YAML files (SCPs, templates, policies, domain
+lists) are compared byte for byte and mapped to the stages of the config files
+that reference them.
+
+Usage:
+    python scripts/diff_deployed_config.py --previous aws-accelerator-config.zip
+    python scripts/diff_deployed_config.py --previous s3://bucket/prefix/aws-accelerator-config.zip
+    python scripts/diff_deployed_config.py --previous previous-config/ --json
+    python scripts/diff_deployed_config.py --previous s3://... --fail-on accounts organization
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+import zipfile
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import yaml
+
+# Allow running as `python scripts/<name>.py` from the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from preflight_checks.lza_config import REPLACEMENTS_FILE_NAME, YAML_LOADER, parse_replacements, render
+from preflight_checks.profiling import profiled, span
+from preflight_checks.schema import CONFIG_SCHEMAS
+
+# Fields that identify an item of a list of mappings, in order of preference
+IDENTITY_FIELDS = ("name", "key", "id", "email")
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+REORDERED = "reordered"
+MARKERS = {ADDED: "+", REMOVED: "-", CHANGED: "~", REORDERED: "↕"}
+
+# LZA pipeline stages (AcceleratorStage), in the order they run
+STAGES = (
+    "prepare", "accounts", "bootstrap", "key", "logging", "organization", "security-audit",
+    "network-prep", "security", "operations", "identity-center", "network-vpc",
+    "security-resources", "network-associations", "customizations", "finalize",
+)
+
+# (file, top-level key[, second-level key]) -> stages; the longest match wins.
+# Second-level keys apply to every item of a top-level list (e.g. each VPC).
+STAGE_MAP: Dict[Tuple[str, ...], Tuple[str, ...]] = {
+    ("accounts-config.yaml",): ("prepare", "accounts", "bootstrap"),
+    ("customizations-config.yaml",): ("customizations",),
+    ("customizations-config.yaml", "applications"): ("customizations",),
+    ("global-config.yaml",): ("prepare", "logging", "operations", "finalize"),
+    ("global-config.yaml", "enabledRegions"): ("prepare", "bootstrap", "logging", "security-audit", "network-prep"),
+    ("global-config.yaml", "logging"): ("logging", "organization"),
+    ("global-config.yaml", "controlTower"): ("prepare",),
+    ("global-config.yaml", "backup"): ("organization", "operations"),
+    ("global-config.yaml", "reports"): ("organization",),
+    ("global-config.yaml", "budgets"): ("operations",),
+    ("global-config.yaml", "ssmParameters"): ("operations",),
+    ("iam-config.yaml",): ("operations",),
+    ("iam-config.yaml", "identityCenter"): ("identity-center",),
+    ("iam-config.yaml", "managedActiveDirectories"): ("operations", "network-associations"),
+    ("network-config.yaml",): ("network-prep",),
+    ("network-config.yaml", "vpcs"): ("network-vpc",),
+    ("network-config.yaml", "vpcTemplates"): ("network-vpc",),
+    ("network-config.yaml", "vpcs", "interfaceEndpoints"): ("network-vpc", "network-associations"),
+    ("network-config.yaml", "vpcs", "transitGatewayAttachments"): ("network-vpc", "network-associations"),
+    ("network-config.yaml", "vpcs", "routeTables"): ("network-vpc", "network-associations"),
+    ("network-config.yaml", "vpcTemplates", "transitGatewayAttachments"): ("network-vpc", "network-associations"),
+    ("network-config.yaml", "vpcPeering"): ("network-vpc", "network-associations"),
+    ("network-config.yaml", "transitGatewayPeering"): ("network-associations",),
+    ("network-config.yaml", "customerGateways"): ("network-associations",),
+    ("network-config.yaml", "directConnectGateways"): ("network-prep", "network-associations"),
+    ("network-config.yaml", "centralNetworkServices"): ("network-prep", "network-vpc", "network-associations"),
+    ("network-config.yaml", "centralNetworkServices", "ipams"): ("network-prep",),
+    ("network-config.yaml", "centralNetworkServices", "networkFirewall"): ("network-prep", "network-vpc"),
+    ("network-config.yaml", "firewallManagerService"): ("security-audit",),
+    ("organization-config.yaml",): ("prepare", "organization"),
+    ("organization-config.yaml", "serviceControlPolicies"): ("accounts",),
+    ("organization-config.yaml", "quarantineNewAccounts"): ("accounts",),
+    ("organization-config.yaml", "organizationalUnits"): ("prepare", "accounts"),
+    ("security-config.yaml",): ("security",),
+    ("security-config.yaml", "centralSecurityServices"): ("security-audit", "security"),
+    ("security-config.yaml", "keyManagementService"): ("key", "security"),
+    ("security-config.yaml", "awsConfig"): ("security", "security-resources"),
+    ("security-config.yaml", "cloudWatch"): ("security-resources",),
+    ("security-config.yaml", "iamPasswordPolicy"): ("security",),
+    ("security-config.yaml", "accessAnalyzer"): ("security-audit",),
+}
+
+# Mapping keys and list item segments ("[name=Foo]") from the document root
+NodePath = Tuple[str, ...]
+
+
+class Change(NamedTuple):
+    file: str
+    path: NodePath
+    kind: str
+    old: Any = None
+    new: Any = None
+    # Top-level and second-level mapping keys, for the stage lookup
+    keys: Tuple[str, ...] = ()
+
+    def path_text(self) -> str:
+        text = ""
+        for segment in self.path:
+            text += segment if segment.startswith("[") else (f".{segment}" if text else segment)
+        return text
+
+    def location(self) -> str:
+        return f"{self.file}:{self.path_text()}" if self.path else self.file
+
+    def to_dict(self, stages: Iterable[str]) -> Dict[str, Any]:
+        return {
+            "file": self.file, "path": self.path_text(), "kind": self.kind,
+            "old": self.old, "new": self.new, "stages": list(stages),
+        }
+
+
+# --- Loading bundles ---
+
+def read_bundle(source: str) -> Optional[Dict[str, bytes]]:
+    """
+    Files of a config bundle (relative path -> content) from a directory, a zip
+    file or an s3:// URI of a zip. None if the zip does not exist (first deploy),
+    or cannot be read: without s3:ListBucket, S3 answers 403 rather than 404 for
+    a missing key, and reading an SSE-KMS zip also needs kms:Decrypt.
+    """
+    if source.startswith("s3://"):
+        from botocore.exceptions import ClientError
+
+        from preflight_checks.aws_checks import get_aws_client
+
+        bucket, _, key = source[len("s3://"):].partition("/")
+        try:
+            with span("download_bundle", cat="io", source=source):
+                body = get_aws_client("s3").get_object(Bucket=bucket, Key=key)["Body"].read()
+        except ClientError as e:
+            code = e.response["Error"]["Code"]
+            if code in ("NoSuchKey", "404"):
+                return None
+            if code in ("AccessDenied", "403"):
+                print(f"Warning: cannot read {source} ({code}); the deploy role needs s3:GetObject "
+                      f"and kms:Decrypt on the bundle. Nothing to compare with.", file=sys.stderr)
+                return None
+            raise
+        return _read_zip(io.BytesIO(body))
+    path = Path(source)
+    if path.is_dir():
+        return {
+            file.relative_to(path).as_posix(): file.read_bytes()
+            for file in sorted(path.rglob("*")) if file.is_file()
+        }
+    if not path.exists():
+        return None
+    return _read_zip(path)
+
+
+def _read_zip(file) -> Dict[str, bytes]:
+    with zipfile.ZipFile(file) as archive:
+        return {
+            info.filename.removeprefix("./"): archive.read(info)
+            for info in archive.infolist() if not info.is_dir()
+        }
+
+
+def render_bundle(files: Dict[str, bytes]) -> Dict[str, Any]:
+    """Parsed config YAML files, rendered with the bundle's own replacements."""
+    replacements: Dict[str, Any] = {}
+    if REPLACEMENTS_FILE_NAME in files:
+        replacements = parse_replacements(yaml.load(files[REPLACEMENTS_FILE_NAME], Loader=YAML_LOADER))
+    documents = {}
+    for name in CONFIG_SCHEMAS:
+        if name not in files:
+            continue
+        text = files[name].decode("utf-8")
+        if name != REPLACEMENTS_FILE_NAME:
+            text = render(text, replacements)
+        with span("parse", cat="file", file=name):
+            documents[name] = yaml.load(text, Loader=YAML_LOADER)
+    return documents
+
+
+# --- Diffing ---
+
+def _identity_field(items: List[Any]) -> Optional[str]:
+    """The first identity field every item has a scalar value for; None if there is none."""
+    if not items or not all(isinstance(item, dict) for item in items):
+        return None
+    for name in IDENTITY_FIELDS:
+        if all(isinstance(item.get(name), (str, int)) for item in items):
+            return name
+    return None
+
+
+def _keyed(items: List[Dict[str, Any]], identity: str) -> Dict[str, Dict[str, Any]]:
+    """Items by list segment; repeated identities are numbered by occurrence ("[name=Foo#2]")."""
+    keyed: Dict[str, Dict[str, Any]] = {}
+    seen: Counter = Counter()
+    for item in items:
+        value = item[identity]
+        seen[value] += 1
+        suffix = f"#{seen[value]}" if seen[value] > 1 else ""
+        keyed[f"[{identity}={value}{suffix}]"] = item
+    return keyed
+
+
+def _child_keys(keys: Tuple[str, ...], key: Any) -> Tuple[str, ...]:
+    """Keys for the stage lookup: the top-level key, and the next mapping key below it (list items are skipped)."""
+    return keys + (str(key),) if len(keys) < 2 else keys
+
+
+def _hashable(value: Any) -> bool:
+    return not isinstance(value, (dict, list))
+
+
+def diff_values(file: str, old: Any, new: Any, path: NodePath = (), keys: Tuple[str, ...] = (),
+                changes: Optional[List[Change]] = None) -> List[Change]:
+    """Appends the changes from old to new under path to changes, and returns it."""
+    if changes is None:
+        changes = []
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            child_keys = _child_keys(keys, key)
+            if key not in new:
+                changes.append(Change(file, path + (str(key),), REMOVED, old[key], None, child_keys))
+            else:
+                diff_values(file, old[key], new[key], path + (str(key),), child_keys, changes)
+        for key in new:
+            if key not in old:
+                changes.append(Change(file, path + (str(key),), ADDED, None, new[key], _child_keys(keys, key)))
+        return changes
+    if isinstance(old, list) and isinstance(new, list):
+        old_identity, new_identity = _identity_field(old), _identity_field(new)
+        if not old or not new:
+            identity = old_identity or new_identity
+        else:
+            identity = old_identity if old_identity == new_identity else None
+        if identity is not None:
+            old_items, new_items = _keyed(old, identity), _keyed(new, identity)
+            for segment, item in old_items.items():
+                if segment not in new_items:
+                    changes.append(Change(file, path + (segment,), REMOVED, item, None, keys))
+                else:
+                    diff_values(file, item, new_items[segment], path + (segment,), keys, changes)
+            for segment, item in new_items.items():
+                if segment not in old_items:
+                    changes.append(Change(file, path + (segment,), ADDED, None, item, keys))
+            return changes
+        if all(_hashable(item) for item in old) and all(_hashable(item) for item in new):
+            old_counts, new_counts = Counter(old), Counter(new)
+            removed = list((old_counts - new_counts).elements())
+            added = list((new_counts - old_counts).elements())
+            if removed or added:
+                changes.append(Change(file, path, CHANGED, removed, added, keys))
+            elif old != new:
+                changes.append(Change(file, path, REORDERED, old, new, keys))
+            return changes
+        for index in range(max(len(old), len(new))):
+            segment = f"[{index}]"
+            if index >= len(new):
+                changes.append(Change(file, path + (segment,), REMOVED, old[index], None, keys))
+            elif index >= len(old):
+                changes.append(Change(file, path + (segment,), ADDED, None, new[index], keys))
+            else:
+                diff_values(file, old[index], new[index], path + (segment,), keys, changes)
+        return changes
+    if old != new or type(old) is not type(new):
+        changes.append(Change(file, path, CHANGED, old, new, keys))
+    return changes
+
+
+def diff_bundles(old_files: Dict[str, bytes], new_files: Dict[str, bytes]) -> List[Change]:
+    """Changes between two bundles: keyed changes in the config files, then changed other files."""
+    changes: List[Change] = []
+    with span("render", cat="diff"):
+        old_documents, new_documents = render_bundle(old_files), render_bundle(new_files)
+    with span("diff", cat="diff"):
+        for name in sorted(set(old_documents) | set(new_documents)):
+            if name not in new_documents:
+                changes.append(Change(name, (), REMOVED))
+            elif name not in old_documents:
+                changes.append(Change(name, (), ADDED))
+            else:
+                diff_values(name, old_documents[name], new_documents[name], changes=changes)
+        for name in sorted(set(old_files) | set(new_files)):
+            if name in CONFIG_SCHEMAS:
+                continue
+            if name not in new_files:
+                changes.append(Change(name, (), REMOVED))
+            elif name not in old_files:
+                changes.append(Change(name, (), ADDED))
+            elif old_files[name] != new_files[name]:
+                changes.append(Change(name, (), CHANGED))
+    return changes
+
+
+# --- Stages ---
+
+def stages_for(change: Change, referencing: Dict[str, List[str]]) -> Tuple[str, ...]:
+    """LZA stages a change touches, in pipeline order."""
+    if change.file == REPLACEMENTS_FILE_NAME:
+        # Replacement values reach the stages through the rendered files
+        return ()
+    if change.file not in CONFIG_SCHEMAS:
+        stages = set()
+        for config_name in referencing.get(change.file, []):
+            stages.update(_lookup(config_name, ()))
+        return tuple(stage for stage in STAGES if stage in stages)
+    return _lookup(change.file, change.keys)
+
+
+def _lookup(file: str, keys: Tuple[str, ...]) -> Tuple[str, ...]:
+    for length in range(len(keys), -1, -1):
+        stages = STAGE_MAP.get((file,) + keys[:length])
+        if stages is not None:
+            return stages
+    return ()
+
+
+def referencing_configs(changes: List[Change], files: Dict[str, bytes]) -> Dict[str, List[str]]:
+    """For each changed non-config file, the config files whose text mentions its path."""
+    paths = {change.file for change in changes if change.file not in CONFIG_SCHEMAS}
+    texts = {name: files[name].decode("utf-8", "replace") for name in CONFIG_SCHEMAS if name in files}
+    return {path: [name for name, text in texts.items() if path in text] for path in paths}
+
+
+def _short(value: Any, limit: int = 120) -> str:
+    text = json.dumps(value, default=str, sort_keys=True)
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+@profiled("diff_deployed_config")
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Structural diff of the rendered config against the last deployed bundle")
+    parser.add_argument("--config-dir", default="config", help="Directory (or zip) with the configuration to deploy")
+    parser.add_argument("--previous", required=True,
+                        help="Last deployed aws-accelerator-config.zip: a local path, s3://bucket/key, or a directory")
+    parser.add_argument("--fail-on", nargs="+", choices=STAGES, metavar="STAGE",
+                        help=f"Exit 1 if a change touches one of these stages ({', '.join(STAGES)})")
+    parser.add_argument("--max-changes", type=int, default=50, help="Changes listed per stage (0: all)")
+    parser.add_argument("--json", action="store_true", help="Print changes as JSON lines")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write a cProfile dump and Chrome trace of the run (same as LZA_PROFILE=1)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    current = read_bundle(args.config_dir)
+    if current is None:
+        parser.error(f"{args.config_dir} does not exist")
+    previous = read_bundle(args.previous)
+    if previous is None:
+        print(f"No deployed bundle at {args.previous}; everything is new.", file=sys.stderr)
+        sys.exit(0)
+
+    changes = diff_bundles(previous, current)
+    referencing = referencing_configs(changes, {**previous, **current})
+    by_stage: Dict[str, List[Change]] = defaultdict(list)
+    for change in changes:
+        stages = stages_for(change, referencing)
+        if args.json:
+            print(json.dumps(change.to_dict(stages), default=str))
+        for stage in stages or ("(no stage)",):
+            by_stage[stage].append(change)
+    elapsed = time.perf_counter() - start
+
+    if not args.json:
+        for stage in list(STAGES) + ["(no stage)"]:
+            stage_changes = by_stage.get(stage)
+            if not stage_changes:
+                continue
+            print(f"{stage}: {len(stage_changes)} change(s)")
+            listed = stage_changes if args.max_changes == 0 else stage_changes[:args.max_changes]
+            for change in listed:
+                detail = ""
+                if change.kind == CHANGED and change.path:
+                    detail = f": {_short(change.old)} -> {_short(change.new)}"
+                elif change.kind == ADDED and change.path:
+                    detail = f": {_short(change.new)}"
+                print(f"  {MARKERS[change.kind]} {change.location()}{detail}")
+            if len(listed) < len(stage_changes):
+                print(f"  ... and {len(stage_changes) - len(listed)} more")
+    touched = [stage for stage in STAGES if stage in by_stage]
+    print(f"\n{len(changes)} change(s) touching {len(touched)} stage(s) in {elapsed * 1000:.0f} ms"
+          + (f": {', '.join(touched)}" if touched else ""), file=sys.stderr)
+
+    failing = sorted(set(args.fail_on or []) & set(touched), key=STAGES.index)
+    if failing:
+        print(f"❌ Changes touch {', '.join(failing)}", file=sys.stderr)
+        sys.exit(1)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
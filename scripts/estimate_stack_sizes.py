@@ -0,0 +1,526 @@
+#!/usr/bin/env python3
+"""
+Estimate CloudFormation resource counts and template sizes of the stacks LZA
+synthesizes from network-config.yaml, security-config.yaml and
+customizations-config.yaml.
+
+LZA deploys one stack of each kind per account and region
+(<prefix>-NetworkVpcStack-<account>-<region> and so on). A large config can
+push one of them past the CloudFormation limits of 500 resources per stack and
+1 MB per template (CDK uploads templates to S3), which otherwise only shows up
+hours into a pipeline run. Every config entry is mapped to the stack it lands
+in and weighted by the resources LZA creates for it (a subnet is the subnet,
+its route table association and the SSM parameter holding its ID) and their
+approximate synthesized JSON size.
+
+The projection is one pass over the rendered configs that tallies entry kinds
+per stack in a Counter, so configs with thousands of subnets and routes are
+estimated in milliseconds. Custom templates from customizations-config.yaml
+are measured directly: their resources are counted and their size is the file
+size.
+
+The weights are approximations of what LZA synthesizes; treat results as an
+early warning rather than an exact count.
+
+Usage:
+    python scripts/estimate_stack_sizes.py [--config-dir config] [--accelerator-prefix AWSAccelerator]
+    python scripts/estimate_stack_sizes.py --warn-ratio 0.7 --json
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import yaml
+
+# Allow running as `python scripts/<name>.py` from the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from preflight_checks.diagnostics import load_template
+from preflight_checks.lza_config import (
+    ROOT_OU,
+    account_ous,
+    enabled_regions,
+    load_configs,
+    resolve_deployment_targets,
+    vpc_instances,
+)
+from preflight_checks.profiling import profiled, span
+
+DEFAULT_ACCELERATOR_PREFIX = "AWSAccelerator"
+CONFIG_FILE_NAMES = [
+    "accounts-config.yaml",
+    "global-config.yaml",
+    "network-config.yaml",
+    "security-config.yaml",
+    "customizations-config.yaml",
+]
+
+# CloudFormation limits
+MAX_RESOURCES = 500
+MAX_TEMPLATE_BYTES = 1_000_000
+DEFAULT_WARN_RATIO = 0.8
+
+# LZA stacks the config entries land in
+NETWORK_PREP = "NetworkPrepStack"
+NETWORK_VPC = "NetworkVpcStack"
+NETWORK_VPC_ENDPOINTS = "NetworkVpcEndpointsStack"
+NETWORK_ASSOCIATIONS = "NetworkAssociationsStack"
+SECURITY = "SecurityStack"
+SECURITY_RESOURCES = "SecurityResourcesStack"
+CUSTOMIZATIONS = "CustomizationsStack"
+
+# Per stack: CDK metadata, the bootstrap version parameter and rule, and the
+# custom resource providers every LZA stack carries
+STACK_OVERHEAD = (4, 8_000)
+
+
+class Weight(NamedTuple):
+    """CloudFormation resources and approximate template bytes for one config entry."""
+
+    resources: int
+    bytes: int
+
+
+WEIGHTS: Dict[str, Weight] = {
+    # NetworkPrepStack
+    "transit_gateway": Weight(2, 2_400),  # gateway and SSM parameter
+    "transit_gateway_route_table": Weight(2, 1_800),
+    "resource_share": Weight(1, 1_200),
+    "firewall_policy": Weight(2, 2_500),
+    "firewall_rule_group": Weight(2, 3_000),
+    "dns_firewall_rule_group": Weight(2, 1_800),
+    "dns_firewall_rule": Weight(2, 1_400),  # rule and its domain list
+    "query_log_config": Weight(2, 1_600),
+    "ipam": Weight(2, 1_500),
+    "ipam_pool": Weight(2, 1_400),
+    # NetworkVpcStack
+    "vpc": Weight(2, 2_200),  # VPC and SSM parameter
+    "vpc_cidr": Weight(1, 600),
+    "internet_gateway": Weight(2, 1_200),  # gateway and attachment
+    "subnet": Weight(3, 2_400),  # subnet, route table association, SSM parameter
+    "route_table": Weight(2, 1_600),  # route table and SSM parameter
+    "route": Weight(1, 700),
+    "nat_gateway": Weight(3, 2_000),  # gateway, EIP, SSM parameter
+    "gateway_endpoint": Weight(2, 1_500),
+    "network_acl": Weight(2, 1_200),
+    "network_acl_entry": Weight(1, 650),
+    "network_acl_association": Weight(1, 500),
+    "security_group": Weight(2, 1_400),
+    "security_group_rule": Weight(1, 600),
+    "transit_gateway_attachment": Weight(2, 1_800),
+    "prefix_list": Weight(2, 1_200),
+    "flow_log": Weight(1, 900),
+    "flow_log_cloudwatch": Weight(3, 2_200),  # log group, role and policy
+    "query_log_association": Weight(1, 500),
+    "dns_firewall_association": Weight(1, 600),
+    # NetworkVpcEndpointsStack
+    "interface_endpoint": Weight(2, 1_900),  # endpoint and SSM parameter
+    "interface_endpoint_security_group": Weight(1, 1_300),
+    "network_firewall": Weight(2, 2_600),  # firewall and SSM parameter
+    "firewall_logging": Weight(2, 1_800),  # logging configuration and log group
+    "endpoint_route": Weight(1, 800),
+    # NetworkAssociationsStack
+    "transit_gateway_association": Weight(1, 600),
+    "transit_gateway_propagation": Weight(1, 600),
+    "transit_gateway_static_route": Weight(1, 700),
+    # SecurityStack
+    "security_service": Weight(2, 1_800),
+    # SecurityResourcesStack
+    "config_rule": Weight(1, 1_200),
+    "config_remediation": Weight(2, 2_000),
+    "metric_filter": Weight(1, 800),
+    "alarm": Weight(1, 1_100),
+    "kms_key": Weight(2, 2_000),  # key and alias
+    # CustomizationsStack
+    "stack_set": Weight(1, 1_500),
+}
+
+# Security services SecurityStack configures in every account (minus excludeRegions)
+SECURITY_SERVICES = ("macie", "guardduty", "auditManager", "securityHub", "ebsDefaultVolumeEncryption")
+
+# Routes created with the endpoints they target rather than in NetworkVpcStack
+ENDPOINT_ROUTE_TYPES = {"networkFirewall", "gatewayLoadBalancerEndpoint"}
+
+
+@dataclass
+class StackEstimate:
+    """Projected size of one stack."""
+
+    stack: str
+    account: str
+    region: str
+    entries: Counter = field(default_factory=Counter)
+    resources: int = 0
+    bytes: int = 0
+    template: Optional[str] = None
+
+    def add(self, kind: str, count: int = 1) -> None:
+        if count:
+            self.entries[kind] += count
+
+    def total(self) -> None:
+        """Adds up the weighted entries (unless the stack is a measured template)."""
+        if self.template is not None:
+            return
+        self.resources, self.bytes = STACK_OVERHEAD
+        for kind, count in self.entries.items():
+            weight = WEIGHTS[kind]
+            self.resources += weight.resources * count
+            self.bytes += weight.bytes * count
+
+    def utilisation(self) -> float:
+        return max(self.resources / MAX_RESOURCES, self.bytes / MAX_TEMPLATE_BYTES)
+
+    def largest(self, limit: int = 3) -> List[Tuple[str, int]]:
+        """The entry kinds contributing most resources."""
+        return sorted(
+            ((kind, WEIGHTS[kind].resources * count) for kind, count in self.entries.items()),
+            key=lambda item: -item[1],
+        )[:limit]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "stack": self.stack,
+            "account": self.account,
+            "region": self.region,
+            "resources": self.resources,
+            "bytes": self.bytes,
+            "utilisation": round(self.utilisation(), 3),
+            "entries": dict(self.entries),
+            **({"template": self.template} if self.template else {}),
+        }
+
+
+class StackProjection:
+    """Stack estimates by (stack name, account, region), created on first use."""
+
+    def __init__(self, prefix: str) -> None:
+        self.prefix = prefix
+        self.stacks: Dict[Tuple[str, str, str], StackEstimate] = {}
+
+    def _get(self, name: str, account: str, region: str) -> StackEstimate:
+        key = (name, account, region)
+        estimate = self.stacks.get(key)
+        if estimate is None:
+            estimate = self.stacks[key] = StackEstimate(name, account, region)
+        return estimate
+
+    def __call__(self, stack: str, account: str, region: str) -> StackEstimate:
+        """The LZA stack of this kind in account and region."""
+        return self._get(f"{self.prefix}-{stack}-{account}-{region}", account, region)
+
+    def custom(self, name: str, account: str, region: str, template: str, size: Tuple[int, int]) -> None:
+        """A stack deployed from a custom template, with its measured (resources, bytes)."""
+        estimate = self._get(name, account, region)
+        estimate.template = template
+        estimate.resources, estimate.bytes = size
+
+
+def _target_regions(entry: Dict[str, Any], targets: Optional[Dict[str, Any]], regions: List[str]) -> List[str]:
+    excluded = set((targets or {}).get("excludedRegions") or []) | set(entry.get("excludeRegions") or [])
+    return [region for region in entry.get("regions") or regions if region not in excluded]
+
+
+def project_network(
+    stacks: StackProjection,
+    network_config: Dict[str, Any],
+    accounts_config: Dict[str, Any],
+    regions: List[str],
+) -> None:
+    """Maps network-config.yaml entries onto the network stacks."""
+    home_region = network_config.get("homeRegion") or (regions[0] if regions else "")
+    central = network_config.get("centralNetworkServices") or {}
+    admin = central.get("delegatedAdminAccount")
+    tgw_regions: Dict[Tuple[str, str], str] = {}
+
+    for tgw in network_config.get("transitGateways") or []:
+        account, region = tgw.get("account"), tgw.get("region")
+        tgw_regions[(tgw.get("name"), account)] = region
+        prep = stacks(NETWORK_PREP, account, region)
+        prep.add("transit_gateway")
+        prep.add("resource_share", 1 if tgw.get("shareTargets") else 0)
+        route_tables = tgw.get("routeTables") or []
+        prep.add("transit_gateway_route_table", len(route_tables))
+        associations = stacks(NETWORK_ASSOCIATIONS, account, region)
+        for route_table in route_tables:
+            associations.add("transit_gateway_static_route", len(route_table.get("routes") or []))
+
+    if admin:
+        firewall = central.get("networkFirewall") or {}
+        for policy in firewall.get("policies") or []:
+            for region in policy.get("regions") or [home_region]:
+                prep = stacks(NETWORK_PREP, admin, region)
+                prep.add("firewall_policy")
+                prep.add("resource_share", 1 if policy.get("shareTargets") else 0)
+        for rule_group in firewall.get("rules") or []:
+            for region in rule_group.get("regions") or [home_region]:
+                stacks(NETWORK_PREP, admin, region).add("firewall_rule_group")
+        resolver = central.get("route53Resolver") or {}
+        for rule_group in resolver.get("firewallRuleGroups") or []:
+            for region in rule_group.get("regions") or [home_region]:
+                prep = stacks(NETWORK_PREP, admin, region)
+                prep.add("dns_firewall_rule_group")
+                prep.add("dns_firewall_rule", len(rule_group.get("rules") or []))
+                prep.add("resource_share", 1 if rule_group.get("shareTargets") else 0)
+        if resolver.get("queryLogs"):
+            for region in regions:
+                prep = stacks(NETWORK_PREP, admin, region)
+                prep.add("query_log_config", len(resolver["queryLogs"].get("destinations") or []))
+                prep.add("resource_share", 1 if resolver["queryLogs"].get("shareTargets") else 0)
+        for ipam in central.get("ipams") or []:
+            prep = stacks(NETWORK_PREP, admin, ipam.get("region") or home_region)
+            prep.add("ipam")
+            prep.add("ipam_pool", len(ipam.get("pools") or []))
+
+    for prefix_list in network_config.get("prefixLists") or []:
+        accounts = resolve_deployment_targets(prefix_list.get("deploymentTargets"), accounts_config)
+        accounts |= set(prefix_list.get("accounts") or [])
+        for account in accounts:
+            for region in prefix_list.get("regions") or [home_region]:
+                stacks(NETWORK_VPC, account, region).add("prefix_list")
+
+    default_flow_logs = network_config.get("vpcFlowLogs")
+    firewalls_by_vpc: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for firewall in (central.get("networkFirewall") or {}).get("firewalls") or []:
+        firewalls_by_vpc[firewall.get("vpc")].append(firewall)
+
+    for account, region, vpc in vpc_instances(network_config, accounts_config):
+        stack = stacks(NETWORK_VPC, account, region)
+        endpoints_stack = stacks(NETWORK_VPC_ENDPOINTS, account, region)
+        stack.add("vpc")
+        stack.add("vpc_cidr", max(len(vpc.get("cidrs") or []) - 1, 0))
+        stack.add("internet_gateway", 1 if vpc.get("internetGateway") else 0)
+
+        subnets = vpc.get("subnets") or []
+        stack.add("subnet", len(subnets))
+        route_tables = vpc.get("routeTables") or []
+        stack.add("route_table", len(route_tables))
+        for route_table in route_tables:
+            for route in route_table.get("routes") or []:
+                route_type = route.get("type")
+                if route_type in ENDPOINT_ROUTE_TYPES:
+                    endpoints_stack.add("endpoint_route")
+                elif route_type != "gatewayEndpoint":
+                    # Gateway endpoint routes are part of the endpoint resource
+                    stack.add("route")
+        stack.add("nat_gateway", len(vpc.get("natGateways") or []))
+        stack.add("gateway_endpoint", len((vpc.get("gatewayEndpoints") or {}).get("endpoints") or []))
+
+        for acl in vpc.get("networkAcls") or []:
+            stack.add("network_acl")
+            stack.add("network_acl_entry", len(acl.get("inboundRules") or []) + len(acl.get("outboundRules") or []))
+            stack.add("network_acl_association", len(acl.get("subnetAssociations") or []))
+        for group in vpc.get("securityGroups") or []:
+            stack.add("security_group")
+            stack.add("security_group_rule", len(group.get("inboundRules") or []) + len(group.get("outboundRules") or []))
+
+        for attachment in vpc.get("transitGatewayAttachments") or []:
+            stack.add("transit_gateway_attachment")
+            tgw = attachment.get("transitGateway") or {}
+            tgw_region = tgw_regions.get((tgw.get("name"), tgw.get("account")), region)
+            associations = stacks(NETWORK_ASSOCIATIONS, tgw.get("account"), tgw_region)
+            associations.add("transit_gateway_association", len(attachment.get("routeTableAssociations") or []))
+            associations.add("transit_gateway_propagation", len(attachment.get("routeTablePropagations") or []))
+
+        flow_logs = vpc.get("vpcFlowLogs", default_flow_logs)
+        if flow_logs:
+            destinations = flow_logs.get("destinations") or []
+            stack.add("flow_log", len(destinations))
+            stack.add("flow_log_cloudwatch", 1 if "cloud-watch-logs" in destinations else 0)
+        stack.add("query_log_association", len(vpc.get("queryLogs") or []))
+        stack.add("dns_firewall_association", len(vpc.get("dnsFirewallRuleGroups") or []))
+
+        endpoints = (vpc.get("interfaceEndpoints") or {}).get("endpoints") or []
+        if endpoints:
+            endpoints_stack.add("interface_endpoint", len(endpoints))
+            endpoints_stack.add("interface_endpoint_security_group")
+        for firewall in firewalls_by_vpc.get(vpc.get("name"), []):
+            endpoints_stack.add("network_firewall")
+            endpoints_stack.add("firewall_logging", len(firewall.get("loggingConfiguration") or []))
+
+
+def project_security(
+    stacks: StackProjection,
+    security_config: Dict[str, Any],
+    accounts_config: Dict[str, Any],
+    regions: List[str],
+) -> None:
+    """Maps security-config.yaml entries onto SecurityStack and SecurityResourcesStack."""
+    accounts = sorted(account_ous(accounts_config))
+    services = security_config.get("centralSecurityServices") or {}
+    for name in SECURITY_SERVICES:
+        service = services.get(name) or {}
+        if not service.get("enable"):
+            continue
+        for region in _target_regions(service, None, regions):
+            for account in accounts:
+                stacks(SECURITY, account, region).add("security_service")
+
+    aws_config = security_config.get("awsConfig") or {}
+    for rule_set in aws_config.get("ruleSets") or []:
+        targets = rule_set.get("deploymentTargets")
+        rules = rule_set.get("rules") or []
+        remediations = sum(1 for rule in rules if (rule.get("remediation") or {}))
+        for account in resolve_deployment_targets(targets, accounts_config):
+            for region in _target_regions({}, targets, regions):
+                stack = stacks(SECURITY_RESOURCES, account, region)
+                stack.add("config_rule", len(rules))
+                stack.add("config_remediation", remediations)
+
+    cloudwatch = security_config.get("cloudWatch") or {}
+    for kind, key, items in (("metric_filter", "metricSets", "metrics"), ("alarm", "alarmSets", "alarms")):
+        for item_set in cloudwatch.get(key) or []:
+            targets = item_set.get("deploymentTargets")
+            for account in resolve_deployment_targets(targets, accounts_config):
+                for region in _target_regions(item_set, targets, regions):
+                    stacks(SECURITY_RESOURCES, account, region).add(kind, len(item_set.get(items) or []))
+
+    for key_set in (security_config.get("keyManagementService") or {}).get("keySets") or []:
+        targets = key_set.get("deploymentTargets")
+        for account in resolve_deployment_targets(targets, accounts_config):
+            for region in _target_regions({}, targets, regions):
+                stacks(SECURITY_RESOURCES, account, region).add("kms_key")
+
+
+def measure_template(path: Path) -> Tuple[int, int]:
+    """Returns (resource count, size in bytes) of a CloudFormation template."""
+    text = path.read_text(encoding="utf-8")
+    template = load_template(text)[0] or {}
+    return len(template.get("Resources") or {}), len(text.encode("utf-8"))
+
+
+def project_customizations(
+    stacks: StackProjection,
+    customizations_config: Dict[str, Any],
+    accounts_config: Dict[str, Any],
+    regions: List[str],
+    config_dir: Path,
+) -> List[str]:
+    """
+    Maps customizations-config.yaml onto the custom stacks and CustomizationsStack.
+
+    Returns:
+        Templates that could not be read.
+    """
+    customizations = (customizations_config or {}).get("customizations") or {}
+    ous = account_ous(accounts_config)
+    management = next((account for account, ou in ous.items() if ou == ROOT_OU), "Management")
+    home_region = regions[0] if regions else ""
+    problems: List[str] = []
+    measured: Dict[str, Optional[Tuple[int, int]]] = {}
+
+    def measure(template: str) -> Optional[Tuple[int, int]]:
+        if template not in measured:
+            try:
+                measured[template] = measure_template(config_dir / template)
+            except (OSError, yaml.YAMLError) as e:
+                problems.append(f"{template}: {e}")
+                measured[template] = None
+        return measured[template]
+
+    def add_template(name: str, template: str, account: str, region: str) -> None:
+        size = measure(template)
+        if size is None:
+            return
+        stacks.custom(name, account, region, template, size)
+
+    for stack_set in customizations.get("cloudFormationStackSets") or []:
+        stacks(CUSTOMIZATIONS, management, home_region).add("stack_set")
+        # The StackSet template is deployed as is to every instance, so it is measured once
+        add_template(stack_set.get("name"), stack_set.get("template"), management, home_region)
+
+    for custom_stack in customizations.get("cloudFormationStacks") or []:
+        targets = custom_stack.get("deploymentTargets")
+        for account in sorted(resolve_deployment_targets(targets, accounts_config)):
+            for region in _target_regions(custom_stack, targets, regions):
+                add_template(custom_stack.get("name"), custom_stack.get("template"), account, region)
+    return problems
+
+
+def estimate_stacks(
+    config_dir: Path, prefix: str = DEFAULT_ACCELERATOR_PREFIX
+) -> Tuple[List[StackEstimate], List[str]]:
+    """
+    Projects every LZA stack the configs produce.
+
+    Returns:
+        (stack estimates, problems reading custom templates).
+    """
+    with span("load_configs", cat="config"):
+        configs = load_configs(config_dir, CONFIG_FILE_NAMES)
+    accounts_config = configs["accounts-config.yaml"] or {}
+    regions = enabled_regions(configs["global-config.yaml"])
+
+    stacks = StackProjection(prefix)
+    with span("project", cat="estimate"):
+        project_network(stacks, configs["network-config.yaml"] or {}, accounts_config, regions)
+        project_security(stacks, configs["security-config.yaml"] or {}, accounts_config, regions)
+        problems = project_customizations(
+            stacks, configs["customizations-config.yaml"] or {}, accounts_config, regions, config_dir
+        )
+    estimates = list(stacks.stacks.values())
+    for estimate in estimates:
+        estimate.total()
+    estimates.sort(key=lambda estimate: (-estimate.utilisation(), estimate.stack, estimate.account))
+    return estimates, problems
+
+
+@profiled("estimate_stack_sizes")
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Estimate resource counts and template sizes of LZA stacks")
+    parser.add_argument("--config-dir", default="config", type=Path, help="Directory containing configuration files")
+    parser.add_argument("--accelerator-prefix", default=DEFAULT_ACCELERATOR_PREFIX, help="Prefix of the LZA stack names")
+    parser.add_argument("--warn-ratio", type=float, default=DEFAULT_WARN_RATIO,
+                        help=f"Warn when a stack reaches this share of a limit (default: {DEFAULT_WARN_RATIO})")
+    parser.add_argument("--all", action="store_true", help="Print every stack, not only those near a limit")
+    parser.add_argument("--json", action="store_true", help="Print every stack as JSON lines")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write a cProfile dump and Chrome trace of the run (same as LZA_PROFILE=1)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    estimates, problems = estimate_stacks(args.config_dir, args.accelerator_prefix)
+    elapsed = time.perf_counter() - start
+
+    for problem in problems:
+        print(f"❌ Could not read template {problem}")
+    over = near = 0
+    for estimate in estimates:
+        utilisation = estimate.utilisation()
+        # CloudFormation allows exactly MAX_RESOURCES and MAX_TEMPLATE_BYTES
+        over += utilisation > 1
+        near += args.warn_ratio <= utilisation <= 1
+        if args.json:
+            print(json.dumps(estimate.to_dict()))
+            continue
+        if utilisation > 1:
+            marker = "❌"
+        elif utilisation >= args.warn_ratio:
+            marker = "⚠️ "
+        elif args.all:
+            marker = "✅"
+        else:
+            continue
+        largest = ", ".join(f"{kind} {count}" for kind, count in estimate.largest())
+        print(
+            f"{marker} {estimate.stack} ({estimate.account}, {estimate.region}): "
+            f"{estimate.resources}/{MAX_RESOURCES} resources, "
+            f"{estimate.bytes / 1000:.0f}/{MAX_TEMPLATE_BYTES // 1000} KB"
+            + (f" [{largest}]" if largest else f" [{estimate.template}]" if estimate.template else "")
+        )
+
+    print(
+        f"\nEstimated {len(estimates)} stacks in {elapsed * 1000:.1f} ms: "
+        f"{over} over a limit, {near} within {100 - args.warn_ratio * 100:.0f}% of a limit",
+        file=sys.stderr,
+    )
+    sys.exit(1 if over or problems else 0)
+
+
+if __name__ == "__main__":
+    main()
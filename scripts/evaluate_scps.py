@@ -0,0 +1,585 @@
+#!/usr/bin/env python3
+"""
+Evaluate whether AWS actions are allowed by the service control policies (SCPs)
+attached in organization-config.yaml, and optionally by an IAM permission
+boundary from iam-config.yaml, for each OU/account and region.
+
+All attached policy statements are compiled once:
+
+- Action and NotAction patterns go into wildcard tries, so matching an action
+  against every statement is a single trie walk that returns a bitmask of
+  matching statements.
+- Conditions are evaluated once per region (aws:RequestedRegion) and principal
+  (aws:PrincipalArn), giving per-region bitmasks of applicable Allow and Deny
+  statements for each OU/account level.
+
+A query is then a few integer AND operations, so batches of thousands of
+actions x OUs x regions run in milliseconds. Conditions on keys the engine
+cannot know (e.g. ec2:Encrypted) are reported as CONDITIONAL rather than
+guessed.
+
+SCPs use LZA policy variables (${PARTITION}, ${ACCELERATOR_PREFIX},
+${HOME_REGION}, ${MANAGEMENT_ACCOUNT_ACCESS_ROLE}), which are substituted
+before the policies are compiled. As in AWS Organizations, FullAWSAccess is
+assumed to be attached at every level unless --no-full-aws-access is given.
+
+Usage:
+    python scripts/evaluate_scps.py --actions ec2:CreateVpc s3:PutObject --regions ap-southeast-2 us-west-2
+    python scripts/evaluate_scps.py --actions-file required-actions.txt --ous SomeEnv/Production
+    python scripts/evaluate_scps.py --actions iam:CreateUser --boundary lza-CI-Role-Boundary-Policy
+"""
+
+import argparse
+import functools
+import json
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# Allow running as `python scripts/<name>.py` from the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from preflight_checks.lza_config import (
+    ROOT_OU,
+    account_ous,
+    enabled_regions,
+    load_configs,
+    ou_ancestors,
+)
+from preflight_checks.profiling import profiled, span
+
+DEFAULT_ACCELERATOR_PREFIX = "AWSAccelerator"
+DEFAULT_PRINCIPAL_ARN = "arn:aws:iam::111111111111:role/workload-role"
+FULL_AWS_ACCESS = "FullAWSAccess"
+
+ALLOWED = "ALLOWED"
+DENIED = "DENIED"
+IMPLICIT_DENY = "IMPLICIT_DENY"
+CONDITIONAL = "CONDITIONAL"
+
+# Level keys: ("ou", "SomeEnv/Production"), ("account", "Network") or ("boundary", name)
+Level = Tuple[str, str]
+
+
+@dataclass
+class Statement:
+    """A single compiled policy statement; index is its bit in statement masks."""
+
+    index: int
+    policy: str
+    sid: str
+    effect: str
+    actions: List[str]
+    not_actions: List[str]
+    conditions: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def reference(self) -> str:
+        return f"{self.policy}/{self.sid}" if self.sid else self.policy
+
+
+class Decision(NamedTuple):
+    """Evaluation result for one (action, target, region) query."""
+
+    action: str
+    target: str
+    region: str
+    decision: str
+    statement: Optional[str] = None
+    level: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: value for key, value in self._asdict().items() if value is not None}
+
+
+class _TrieNode:
+    __slots__ = ("children", "mask", "is_star")
+
+    def __init__(self, is_star: bool = False) -> None:
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.mask = 0
+        self.is_star = is_star
+
+
+class ActionTrie:
+    """
+    Trie of IAM action patterns ("ec2:Create*", "s3:?et*", "*").
+
+    Each pattern carries a statement bitmask. match() walks the trie once for
+    a concrete action, following literal, '?' and '*' edges together, and ORs
+    the masks of every pattern that matches. Matching is case-insensitive.
+    """
+
+    def __init__(self) -> None:
+        self._root = _TrieNode()
+        self._cache: Dict[str, int] = {}
+
+    def add(self, pattern: str, mask: int) -> None:
+        node = self._root
+        for char in pattern.lower():
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _TrieNode(is_star=(char == "*"))
+            node = child
+        node.mask |= mask
+        self._cache.clear()
+
+    @staticmethod
+    def _closure(nodes: Iterable[_TrieNode]) -> List[_TrieNode]:
+        # A '*' edge may match the empty string, so follow it without consuming input
+        result: Dict[int, _TrieNode] = {}
+        stack = list(nodes)
+        while stack:
+            node = stack.pop()
+            if id(node) in result:
+                continue
+            result[id(node)] = node
+            star = node.children.get("*")
+            if star is not None:
+                stack.append(star)
+        return list(result.values())
+
+    def match(self, action: str) -> int:
+        """Return the OR of the masks of all patterns matching action."""
+        action = action.lower()
+        cached = self._cache.get(action)
+        if cached is not None:
+            return cached
+        frontier = self._closure([self._root])
+        for char in action:
+            next_nodes = []
+            for node in frontier:
+                if node.is_star:
+                    next_nodes.append(node)
+                child = node.children.get(char)
+                if child is not None:
+                    next_nodes.append(child)
+                any_char = node.children.get("?")
+                if any_char is not None:
+                    next_nodes.append(any_char)
+            if not next_nodes:
+                frontier = []
+                break
+            frontier = self._closure(next_nodes)
+        mask = 0
+        for node in frontier:
+            mask |= node.mask
+        self._cache[action] = mask
+        return mask
+
+
+# --- Conditions ---
+
+_NEGATED_OPERATORS = {
+    "StringNotEquals", "StringNotEqualsIgnoreCase", "StringNotLike", "ArnNotEquals", "ArnNotLike",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _glob_to_regex(pattern: str) -> "re.Pattern":
+    regex = re.escape(pattern).replace(r"\*", ".*").replace(r"\?", ".")
+    return re.compile(f"^{regex}$")
+
+
+def _compare(operator: str, actual: str, expected: str) -> Optional[bool]:
+    if operator in ("StringEquals", "StringNotEquals", "ArnEquals", "ArnNotEquals"):
+        return actual == expected
+    if operator in ("StringEqualsIgnoreCase", "StringNotEqualsIgnoreCase"):
+        return actual.lower() == expected.lower()
+    if operator in ("StringLike", "StringNotLike", "ArnLike", "ArnNotLike"):
+        return bool(_glob_to_regex(expected).match(actual))
+    if operator == "Bool":
+        return actual.lower() == expected.lower()
+    return None
+
+
+def evaluate_conditions(conditions: Dict[str, Any], context: Dict[str, Optional[str]]) -> Optional[bool]:
+    """
+    Evaluate a statement's Condition block against a request context.
+
+    context maps lower-cased condition keys to a value, or to None when the
+    key is known to be absent from the request. Keys missing from context are
+    unknown to the engine.
+
+    Returns True/False, or None if the result depends on unknown keys or
+    unsupported operators.
+    """
+    result: Optional[bool] = True
+    for raw_operator, block in (conditions or {}).items():
+        operator = raw_operator.split(":", 1)[-1]
+        if_exists = operator.endswith("IfExists")
+        if if_exists:
+            operator = operator[: -len("IfExists")]
+        for key, values in (block or {}).items():
+            key = key.lower()
+            values = [str(value) for value in (values if isinstance(values, list) else [values])]
+            if key not in context:
+                outcome: Optional[bool] = None
+            elif operator == "Null":
+                outcome = (context[key] is None) == (values[0].lower() == "true")
+            elif context[key] is None:
+                outcome = if_exists or operator in _NEGATED_OPERATORS
+            else:
+                matches = [_compare(operator, context[key], expected) for expected in values]
+                if None in matches:
+                    outcome = None
+                else:
+                    outcome = any(matches)
+                    if operator in _NEGATED_OPERATORS:
+                        outcome = not outcome
+            if outcome is False:
+                return False
+            if outcome is None:
+                result = None
+    return result
+
+
+# --- Engine ---
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+class PolicyEngine:
+    """Compiled SCPs and permission boundaries answering batch allow/deny queries."""
+
+    def __init__(
+        self,
+        policies: Dict[str, Dict[str, Any]],
+        attachments: Dict[Level, List[str]],
+        account_ou_map: Optional[Dict[str, str]] = None,
+        full_aws_access: bool = True,
+        principal_arn: str = DEFAULT_PRINCIPAL_ARN,
+    ) -> None:
+        """
+        Args:
+            policies: Policy documents by name (SCPs and boundary policies).
+            attachments: Policy names attached to each ("ou", path) / ("account", name) level.
+            account_ou_map: Account name to OU path, to evaluate account targets.
+            full_aws_access: Treat FullAWSAccess as attached at every OU/account level.
+            principal_arn: Value of aws:PrincipalArn for condition evaluation.
+        """
+        self.account_ou_map = account_ou_map or {}
+        self.principal_arn = principal_arn
+        self.statements: List[Statement] = []
+        self._action_trie = ActionTrie()
+        self._not_action_trie = ActionTrie()
+        self._not_action_mask = 0
+        self._policy_masks: Dict[str, int] = {}
+        self._level_masks: Dict[Tuple[Level, str], Tuple[int, int, int, int]] = {}
+        self._condition_cache: Dict[Tuple[int, str], Optional[bool]] = {}
+        self._explain_cache: Dict[Tuple[int, int], Tuple[Any, str, Optional[str]]] = {}
+
+        policies = dict(policies)
+        if full_aws_access:
+            policies.setdefault(FULL_AWS_ACCESS, {
+                "Statement": [{"Sid": "", "Effect": "Allow", "Action": "*", "Resource": "*"}]
+            })
+        for name, document in policies.items():
+            self._policy_masks[name] = self._compile_policy(name, document)
+
+        self.full_aws_access = full_aws_access
+        self.attachments: Dict[Level, List[str]] = {
+            level: list(names) for level, names in attachments.items()
+        }
+
+    def _compile_policy(self, name: str, document: Dict[str, Any]) -> int:
+        statements = document.get("Statement") or []
+        if isinstance(statements, dict):
+            statements = [statements]
+        policy_mask = 0
+        for raw in statements:
+            statement = Statement(
+                index=len(self.statements),
+                policy=name,
+                sid=raw.get("Sid", ""),
+                effect=raw.get("Effect", "Deny"),
+                actions=_as_list(raw.get("Action")),
+                not_actions=_as_list(raw.get("NotAction")),
+                conditions=raw.get("Condition") or {},
+            )
+            bit = 1 << statement.index
+            for pattern in statement.actions:
+                self._action_trie.add(pattern, bit)
+            if statement.not_actions:
+                self._not_action_mask |= bit
+                for pattern in statement.not_actions:
+                    self._not_action_trie.add(pattern, bit)
+            self.statements.append(statement)
+            policy_mask |= bit
+        return policy_mask
+
+    def has_policy(self, name: str) -> bool:
+        return name in self._policy_masks
+
+    def action_mask(self, action: str) -> int:
+        """Bitmask of statements whose Action/NotAction applies to action."""
+        return self._action_trie.match(action) | (
+            self._not_action_mask & ~self._not_action_trie.match(action)
+        )
+
+    def _condition(self, statement: Statement, region: str) -> Optional[bool]:
+        cache_key = (statement.index, region)
+        if cache_key not in self._condition_cache:
+            context = {"aws:requestedregion": region, "aws:principalarn": self.principal_arn}
+            self._condition_cache[cache_key] = evaluate_conditions(statement.conditions, context)
+        return self._condition_cache[cache_key]
+
+    def policies_at(self, level: Level) -> List[str]:
+        """Names of the policies attached at a level, including implicit FullAWSAccess."""
+        names = self.attachments.get(level, [])
+        if self.full_aws_access and level[0] != "boundary" and FULL_AWS_ACCESS not in names:
+            names = names + [FULL_AWS_ACCESS]
+        return names
+
+    def level_masks(self, level: Level, region: str) -> Tuple[int, int, int, int]:
+        """(allow, allow_conditional, deny, deny_conditional) statement masks for a level and region."""
+        cache_key = (level, region)
+        cached = self._level_masks.get(cache_key)
+        if cached is not None:
+            return cached
+        allow = allow_conditional = deny = deny_conditional = 0
+        for policy_name in self.policies_at(level):
+            policy_mask = self._policy_masks.get(policy_name, 0)
+            while policy_mask:
+                low_bit = policy_mask & -policy_mask
+                policy_mask ^= low_bit
+                statement = self.statements[low_bit.bit_length() - 1]
+                outcome = self._condition(statement, region)
+                if outcome is False:
+                    continue
+                if statement.effect == "Allow":
+                    if outcome:
+                        allow |= low_bit
+                    else:
+                        allow_conditional |= low_bit
+                elif outcome:
+                    deny |= low_bit
+                else:
+                    deny_conditional |= low_bit
+        masks = (allow, allow_conditional, deny, deny_conditional)
+        self._level_masks[cache_key] = masks
+        return masks
+
+    def levels_for(self, target: str, boundary: Optional[str] = None) -> List[Level]:
+        """The policy levels that apply to an OU path or account name."""
+        if target in self.account_ou_map:
+            levels = [("ou", ou) for ou in ou_ancestors(self.account_ou_map[target])]
+            levels.append(("account", target))
+        else:
+            levels = [("ou", ou) for ou in ou_ancestors(target)]
+        if boundary:
+            levels.append(("boundary", boundary))
+        return levels
+
+    def _first_statement(self, mask: int) -> Statement:
+        return self.statements[(mask & -mask).bit_length() - 1]
+
+    def evaluate(
+        self,
+        actions: Iterable[str],
+        targets: Iterable[str],
+        regions: Iterable[str],
+        boundary: Optional[str] = None,
+    ) -> Iterator[Decision]:
+        """Yield a Decision for every (action, target, region) combination."""
+        if boundary:
+            self.attachments.setdefault(("boundary", boundary), [boundary])
+        actions = list(actions)
+        action_masks = [(action, self.action_mask(action)) for action in actions]
+        for target in targets:
+            levels = self.levels_for(target, boundary)
+            for region in regions:
+                per_level = [(level, self.level_masks(level, region)) for level in levels]
+                allows = [masks[0] for _, masks in per_level]
+                deny = deny_conditional = 0
+                for _, masks in per_level:
+                    deny |= masks[2]
+                    deny_conditional |= masks[3]
+                any_deny = deny | deny_conditional
+                for action, mask in action_masks:
+                    # Fast path: no deny applies and every level allows
+                    if not mask & any_deny and all(mask & allow for allow in allows):
+                        yield Decision(action, target, region, ALLOWED)
+                    else:
+                        yield self._decide(action, mask, target, region, per_level, deny, deny_conditional)
+
+    def _decide(self, action, mask, target, region, per_level, deny, deny_conditional) -> Decision:
+        hit = mask & deny
+        if hit:
+            statement, level = self._explain(hit, per_level)
+            return Decision(action, target, region, DENIED, statement, level)
+        for level, (allow, allow_conditional, _, _) in per_level:
+            if not mask & allow:
+                hit = mask & allow_conditional
+                if hit:
+                    return Decision(action, target, region, CONDITIONAL,
+                                    self._first_statement(hit).reference, ":".join(level))
+                return Decision(action, target, region, IMPLICIT_DENY, None, ":".join(level))
+        hit = mask & deny_conditional
+        if hit:
+            statement, level = self._explain(hit, per_level)
+            return Decision(action, target, region, CONDITIONAL, statement, level)
+        return Decision(action, target, region, ALLOWED)
+
+    def _explain(self, hit: int, per_level) -> Tuple[str, Optional[str]]:
+        """The first statement in hit and the level it is attached at (memoized)."""
+        low_bit = hit & -hit
+        cache_key = (low_bit, id(per_level))
+        cached = self._explain_cache.get(cache_key)
+        if cached is None or cached[0] is not per_level:
+            statement = self._first_statement(low_bit)
+            cached = (per_level, statement.reference, self._level_of(statement, per_level))
+            self._explain_cache[cache_key] = cached
+        return cached[1], cached[2]
+
+    def _level_of(self, statement: Statement, per_level) -> Optional[str]:
+        for level, _ in per_level:
+            if statement.policy in self.policies_at(level):
+                return ":".join(level)
+        return None
+
+
+# --- Loading from config ---
+
+def substitute_policy_variables(text: str, variables: Dict[str, str]) -> str:
+    """Replace LZA policy variables such as ${HOME_REGION}; other ${...} are left as is."""
+    return re.sub(r"\$\{([A-Z_]+)\}", lambda m: variables.get(m.group(1), m.group(0)), text)
+
+
+def build_engine(
+    config_dir: Path,
+    accelerator_prefix: str = DEFAULT_ACCELERATOR_PREFIX,
+    full_aws_access: bool = True,
+    principal_arn: str = DEFAULT_PRINCIPAL_ARN,
+) -> Tuple[PolicyEngine, List[str], List[str]]:
+    """
+    Build a PolicyEngine from organization-config.yaml and iam-config.yaml.
+
+    Returns:
+        (engine, organizational unit paths, enabled regions)
+    """
+    configs = load_configs(config_dir, [
+        "organization-config.yaml", "accounts-config.yaml", "global-config.yaml", "iam-config.yaml",
+    ])
+    organization = configs["organization-config.yaml"] or {}
+    global_config = configs["global-config.yaml"] or {}
+    iam = configs["iam-config.yaml"] or {}
+    variables = {
+        "PARTITION": "aws",
+        "ACCELERATOR_PREFIX": accelerator_prefix,
+        "HOME_REGION": str(global_config.get("homeRegion", "")),
+        "MANAGEMENT_ACCOUNT_ACCESS_ROLE": str(global_config.get("managementAccountAccessRole", "")),
+    }
+
+    def _load_policy(relative_path: str) -> Optional[Dict[str, Any]]:
+        path = Path(config_dir) / relative_path
+        if not path.exists():
+            print(f"⚠️ policy file {path} not found, skipping", file=sys.stderr)
+            return None
+        return json.loads(substitute_policy_variables(path.read_text(encoding="utf-8"), variables))
+
+    policies: Dict[str, Dict[str, Any]] = {}
+    attachments: Dict[Level, List[str]] = {}
+    for scp in organization.get("serviceControlPolicies") or []:
+        document = _load_policy(scp["policy"])
+        if document is None:
+            continue
+        policies[scp["name"]] = document
+        targets = scp.get("deploymentTargets") or {}
+        for ou in targets.get("organizationalUnits") or []:
+            attachments.setdefault(("ou", ou), []).append(scp["name"])
+        for account in targets.get("accounts") or []:
+            attachments.setdefault(("account", account), []).append(scp["name"])
+
+    for policy_set in iam.get("policySets") or []:
+        for policy in policy_set.get("policies") or []:
+            document = _load_policy(policy["policy"])
+            if document is not None:
+                policies[policy["name"]] = document
+
+    ous = [
+        ou["name"] for ou in organization.get("organizationalUnits") or []
+        if not ou.get("ignore")
+    ]
+    engine = PolicyEngine(
+        policies,
+        attachments,
+        account_ous(configs["accounts-config.yaml"]),
+        full_aws_access=full_aws_access,
+        principal_arn=principal_arn,
+    )
+    return engine, ous, enabled_regions(global_config)
+
+
+def _read_actions(args) -> List[str]:
+    actions = list(args.actions or [])
+    if args.actions_file:
+        for line in Path(args.actions_file).read_text(encoding="utf-8").splitlines():
+            line = line.split("#", 1)[0].strip()
+            if line:
+                actions.append(line)
+    return actions
+
+
+@profiled("evaluate_scps")
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Evaluate SCPs and permission boundaries for actions, OUs and regions")
+    parser.add_argument("--config-dir", default="config", help="Directory containing configuration files")
+    parser.add_argument("--actions", nargs="+", help="Actions to evaluate (e.g. ec2:CreateVpc)")
+    parser.add_argument("--actions-file", help="File with one action per line")
+    parser.add_argument("--ous", nargs="+", help="OU paths or account names (default: all OUs in organization-config.yaml)")
+    parser.add_argument("--regions", nargs="+", help="Regions (default: enabled regions in global-config.yaml)")
+    parser.add_argument("--boundary", help="Also evaluate this permission boundary policy from iam-config.yaml")
+    parser.add_argument("--principal-arn", default=DEFAULT_PRINCIPAL_ARN, help="Value of aws:PrincipalArn")
+    parser.add_argument("--accelerator-prefix", default=DEFAULT_ACCELERATOR_PREFIX,
+                        help="Value of ${ACCELERATOR_PREFIX} in the policies")
+    parser.add_argument("--no-full-aws-access", action="store_true",
+                        help="Do not assume FullAWSAccess is attached at every level")
+    parser.add_argument("--show-allowed", action="store_true", help="Also print allowed combinations")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write a cProfile dump and Chrome trace of the run (same as LZA_PROFILE=1)")
+    args = parser.parse_args()
+
+    actions = _read_actions(args)
+    if not actions:
+        parser.error("no actions given; use --actions or --actions-file")
+
+    with span("compile", cat="engine"):
+        engine, ous, regions = build_engine(
+            Path(args.config_dir), args.accelerator_prefix, not args.no_full_aws_access, args.principal_arn
+        )
+    if args.boundary and not engine.has_policy(args.boundary):
+        parser.error(f"boundary policy '{args.boundary}' not found in iam-config.yaml")
+    targets = args.ous or ous
+    regions = args.regions or regions
+
+    start = time.perf_counter()
+    with span("evaluate", cat="engine", queries=len(actions) * len(targets) * len(regions)):
+        decisions = list(engine.evaluate(actions, targets, regions, args.boundary))
+    elapsed = time.perf_counter() - start
+
+    counts: Dict[str, int] = {}
+    for decision in decisions:
+        counts[decision.decision] = counts.get(decision.decision, 0) + 1
+        if decision.decision == ALLOWED and not args.show_allowed:
+            continue
+        if args.json:
+            print(json.dumps(decision.to_dict()))
+        else:
+            detail = f" by {decision.statement}" if decision.statement else ""
+            where = f" at {decision.level}" if decision.level else ""
+            print(f"{decision.decision:<13} {decision.action:<40} {decision.target:<30} {decision.region}{detail}{where}")
+
+    summary = ", ".join(f"{count} {name.lower()}" for name, count in sorted(counts.items()))
+    print(f"\nEvaluated {len(decisions)} queries in {elapsed * 1000:.1f} ms: {summary}", file=sys.stderr)
+    sys.exit(1 if counts.get(DENIED) or counts.get(IMPLICIT_DENY) else 0)
+
+
+if __name__ == "__main__":
+    main()
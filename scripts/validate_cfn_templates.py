@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Check the CloudFormation templates under config/customizations/ without
+deploying them.
+
+Templates are parsed with a loader that understands the short-form intrinsic
+function tags (``!Ref``, ``!Sub``, ``!GetAtt`` and the rest), which
+yaml.safe_load rejects, and are checked for:
+
+- resource types, property names and required properties (including nested
+  property types), against the CloudFormation resource specification
+- Ref, Fn::GetAtt, Fn::Sub, DependsOn and Condition references to parameters,
+  resources, attributes and conditions that do not exist
+- the ``parameters`` customizations-config.yaml passes to each stack and
+  StackSet: every name must be a template parameter, and every template
+  parameter without a Default must be passed
+
+The resource specification (CloudFormationResourceSpecification.json, about
+10 MB) is downloaded once with --update-spec and cached. The first run after a
+download reduces it to an index of property names, required flags, nested
+types and attributes, which is cached next to it, so later runs load a small
+file and check dozens of templates in well under a second without network
+access. Without a cached specification only the reference and parameter checks
+run.
+
+Usage:
+    python scripts/validate_cfn_templates.py [--config-dir config]
+    python scripts/validate_cfn_templates.py --update-spec
+    python scripts/validate_cfn_templates.py path/to/template.yaml --spec-file CloudFormationResourceSpecification.json
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import yaml
+
+# Allow running as `python scripts/<name>.py` from the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from preflight_checks.diagnostics import SHORT_FORM_TAGS, Diagnostic, load_template, locate
+from preflight_checks.lza_config import load_replacements, render
+from preflight_checks.profiling import profiled, span
+
+CUSTOMIZATIONS_CONFIG_FILE_NAME = "customizations-config.yaml"
+CUSTOMIZATIONS_DIR = "customizations"
+SPEC_URL = "https://d1uauaxba7bl26.cloudfront.net/latest/gzip/CloudFormationResourceSpecification.json"
+SPEC_FILE_NAME = "CloudFormationResourceSpecification.json"
+SPEC_CACHE_ENV_VAR = "CFN_SPEC_CACHE_DIR"
+# Bump when the index layout changes, so stale indexes are rebuilt
+INDEX_FORMAT = 1
+
+TEMPLATE_SECTIONS = {
+    "AWSTemplateFormatVersion", "Description", "Metadata", "Parameters", "Rules", "Mappings",
+    "Conditions", "Transform", "Resources", "Outputs",
+}
+PSEUDO_PARAMETERS = {
+    "AWS::AccountId", "AWS::NotificationARNs", "AWS::NoValue", "AWS::Partition",
+    "AWS::Region", "AWS::StackId", "AWS::StackName", "AWS::URLSuffix",
+}
+# Custom resources accept any properties and attributes
+CUSTOM_RESOURCE_TYPES = ("Custom::", "AWS::CloudFormation::CustomResource")
+INTRINSIC_FUNCTIONS = {"Ref", "Condition"} | {f"Fn::{name}" for name in SHORT_FORM_TAGS}
+RE_SUB_VARIABLE = re.compile(r"\$\{([^!}][^}]*)\}")
+
+
+# --- Resource specification index ---
+
+def default_spec_path() -> Path:
+    cache_dir = os.environ.get(SPEC_CACHE_ENV_VAR) or os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "lza-config"
+    )
+    return Path(cache_dir) / SPEC_FILE_NAME
+
+
+def download_spec(path: Path, url: str = SPEC_URL) -> None:
+    """Downloads the resource specification to path."""
+    import requests
+
+    with span("download_spec", cat="network"):
+        response = requests.get(url, timeout=60)
+    response.raise_for_status()
+    content = response.content
+    if content[:2] == b"\x1f\x8b":
+        content = gzip.decompress(content)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + ".download")
+    partial.write_bytes(content)
+    os.replace(partial, path)
+
+
+def _index_properties(properties: Dict[str, Any], prefix: str, property_types: Dict[str, Any]) -> Dict[str, list]:
+    """Property name -> [required, nested property type or None, "List", "Map" or None]."""
+    indexed = {}
+    for name, spec in (properties or {}).items():
+        container = spec.get("Type") if spec.get("Type") in ("List", "Map") else None
+        nested = spec.get("ItemType") if container else spec.get("Type")
+        if nested:
+            nested = f"{prefix}.{nested}" if f"{prefix}.{nested}" in property_types else nested
+        indexed[name] = [bool(spec.get("Required")), nested, container]
+    return indexed
+
+
+def build_index(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduces the resource specification to what the checks need."""
+    property_types = spec.get("PropertyTypes") or {}
+    return {
+        "format": INDEX_FORMAT,
+        "version": spec.get("ResourceSpecificationVersion"),
+        "resources": {
+            name: {
+                "properties": _index_properties(resource.get("Properties"), name, property_types),
+                "attributes": sorted(resource.get("Attributes") or {}),
+            }
+            for name, resource in (spec.get("ResourceTypes") or {}).items()
+        },
+        "property_types": {
+            name: _index_properties(property_type.get("Properties"), name.split(".")[0], property_types)
+            for name, property_type in property_types.items()
+        },
+    }
+
+
+class SpecIndex:
+    """Resource types, properties and attributes from the indexed specification."""
+
+    def __init__(self, index: Dict[str, Any]) -> None:
+        self.version = index.get("version")
+        self.resources: Dict[str, Any] = index["resources"]
+        self.property_types: Dict[str, Any] = index["property_types"]
+
+    @classmethod
+    def load(cls, spec_path: Path) -> Optional["SpecIndex"]:
+        """
+        Loads the index for spec_path, building and caching it if the
+        specification changed. Returns None if there is no specification.
+        """
+        if not spec_path.exists():
+            return None
+        stat = spec_path.stat()
+        source = [stat.st_size, stat.st_mtime_ns]
+        index_path = spec_path.with_name(spec_path.stem + ".index.json")
+        if index_path.exists():
+            with span("load_spec_index", cat="spec"):
+                index = json.loads(index_path.read_text(encoding="utf-8"))
+            if index.get("format") == INDEX_FORMAT and index.get("source") == source:
+                return cls(index)
+        with span("build_spec_index", cat="spec"):
+            index = build_index(json.loads(spec_path.read_text(encoding="utf-8")))
+        index["source"] = source
+        try:
+            index_path.write_text(json.dumps(index, separators=(",", ":")), encoding="utf-8")
+        except OSError:
+            pass
+        return cls(index)
+
+
+# --- Checks ---
+
+@dataclass
+class TemplateReport:
+    """Diagnostics for one template."""
+
+    path: Path
+    parameters: Dict[str, Any] = field(default_factory=dict)
+    diagnostics: List[Diagnostic] = field(default_factory=list)
+    parsed: bool = False
+
+
+def _is_intrinsic(value: Any) -> bool:
+    return isinstance(value, dict) and len(value) == 1 and next(iter(value)) in INTRINSIC_FUNCTIONS
+
+
+def _iter_intrinsics(value: Any, path: Tuple[Any, ...]) -> Iterator[Tuple[str, Any, Tuple[Any, ...]]]:
+    """Yields (function, argument, path) for every intrinsic function in value."""
+    if isinstance(value, dict):
+        if _is_intrinsic(value):
+            function, argument = next(iter(value.items()))
+            yield function, argument, path
+        for key, item in value.items():
+            yield from _iter_intrinsics(item, path + (key,))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            yield from _iter_intrinsics(item, path + (index,))
+
+
+class TemplateChecker:
+    """Checks templates against the specification index (if any) and themselves."""
+
+    def __init__(self, spec: Optional[SpecIndex]) -> None:
+        self.spec = spec
+
+    def check(self, path: Path, display_path: Optional[str] = None) -> TemplateReport:
+        report = TemplateReport(path)
+        display_path = display_path or str(path)
+        node = None
+
+        def add(location: Tuple[Any, ...], message: str) -> None:
+            line, column = locate(node, location)
+            report.diagnostics.append(Diagnostic(display_path, line, column, "error", message))
+
+        try:
+            with span("parse", cat="template", file=path.name):
+                template, node = load_template(path.read_text(encoding="utf-8"))
+        except OSError as e:
+            report.diagnostics.append(Diagnostic(display_path, 1, 1, "error", f"cannot read template: {e}"))
+            return report
+        except yaml.YAMLError as e:
+            mark = getattr(e, "problem_mark", None)
+            line, column = (mark.line + 1, mark.column + 1) if mark else (1, 1)
+            problem = getattr(e, "problem", None) or e
+            report.diagnostics.append(Diagnostic(display_path, line, column, "error", f"YAML: {problem}"))
+            return report
+        if not isinstance(template, dict):
+            add((), "template is not a mapping")
+            return report
+        report.parsed = True
+
+        with span("check", cat="template", file=path.name):
+            self._check_template(template, report, add)
+        return report
+
+    def _check_template(self, template: Dict[str, Any], report: TemplateReport, add) -> None:
+        for section in template:
+            if section not in TEMPLATE_SECTIONS:
+                add((section,), f"unknown template section '{section}'")
+        parameters = template.get("Parameters") or {}
+        report.parameters = parameters
+        resources = template.get("Resources") or {}
+        conditions = template.get("Conditions") or {}
+        if not resources:
+            add(("Resources",) if "Resources" in template else (), "template has no Resources")
+
+        for name, resource in resources.items():
+            location = ("Resources", name)
+            if not isinstance(resource, dict) or "Type" not in resource:
+                add(location, f"resource '{name}' has no Type")
+                continue
+            depends_on = resource.get("DependsOn") or []
+            for target in [depends_on] if isinstance(depends_on, str) else depends_on:
+                if target not in resources:
+                    add(location + ("DependsOn",), f"resource '{name}' depends on unknown resource '{target}'")
+            if resource.get("Condition") and resource["Condition"] not in conditions:
+                add(location + ("Condition",), f"resource '{name}' uses unknown condition '{resource['Condition']}'")
+            self._check_resource(name, resource, location, add)
+
+        for function, argument, location in _iter_intrinsics(template, ()):
+            self._check_reference(function, argument, location, parameters, resources, conditions, add)
+
+    def _check_resource(self, name: str, resource: Dict[str, Any], location, add) -> None:
+        resource_type = resource["Type"]
+        if self.spec is None or not isinstance(resource_type, str) or resource_type.startswith(CUSTOM_RESOURCE_TYPES):
+            return
+        spec = self.spec.resources.get(resource_type)
+        if spec is None:
+            add(location + ("Type",), f"resource '{name}' has unknown type '{resource_type}'")
+            return
+        properties = resource.get("Properties") or {}
+        if not _is_intrinsic(properties):
+            self._check_properties(properties, spec["properties"], location + ("Properties",), name, add)
+
+    def _check_properties(self, properties: Any, spec: Dict[str, list], location, name: str, add) -> None:
+        if not isinstance(properties, dict) or _is_intrinsic(properties):
+            return
+        for property_name, value in properties.items():
+            if property_name not in spec:
+                add(location + (property_name,), f"resource '{name}' has unknown property '{property_name}'")
+                continue
+            _required, nested, container = spec[property_name]
+            nested_spec = self.spec.property_types.get(nested) if nested else None
+            if nested_spec is None or _is_intrinsic(value):
+                continue
+            if container == "List" and isinstance(value, list):
+                items = list(enumerate(value))
+            elif container == "Map" and isinstance(value, dict):
+                items = list(value.items())
+            else:
+                items = [(None, value)]
+            for key, item in items:
+                item_location = location + (property_name,) + (() if key is None else (key,))
+                self._check_properties(item, nested_spec, item_location, name, add)
+        for property_name, (required, _nested, _container) in spec.items():
+            if required and property_name not in properties:
+                add(location, f"resource '{name}' is missing required property '{property_name}'")
+
+    def _check_reference(self, function, argument, location, parameters, resources, conditions, add) -> None:
+        if function == "Ref" and isinstance(argument, str):
+            if argument not in parameters and argument not in resources and argument not in PSEUDO_PARAMETERS:
+                add(location, f"Ref to unknown parameter or resource '{argument}'")
+        elif function == "Fn::GetAtt":
+            if isinstance(argument, str):
+                argument = argument.split(".", 1)
+            if isinstance(argument, list) and len(argument) == 2 and all(isinstance(part, str) for part in argument):
+                self._check_attribute(argument[0], argument[1], location, resources, add)
+            elif not (isinstance(argument, list) and len(argument) == 2):
+                add(location, "Fn::GetAtt needs [resource, attribute]")
+        elif function == "Fn::Sub":
+            # "text" or [text, {variable: value}]
+            if isinstance(argument, list) and len(argument) == 2:
+                text, variables = argument
+            else:
+                text, variables = argument, {}
+            if not isinstance(text, str) or not isinstance(variables, dict):
+                return
+            for variable in RE_SUB_VARIABLE.findall(text):
+                if variable in variables or variable in PSEUDO_PARAMETERS:
+                    continue
+                target, _, attribute = variable.partition(".")
+                if attribute and target in resources:
+                    self._check_attribute(target, attribute, location, resources, add)
+                elif attribute or (target not in parameters and target not in resources):
+                    add(location, f"Fn::Sub references unknown parameter or resource '{variable}'")
+        elif function == "Condition" and isinstance(argument, str) and argument not in conditions:
+            add(location, f"unknown condition '{argument}'")
+        elif function == "Fn::If" and isinstance(argument, list) and argument and isinstance(argument[0], str):
+            if argument[0] not in conditions:
+                add(location, f"Fn::If uses unknown condition '{argument[0]}'")
+
+    def _check_attribute(self, target: str, attribute: str, location, resources, add) -> None:
+        resource = resources.get(target)
+        if not isinstance(resource, dict):
+            add(location, f"Fn::GetAtt references unknown resource '{target}'")
+            return
+        resource_type = resource.get("Type")
+        if self.spec is None or not isinstance(resource_type, str) or resource_type.startswith(CUSTOM_RESOURCE_TYPES):
+            return
+        spec = self.spec.resources.get(resource_type)
+        if spec is None:
+            return
+        if resource_type == "AWS::CloudFormation::Stack" and attribute.startswith("Outputs."):
+            return
+        if attribute not in spec["attributes"]:
+            add(location, f"'{resource_type}' has no attribute '{attribute}'")
+
+
+def check_customization_parameters(
+    config_dir: Path, reports: Dict[Path, TemplateReport], checker: TemplateChecker
+) -> List[Diagnostic]:
+    """
+    Checks the parameters customizations-config.yaml passes to each stack and
+    StackSet against the template's Parameters, checking templates not in
+    reports first.
+    """
+    path = config_dir / CUSTOMIZATIONS_CONFIG_FILE_NAME
+    if not path.exists():
+        return []
+    text = render(path.read_text(encoding="utf-8"), load_replacements(config_dir))
+    config, node = load_template(text)
+    customizations = (config or {}).get("customizations") or {}
+    diagnostics: List[Diagnostic] = []
+
+    def add(location: Tuple[Any, ...], message: str) -> None:
+        line, column = locate(node, location)
+        diagnostics.append(Diagnostic(str(path), line, column, "error", message))
+
+    for section in ("cloudFormationStacks", "cloudFormationStackSets"):
+        for index, entry in enumerate(customizations.get(section) or []):
+            location = ("customizations", section, index)
+            name = entry.get("name")
+            template_path = (config_dir / entry.get("template", "")).resolve()
+            if not entry.get("template") or not template_path.is_file():
+                add(location + ("template",), f"{name}: template '{entry.get('template')}' does not exist")
+                continue
+            if template_path not in reports:
+                reports[template_path] = checker.check(template_path)
+            report = reports[template_path]
+            if not report.parsed:
+                continue
+            passed = {}
+            for parameter_index, parameter in enumerate(entry.get("parameters") or []):
+                passed[parameter.get("name")] = parameter_index
+            for parameter_name, parameter_index in passed.items():
+                if parameter_name not in report.parameters:
+                    add(location + ("parameters", parameter_index),
+                        f"{name}: parameter '{parameter_name}' is not declared in {entry['template']}")
+            for parameter_name, declaration in report.parameters.items():
+                if parameter_name not in passed and "Default" not in (declaration or {}):
+                    add(location, f"{name}: {entry['template']} parameter '{parameter_name}' has no Default and is not passed")
+    return diagnostics
+
+
+def find_templates(config_dir: Path) -> List[Path]:
+    directory = config_dir / CUSTOMIZATIONS_DIR
+    if not directory.is_dir():
+        return []
+    return sorted(
+        path.resolve() for path in directory.rglob("*")
+        if path.suffix in (".yaml", ".yml", ".json", ".template") and path.is_file()
+    )
+
+
+@profiled("validate_cfn_templates")
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check CloudFormation templates in config/customizations")
+    parser.add_argument("paths", nargs="*", type=Path,
+                        help=f"Templates to check (default: config/{CUSTOMIZATIONS_DIR}/ and the customizations-config.yaml parameters)")
+    parser.add_argument("--config-dir", default="config", type=Path, help="Directory containing configuration files")
+    parser.add_argument("--spec-file", type=Path,
+                        help=f"CloudFormation resource specification (default: cached {SPEC_FILE_NAME})")
+    parser.add_argument("--update-spec", action="store_true", help="Download the resource specification before checking")
+    parser.add_argument("--spec-url", default=SPEC_URL, help="Where --update-spec downloads the specification from")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write a cProfile dump and Chrome trace of the run (same as LZA_PROFILE=1)")
+    args = parser.parse_args()
+
+    spec_path = args.spec_file or default_spec_path()
+    if args.update_spec:
+        print(f"Downloading {args.spec_url} to {spec_path}", file=sys.stderr)
+        download_spec(spec_path, args.spec_url)
+
+    start = time.perf_counter()
+    spec = SpecIndex.load(spec_path)
+    if spec is None:
+        print(f"⚠️ No resource specification at {spec_path}; run with --update-spec to check types and properties",
+              file=sys.stderr)
+    checker = TemplateChecker(spec)
+
+    reports: Dict[Path, TemplateReport] = {}
+    for path in [path.resolve() for path in args.paths] or find_templates(args.config_dir):
+        reports[path] = checker.check(path)
+    parameter_diagnostics = [] if args.paths else check_customization_parameters(args.config_dir, reports, checker)
+    diagnostics = [diagnostic for report in reports.values() for diagnostic in report.diagnostics]
+    diagnostics += parameter_diagnostics
+
+    for diagnostic in diagnostics:
+        print(diagnostic.format())
+    spec_version = f"specification {spec.version}" if spec else "no specification"
+    print(f"Checked {len(reports)} templates ({spec_version}) in {(time.perf_counter() - start) * 1000:.0f} ms: "
+          f"{len(diagnostics)} error(s)", file=sys.stderr)
+    sys.exit(1 if diagnostics else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+"""
+Validate and deduplicate the DNS Firewall domain lists under
+config/dns-firewall-domain-lists/.
+
+Each list is streamed through a memory-mapped file, so multi-gigabyte threat
+intelligence lists are never read into memory. Entries are normalised
+(lower-cased, trailing dot removed, IDNs converted to punycode) and written to
+temporary shard files (under TMPDIR), chosen by a hash of the last two labels,
+so every entry lands in the same shard as its duplicates and as any wildcard
+of two or more labels that covers it. Each shard is then loaded into a suffix
+trie keyed by reversed labels ("www.example.com" is stored as com -> example
+-> www) on its own, which finds:
+
+- duplicate entries (same node inserted twice), and
+- entries already covered by a wildcard parent: "*.example.com" matches
+  "www.example.com" and "*.cdn.example.com" (but not "example.com" itself).
+
+Single-label wildcards such as "*.com" can cover entries in any shard, so they
+are kept in memory and added to every shard's trie. Memory is bounded by the
+largest shard: about SHARD_BYTES of the list, or 1/MAX_SHARDS of it for lists
+over 4 GiB. A list dominated by the subdomains of one domain still puts them
+all in one shard.
+
+Each entry is checked against the Route 53 Resolver DNS Firewall domain
+syntax (labels of letters, digits, '-' and '_', at most 63 characters each,
+at most 255 characters in total, '*' only as the whole leftmost label) and
+each list against the per-list domain limit.
+
+Files referenced by customDomainList in network-config.yaml that do not exist
+are reported as errors.
+
+With --write-compacted, each valid list is rewritten in place in its original
+order without duplicates and covered entries. Entries are written in their
+normalised form (lower case, no trailing dot, IDNs as punycode); comment lines,
+blank lines and trailing comments are kept.
+
+Usage:
+    python scripts/validate_domain_lists.py [--config-dir config] [--max-domains 100000]
+    python scripts/validate_domain_lists.py --write-compacted
+    python scripts/validate_domain_lists.py path/to/threat-intel.txt
+"""
+
+import argparse
+import contextlib
+import heapq
+import mmap
+import os
+import re
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Allow running as `python scripts/<name>.py` from the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from preflight_checks.lza_config import load_config
+from preflight_checks.profiling import profiled, span
+
+DOMAIN_LISTS_DIR = "dns-firewall-domain-lists"
+NETWORK_CONFIG_FILE_NAME = "network-config.yaml"
+
+# Route 53 Resolver DNS Firewall limits
+MAX_DOMAIN_LENGTH = 255
+MAX_LABEL_LENGTH = 63
+DEFAULT_MAX_DOMAINS = 100_000
+
+# Issues printed per file; the rest are only counted
+DEFAULT_MAX_REPORTS = 20
+
+# List bytes per shard file, and the most shard files per list (open at once)
+SHARD_BYTES = 16 * 1024 * 1024
+MAX_SHARDS = 256
+
+# Fast path for already-normalised ASCII entries; anything else goes through
+# _check_domain for a precise error message.
+_LABEL = rb"[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9_])?"
+RE_VALID_DOMAIN = re.compile(rb"(?:\*\.)?(?:" + _LABEL + rb"\.)*" + _LABEL)
+RE_VALID_LABEL = re.compile(r"[a-z0-9_](?:[a-z0-9_-]*[a-z0-9_])?")
+
+# Trie entry flags. Leaf entries are stored as a bare int; an entry that also
+# has children becomes a dict with its flags under the "" key (labels are
+# never empty).
+EXACT = 1
+WILDCARD = 2
+EMITTED_EXACT = 4
+EMITTED_WILDCARD = 8
+_FLAGS = ""
+
+
+@dataclass
+class Issue:
+    """A problem with one line of a domain list."""
+
+    line: int
+    severity: str
+    message: str
+
+
+@dataclass
+class DomainListReport:
+    """Validation result for one domain list."""
+
+    path: Path
+    lines: int = 0
+    entries: int = 0
+    unique: int = 0
+    duplicates: int = 0
+    covered: int = 0
+    invalid: int = 0
+    issues: List[Issue] = field(default_factory=list)
+    errors: int = 0
+    suppressed: int = 0
+    compacted: bool = False
+
+    @property
+    def remaining(self) -> int:
+        """Entries left after removing duplicates and wildcard-covered entries."""
+        return self.unique - self.covered
+
+    @property
+    def has_errors(self) -> bool:
+        return self.errors > 0
+
+    def add_issue(self, line: int, severity: str, message: str, max_reports: int) -> None:
+        if severity == "error":
+            self.errors += 1
+        if len(self.issues) < max_reports:
+            self.issues.append(Issue(line, severity, message))
+        else:
+            self.suppressed += 1
+
+
+def normalise_domain(raw: bytes) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Normalise one line of a domain list.
+
+    Returns:
+        (domain, None) for a valid entry, (None, error) for an invalid one and
+        (None, None) for blank lines and comments.
+    """
+    if b"#" in raw:
+        raw = raw.split(b"#", 1)[0]
+    entry = raw.strip().lower()
+    if not entry:
+        return None, None
+    if entry.endswith(b"."):
+        entry = entry[:-1]
+    if RE_VALID_DOMAIN.fullmatch(entry) and len(entry) <= MAX_DOMAIN_LENGTH:
+        return entry.decode("ascii"), None
+    return _check_domain(entry)
+
+
+def _check_domain(entry: bytes) -> Tuple[Optional[str], Optional[str]]:
+    """Slow path: convert IDNs and explain why an entry is invalid."""
+    try:
+        text = entry.decode("utf-8")
+    except UnicodeDecodeError:
+        return None, "entry is not valid UTF-8"
+    if any(char.isspace() for char in text):
+        return None, f"'{text}' contains whitespace"
+    labels = text.split(".")
+    if "*" in labels[1:] or any("*" in label and label != "*" for label in labels):
+        return None, f"'{text}': '*' is only allowed as the whole leftmost label"
+    converted = labels[:1] if labels[0] == "*" else []
+    for label in labels[len(converted):]:
+        if not label:
+            return None, f"'{text}' contains an empty label"
+        if not label.isascii():
+            try:
+                label = label.encode("idna").decode("ascii")
+            except UnicodeError as e:
+                return None, f"'{text}' is not a valid internationalised domain name: {e}"
+        if len(label) > MAX_LABEL_LENGTH:
+            return None, f"'{text}': label '{label[:20]}...' is longer than {MAX_LABEL_LENGTH} characters"
+        if not RE_VALID_LABEL.fullmatch(label):
+            return None, f"'{text}': label '{label}' may only contain letters, digits, '-' and '_', and may not start or end with '-'"
+        converted.append(label)
+    if converted == ["*"]:
+        return None, "'*' on its own is not a valid domain"
+    domain = ".".join(converted)
+    if len(domain) > MAX_DOMAIN_LENGTH:
+        return None, f"'{domain[:40]}...' is longer than {MAX_DOMAIN_LENGTH} characters"
+    return domain, None
+
+
+class DomainTrie:
+    """
+    Suffix trie of domain names keyed by reversed labels.
+
+    Nodes are plain dicts mapping a label to a child. Most entries are leaves,
+    so a leaf is stored as its int flags and only turned into a dict when a
+    longer name is added below it. Labels are interned so the many repeats of
+    "com", "net" etc. share one string.
+    """
+
+    def __init__(self) -> None:
+        self.root: Dict[str, Any] = {}
+
+    @staticmethod
+    def _split(domain: str) -> Tuple[List[str], int]:
+        labels = domain.split(".")
+        if labels[0] == "*":
+            return labels[:0:-1], WILDCARD
+        return labels[::-1], EXACT
+
+    def add(self, domain: str) -> bool:
+        """Insert domain; returns False if it was already present."""
+        labels = domain.split(".")
+        if labels[0] == "*":
+            del labels[0]
+            flag = WILDCARD
+        else:
+            flag = EXACT
+        labels.reverse()
+        node = self.root
+        intern = sys.intern
+        for label in labels[:-1]:
+            child = node.get(label)
+            if child is None:
+                child = node[intern(label)] = {}
+            elif child.__class__ is int:
+                child = node[label] = {_FLAGS: child}
+            node = child
+        last = labels[-1]
+        entry = node.get(last)
+        if entry is None:
+            node[intern(last)] = flag
+            return True
+        if entry.__class__ is dict:
+            flags = entry.get(_FLAGS, 0)
+            if flags & flag:
+                return False
+            entry[_FLAGS] = flags | flag
+            return True
+        if entry & flag:
+            return False
+        node[last] = entry | flag
+        return True
+
+    def mark(self, domain: str, emitted: int) -> Tuple[bool, bool]:
+        """
+        Set an EMITTED_* flag on domain, which must already be in the trie.
+
+        Returns:
+            (first, covered): first is False if the flag was already set, and
+            covered is True if a wildcard on a strict ancestor matches domain.
+        """
+        labels, _ = self._split(domain)
+        node = self.root
+        covered = False
+        for label in labels[:-1]:
+            if node.get(_FLAGS, 0) & WILDCARD:
+                covered = True
+            node = node[label]
+        if node.get(_FLAGS, 0) & WILDCARD:
+            covered = True
+        last = labels[-1]
+        entry = node[last]
+        if entry.__class__ is dict:
+            flags = entry[_FLAGS]
+            entry[_FLAGS] = flags | emitted
+        else:
+            flags = entry
+            node[last] = entry | emitted
+        return not flags & emitted, covered
+
+
+def _iter_lines(mapped: "mmap.mmap") -> Iterator[Tuple[int, bytes]]:
+    """Yield (line number, line) from a memory-mapped file."""
+    mapped.seek(0)
+    for number, line in enumerate(iter(mapped.readline, b""), start=1):
+        yield number, line
+
+
+def _open_mapped(path: Path):
+    """Memory-map path read-only; returns None for empty files (which cannot be mapped)."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def validate_domain_list(
+    path: Path,
+    max_domains: int = DEFAULT_MAX_DOMAINS,
+    write_compacted: bool = False,
+    max_reports: int = DEFAULT_MAX_REPORTS,
+) -> DomainListReport:
+    """
+    Validate (and optionally compact) one domain list.
+
+    The first pass validates every entry and writes it to its shard. Each
+    shard is then deduplicated on its own. Wildcards can appear after the
+    entries they cover, so a final pass over the shard results reports
+    duplicates and covered entries in line order, and writes the compacted
+    list when requested.
+    """
+    report = DomainListReport(path)
+    mapped = _open_mapped(path)
+    if mapped is None:
+        report.add_issue(0, "warning", "domain list is empty", max_reports)
+        return report
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="domain-list-") as work_dir:
+            shards = min(MAX_SHARDS, max(1, -(-len(mapped) // SHARD_BYTES)))
+            with span("scan", cat="file", file=path.name, shards=shards):
+                shard_paths, top_level_wildcards = _shard_entries(
+                    mapped, Path(work_dir), shards, report, max_reports
+                )
+            with span("dedup", cat="file", file=path.name):
+                drop_paths = [_dedup_shard(shard, top_level_wildcards, report) for shard in shard_paths]
+            report.unique = report.entries - report.duplicates
+
+            if report.unique > max_domains:
+                hint = (
+                    f"; {report.remaining} after compaction" if report.remaining <= max_domains else ""
+                )
+                report.add_issue(
+                    0, "error",
+                    f"{report.unique} domains exceeds the limit of {max_domains} per domain list{hint}",
+                    max_reports,
+                )
+
+            write = write_compacted and not report.invalid and (report.duplicates or report.covered)
+            if report.duplicates or report.covered:
+                with span("second_pass", cat="file", file=path.name):
+                    _second_pass(path, mapped, drop_paths, report, write, max_reports)
+    finally:
+        mapped.close()
+    if report.compacted:
+        os.replace(f"{path}.compacting", path)
+    return report
+
+
+def _shard_entries(mapped, work_dir: Path, shards: int, report: DomainListReport,
+                   max_reports: int) -> Tuple[List[Path], List[str]]:
+    """
+    Validate every line and write each entry to its shard as "line\tdomain".
+
+    Returns:
+        (shard paths, single-label wildcards such as "*.com")
+    """
+    paths = [work_dir / f"shard-{index}" for index in range(shards)]
+    top_level_wildcards = set()
+    with contextlib.ExitStack() as stack:
+        writers = [stack.enter_context(open(shard, "w", encoding="ascii")).write for shard in paths]
+        number = 0
+        for number, raw in _iter_lines(mapped):
+            domain, error = normalise_domain(raw)
+            if domain is None:
+                if error:
+                    report.invalid += 1
+                    report.add_issue(number, "error", error, max_reports)
+                continue
+            report.entries += 1
+            wildcard = domain[0] == "*"
+            suffix = (domain[2:] if wildcard else domain).rsplit(".", 2)[-2:]
+            if wildcard and len(suffix) == 1:
+                top_level_wildcards.add(domain)
+            writers[hash(".".join(suffix)) % shards](f"{number}\t{domain}\n")
+        report.lines = number
+    return paths, sorted(top_level_wildcards)
+
+
+def _dedup_shard(shard: Path, top_level_wildcards: List[str], report: DomainListReport) -> Path:
+    """
+    Find the duplicates and wildcard-covered entries of one shard.
+
+    Returns:
+        The path of a file of "line\tkind\tdomain" records in line order,
+        kind being "duplicate" or "covered".
+    """
+    trie = DomainTrie()
+    add = trie.add
+    with open(shard, encoding="ascii") as entries:
+        for line in entries:
+            add(line[line.index("\t") + 1:-1])
+    for wildcard in top_level_wildcards:
+        add(wildcard)
+
+    drops = shard.with_suffix(".drops")
+    with open(shard, encoding="ascii") as entries, open(drops, "w", encoding="ascii") as output:
+        for line in entries:
+            number, domain = line[:-1].split("\t")
+            # Mark the entry so later duplicates are not reported as covered
+            first, covered = trie.mark(domain, EMITTED_WILDCARD if domain[0] == "*" else EMITTED_EXACT)
+            if not first:
+                report.duplicates += 1
+                output.write(f"{number}\tduplicate\t{domain}\n")
+            elif covered:
+                report.covered += 1
+                output.write(f"{number}\tcovered\t{domain}\n")
+    shard.unlink()
+    return drops
+
+
+def _read_drops(drops) -> Iterator[Tuple[int, str, str]]:
+    for line in drops:
+        number, kind, domain = line[:-1].split("\t")
+        yield int(number), kind, domain
+
+
+def _copy_until(lines: Iterator[Tuple[int, bytes]], output, stop: Optional[int]) -> None:
+    """Write the lines before line stop (or all remaining lines) to the compacted list, skipping line stop."""
+    for number, raw in lines:
+        if number == stop:
+            return
+        domain, _ = normalise_domain(raw)
+        if domain is None:
+            # Comments and blank lines are kept as they are
+            output.write(raw if raw.endswith(b"\n") else raw + b"\n")
+            continue
+        comment = b" " + raw[raw.index(b"#"):].rstrip() if b"#" in raw else b""
+        output.write(domain.encode("ascii") + comment + b"\n")
+
+
+def _second_pass(path, mapped, drop_paths, report, write, max_reports) -> None:
+    """
+    Report duplicates and covered entries by line and, if write, write the
+    compacted list (first occurrences, in file order). Without write, the
+    pass stops once max_reports issues have been collected.
+    """
+    output = open(f"{path}.compacting", "wb") if write else None
+    lines = _iter_lines(mapped)
+    reported = 0
+    try:
+        with contextlib.ExitStack() as stack:
+            drops = heapq.merge(*(
+                _read_drops(stack.enter_context(open(drop_path, encoding="ascii"))) for drop_path in drop_paths
+            ))
+            for number, kind, domain in drops:
+                if output is None and len(report.issues) >= max_reports:
+                    break
+                if output is not None:
+                    _copy_until(lines, output, number)
+                reported += 1
+                if kind == "duplicate":
+                    report.add_issue(number, "warning", f"duplicate entry '{domain}'", max_reports)
+                else:
+                    report.add_issue(number, "warning", f"'{domain}' is already covered by a wildcard", max_reports)
+        if output is not None:
+            _copy_until(lines, output, None)
+    except BaseException:
+        if output is not None:
+            output.close()
+            os.unlink(output.name)
+        raise
+    # Issues not reached before stopping early
+    report.suppressed += report.duplicates + report.covered - reported
+    if output is not None:
+        output.close()
+        report.compacted = True
+
+
+def find_domain_lists(config_dir: Path) -> Tuple[List[Path], List[str]]:
+    """
+    Domain lists to validate: every file under config/dns-firewall-domain-lists/
+    plus any customDomainList referenced in network-config.yaml.
+
+    Returns:
+        (existing paths, referenced paths that do not exist)
+    """
+    paths = set()
+    lists_dir = config_dir / DOMAIN_LISTS_DIR
+    if lists_dir.is_dir():
+        paths.update(p for p in lists_dir.rglob("*") if p.is_file() and not p.name.startswith("."))
+
+    missing = []
+    network = load_config(config_dir, NETWORK_CONFIG_FILE_NAME) or {}
+    firewall = ((network.get("centralNetworkServices") or {}).get("route53Resolver") or {}).get("firewallRuleGroups") or []
+    for rule_group in firewall:
+        for rule in rule_group.get("rules") or []:
+            referenced = rule.get("customDomainList")
+            if not referenced:
+                continue
+            path = config_dir / referenced
+            if path.is_file():
+                paths.add(path)
+            else:
+                missing.append(f"{rule_group.get('name')}/{rule.get('name')}: {referenced}")
+    return sorted(paths), missing
+
+
+def print_report(report: DomainListReport) -> None:
+    for issue in report.issues:
+        location = f"{report.path}:{issue.line}" if issue.line else str(report.path)
+        print(f"{location}: {issue.severity}: {issue.message}")
+    if report.suppressed:
+        print(f"{report.path}: ... and {report.suppressed} more issues")
+    status = "❌" if report.has_errors else "✅"
+    summary = (
+        f"{status} {report.path}: {report.entries} entries, {report.unique} unique, "
+        f"{report.duplicates} duplicates, {report.covered} covered by wildcards, {report.invalid} invalid"
+    )
+    if report.compacted:
+        summary += f"; wrote {report.remaining} entries"
+    print(summary)
+
+
+@profiled("validate_domain_lists")
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Validate and deduplicate DNS Firewall domain lists")
+    parser.add_argument("paths", nargs="*", type=Path,
+                        help=f"Domain list files (default: config/{DOMAIN_LISTS_DIR}/ and lists referenced in network-config.yaml)")
+    parser.add_argument("--config-dir", default="config", type=Path, help="Directory containing configuration files")
+    parser.add_argument("--max-domains", type=int, default=DEFAULT_MAX_DOMAINS,
+                        help=f"Maximum domains per domain list (default: {DEFAULT_MAX_DOMAINS})")
+    parser.add_argument("--max-reports", type=int, default=DEFAULT_MAX_REPORTS,
+                        help=f"Issues to print per file (default: {DEFAULT_MAX_REPORTS})")
+    parser.add_argument("--write-compacted", action="store_true",
+                        help="Rewrite valid lists without duplicates and wildcard-covered entries; entries are written "
+                             "lower-cased, without a trailing dot and with IDNs as punycode, comments are kept")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write a cProfile dump and Chrome trace of the run (same as LZA_PROFILE=1)")
+    args = parser.parse_args()
+
+    missing: List[str] = []
+    if args.paths:
+        paths = args.paths
+    else:
+        paths, missing = find_domain_lists(args.config_dir)
+    for reference in missing:
+        print(f"❌ customDomainList {reference} does not exist")
+    if not paths and not missing:
+        print("No domain lists found.")
+        sys.exit(0)
+
+    start = time.perf_counter()
+    failed = bool(missing)
+    for path in paths:
+        report = validate_domain_list(path, args.max_domains, args.write_compacted, args.max_reports)
+        print_report(report)
+        failed = failed or report.has_errors
+    print(f"Validated {len(paths)} domain lists in {(time.perf_counter() - start) * 1000:.0f} ms")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
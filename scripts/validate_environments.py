@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Validate several environments that share config/ and differ only in their
+replacement values.
+
+Each environment is a directory holding a replacements-config.yaml overlay:
+
+    environments/
+      dev/replacements-config.yaml
+      prod/replacements-config.yaml
+
+An overlay's globalReplacements override (or add to) the base
+config/replacements-config.yaml. The environment name is the ENVIRONMENT the
+preflight checks use for the stack prefix (AWSAccelerator-<name>).
+
+The shared config files are parsed once, with their ``{{ Key }}`` placeholders
+unresolved (see preflight_checks.lza_config.ConfigTemplate), and the JSON
+schemas are compiled once. Each environment then only re-renders the scalars
+that contain placeholders and validates the result, so N environments cost
+about one parse plus N small renders and N schema validations. Environments
+are validated concurrently and reported together:
+
+- replacement keys the config uses that neither the base nor the overlay defines (error)
+- schema errors in the rendered config files (error)
+- overlay keys that no config file uses (warning)
+
+Usage:
+    python scripts/validate_environments.py [--config-dir config] [--environments-dir environments]
+    python scripts/validate_environments.py --schema-dir schemas/ --env dev prod
+    python scripts/validate_environments.py --no-schemas
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+# Allow running as `python scripts/<name>.py` from the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from preflight_checks.diagnostics import Diagnostic, locate
+from preflight_checks.lza_config import (
+    RE_KEY_PATTERN,
+    REPLACEMENTS_FILE_NAME,
+    YAML_LOADER,
+    ConfigTemplate,
+    load_replacements,
+    load_template,
+    parse_replacements,
+)
+from preflight_checks.profiling import profiled, span
+from preflight_checks.schema import CONFIG_SCHEMAS, load_validators
+
+DEFAULT_ENVIRONMENTS_DIR = "environments"
+
+
+@dataclass
+class EnvironmentReport:
+    """Validation result for one environment."""
+
+    name: str
+    diagnostics: List[Diagnostic] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def errors(self) -> int:
+        return sum(1 for diagnostic in self.diagnostics if diagnostic.severity == "error")
+
+    @property
+    def warnings(self) -> int:
+        return len(self.diagnostics) - self.errors
+
+
+def discover_environments(environments_dir: Path) -> Dict[str, Path]:
+    """Environment name to overlay file, for each subdirectory with a replacements-config.yaml."""
+    if not environments_dir.is_dir():
+        return {}
+    return {
+        path.parent.name: path
+        for path in sorted(environments_dir.glob(f"*/{REPLACEMENTS_FILE_NAME}"))
+    }
+
+
+class MatrixValidator:
+    """The shared config, parsed and compiled once, validated per environment."""
+
+    def __init__(self, config_dir: Path, validators: Optional[Dict[str, Any]] = None) -> None:
+        self.config_dir = config_dir
+        self.validators = validators or {}
+        self.base_replacements = load_replacements(config_dir)
+        self.templates: Dict[str, ConfigTemplate] = {}
+        # First position of each replacement key per file, for missing-key errors
+        self.key_positions: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        for name in CONFIG_SCHEMAS:
+            if name == REPLACEMENTS_FILE_NAME:
+                continue
+            with span("parse_template", cat="file", file=name):
+                template = load_template(config_dir, name)
+            if template is None:
+                continue
+            self.templates[name] = template
+            positions: Dict[str, Tuple[int, int]] = {}
+            for match in RE_KEY_PATTERN.finditer(template.text):
+                if match.group(1) not in positions:
+                    line_start = template.text.rfind("\n", 0, match.start()) + 1
+                    positions[match.group(1)] = (
+                        template.text.count("\n", 0, match.start()) + 1,
+                        match.start() - line_start + 1,
+                    )
+            self.key_positions[name] = positions
+        self.used_keys = set().union(*(template.keys for template in self.templates.values()))
+
+    def validate(self, name: str, overlay_path: Path) -> EnvironmentReport:
+        """Validates the shared config with one environment's overlay."""
+        report = EnvironmentReport(name)
+        start = time.perf_counter()
+        with span("environment", cat="environment", environment=name):
+            self._validate(report, overlay_path)
+        report.elapsed = time.perf_counter() - start
+        return report
+
+    def _validate(self, report: EnvironmentReport, overlay_path: Path) -> None:
+        try:
+            overlay_data = yaml.load(overlay_path.read_text(encoding="utf-8"), Loader=YAML_LOADER)
+        except (OSError, yaml.YAMLError) as e:
+            report.diagnostics.append(Diagnostic(str(overlay_path), 1, 1, "error", f"cannot read overlay: {e}"))
+            return
+        replacements_validator = self.validators.get(CONFIG_SCHEMAS[REPLACEMENTS_FILE_NAME])
+        if replacements_validator is not None:
+            for error in replacements_validator.iter_errors(overlay_data):
+                report.diagnostics.append(Diagnostic(str(overlay_path), 1, 1, "error", error.message))
+
+        overlay = parse_replacements(overlay_data)
+        for key in sorted(set(overlay) - self.used_keys):
+            report.diagnostics.append(Diagnostic(
+                str(overlay_path), 1, 1, "warning", f"replacement key '{key}' is not used by any config file"
+            ))
+        replacements = {**self.base_replacements, **overlay}
+
+        for file_name, template in sorted(self.templates.items()):
+            display_path = str(self.config_dir / file_name)
+            for key in sorted(template.keys - set(replacements)):
+                line, column = self.key_positions[file_name][key]
+                report.diagnostics.append(Diagnostic(
+                    display_path, line, column, "error",
+                    f"replacement key '{key}' is not defined for environment '{report.name}'",
+                ))
+            try:
+                with span("render", cat="file", file=file_name):
+                    document = template.render(replacements)
+            except yaml.YAMLError as e:
+                mark = getattr(e, "problem_mark", None) or getattr(e, "context_mark", None)
+                line, column = (mark.line + 1, mark.column + 1) if mark else (1, 1)
+                problem = getattr(e, "problem", None) or e
+                report.diagnostics.append(Diagnostic(display_path, line, column, "error", f"YAML: {problem}"))
+                continue
+            validator = self.validators.get(CONFIG_SCHEMAS[file_name])
+            if validator is None:
+                continue
+            with span("validate", cat="file", file=file_name):
+                errors = sorted(validator.iter_errors(document), key=lambda error: list(error.absolute_path))
+            for error in errors:
+                line, column = locate(template.node, error.absolute_path)
+                report.diagnostics.append(Diagnostic(display_path, line, column, "error", error.message))
+
+
+def validate_environments(
+    matrix: MatrixValidator, environments: Dict[str, Path], max_workers: Optional[int] = None
+) -> List[EnvironmentReport]:
+    """Validates every environment concurrently; reports are returned in name order."""
+    names = sorted(environments)
+    with ThreadPoolExecutor(max_workers=max_workers or len(names) or 1) as pool:
+        return list(pool.map(lambda name: matrix.validate(name, environments[name]), names))
+
+
+def print_reports(reports: List[EnvironmentReport], elapsed: float) -> int:
+    """Prints diagnostics (stdout) and the per-environment summary (stderr). Returns the error count."""
+    for report in reports:
+        for diagnostic in report.diagnostics:
+            print(f"[{report.name}] {diagnostic.format()}")
+    width = max([len(report.name) for report in reports] + [len("Environment")])
+    print(f"\n{'Environment':<{width}}  Errors  Warnings  Time", file=sys.stderr)
+    for report in reports:
+        marker = "❌" if report.errors else "✅"
+        print(
+            f"{report.name:<{width}}  {report.errors:>6}  {report.warnings:>8}  "
+            f"{report.elapsed * 1000:>4.0f} ms {marker}",
+            file=sys.stderr,
+        )
+    print(f"Validated {len(reports)} environments in {elapsed * 1000:.0f} ms", file=sys.stderr)
+    return sum(report.errors for report in reports)
+
+
+@profiled("validate_environments")
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Validate the shared config for several environments at once")
+    parser.add_argument("--config-dir", default="config", type=Path, help="Directory containing configuration files")
+    parser.add_argument("--environments-dir", default=DEFAULT_ENVIRONMENTS_DIR, type=Path,
+                        help=f"Directory with one <environment>/{REPLACEMENTS_FILE_NAME} overlay per environment")
+    parser.add_argument("--env", nargs="+", help="Only validate these environments")
+    parser.add_argument("--version", default="main", help="Landing Zone Accelerator version/branch/commit to use for schemas")
+    parser.add_argument("--schema-source", default=os.environ.get("LZA_SCHEMA_SOURCE", "github"),
+                        help="Source for schemas: 'github' or 'schemastore'")
+    parser.add_argument("--schema-dir", type=Path, help="Load schemas from this directory instead of the network")
+    parser.add_argument("--no-schemas", action="store_true",
+                        help="Skip schema validation (render and replacement checks only)")
+    parser.add_argument("--jobs", type=int, help="Environments validated concurrently (default: all)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write a cProfile dump and Chrome trace of the run (same as LZA_PROFILE=1)")
+    args = parser.parse_args()
+
+    environments = discover_environments(args.environments_dir)
+    if args.env:
+        unknown = sorted(set(args.env) - set(environments))
+        if unknown:
+            parser.error(f"no {REPLACEMENTS_FILE_NAME} overlay for {', '.join(unknown)} in {args.environments_dir}")
+        environments = {name: environments[name] for name in args.env}
+    if not environments:
+        parser.error(f"no environments found in {args.environments_dir}")
+
+    start = time.perf_counter()
+    validators = {} if args.no_schemas else load_validators(
+        CONFIG_SCHEMAS.values(), args.version, args.schema_source, args.schema_dir
+    )
+    matrix = MatrixValidator(args.config_dir, validators)
+    reports = validate_environments(matrix, environments, args.jobs)
+    error_count = print_reports(reports, time.perf_counter() - start)
+    sys.exit(1 if error_count else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,19 @@
 """
 Validate that all JSON files under config/*/ are valid JSON.
 
-Usage: python scripts/validate_json_configs.py
+Usage: python scripts/validate_json_configs.py [--profile]
 """
 
+import argparse
 import sys
 import json
 from pathlib import Path
 from typing import List
 
+# Allow running as `python scripts/<name>.py` from the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from preflight_checks.profiling import profiled, span
+
 CONFIG_DIR = Path(__file__).parent.parent / "config"
 
 
@@ -25,18 +30,25 @@ def validate_json_file(json_file: Path) -> bool:
     Validate a single JSON file. Returns True if valid, False otherwise.
     """
     try:
-        with json_file.open("r", encoding="utf-8") as f:
-            json.load(f)
+        with span("parse", cat="file", file=json_file.name):
+            with json_file.open("r", encoding="utf-8") as f:
+                json.load(f)
         return True
     except Exception as e:
         print(f"ERROR: {json_file} is not valid JSON: {e}", file=sys.stderr)
         return False
 
 
+@profiled("validate_json_configs")
 def main() -> None:
     """
     Main entry point for JSON validation script.
     """
+    parser = argparse.ArgumentParser(description="Validate that all JSON files under config/*/ are valid JSON")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write a cProfile dump and Chrome trace of the run (same as LZA_PROFILE=1)")
+    parser.parse_args()
+
     json_files = find_json_files(CONFIG_DIR)
     if not json_files:
         print("No JSON files found under config/*/.")
@@ -4,65 +4,38 @@ Validates Landing Zone Accelerator configuration files against their respective
 """
 
 import argparse
-import json
 import os
 import sys
 import yaml
-import requests
-import jsonschema
-import tempfile
-import shutil
 import re
 from pathlib import Path
-from jinja2 import Template
 
-# Configuration mapping between YAML files and their schema URLs
-CONFIG_SCHEMAS = {
-    "accounts-config.yaml": "accounts-config.json",
-    "customizations-config.yaml": "customizations-config.json",
-    "global-config.yaml": "global-config.json",
-    "iam-config.yaml": "iam-config.json",
-    "network-config.yaml": "network-config.json",
-    "organization-config.yaml": "organization-config.json",
-    "replacements-config.yaml": "replacements-config.json",
-    "security-config.yaml": "security-config.json"
-}
+# requests, jsonschema and tempfile are imported in the functions that use
+# them so that runs which exit early (e.g. --help) start quickly.
 
-# GitHub schema URL
-GITHUB_BASE_URL = "https://raw.githubusercontent.com/awslabs/landing-zone-accelerator-on-aws/{}/source/packages/@aws-accelerator/config/lib/schemas/{}"
+# Allow running as `python scripts/<name>.py` from the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from preflight_checks.profiling import profiled, span
+from preflight_checks.schema import CONFIG_SCHEMAS, fetch_schema
 
-# SchemaStore URL
-SCHEMASTORE_BASE_URL = "https://www.schemastore.org/api/json/schema/landing-zone-accelerator-on-aws/{}"
 
 def load_yaml_file(file_path):
     """Load YAML file and return its contents."""
     try:
-        with open(file_path, 'r') as file:
-            return yaml.safe_load(file)
+        with span("parse", cat="file", file=os.path.basename(file_path)):
+            with open(file_path, 'r') as file:
+                return yaml.safe_load(file)
     except Exception as e:
         print(f"Error loading YAML file {file_path}: {str(e)}")
         return None
 
-def fetch_schema(schema_name, version, schema_source="github"):
-    """Fetch JSON schema from GitHub or SchemaStore."""
-    if schema_source.lower() == "schemastore":
-        url = SCHEMASTORE_BASE_URL.format(schema_name)
-    else:  # Default to GitHub
-        url = GITHUB_BASE_URL.format(version, schema_name)
-    
-    try:
-        print(f"Fetching schema from {url}")
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching schema {url}: {str(e)}")
-        return None
-
 def validate_config(config_data, schema_data, config_name):
     """Validate configuration against schema."""
+    import jsonschema
+
     try:
-        jsonschema.validate(instance=config_data, schema=schema_data)
+        with span("validate", cat="file", file=config_name):
+            jsonschema.validate(instance=config_data, schema=schema_data)
         print(f"✅ {config_name} is valid")
         return True
     except jsonschema.exceptions.ValidationError as e:
@@ -108,21 +81,27 @@ def process_config_files(source_dir, temp_dir, replacements):
             
         # Apply replacements
         if config_file != "replacements-config.yaml":
-            content = apply_replacements(content, replacements)
+            with span("render", cat="file", file=config_file):
+                content = apply_replacements(content, replacements)
             
         # Write to temp directory
         dest_path = os.path.join(temp_dir, config_file)
         with open(dest_path, 'w') as file:
             file.write(content)
 
+@profiled("validate_landing_zone_schema")
 def main():
     parser = argparse.ArgumentParser(description="Validate Landing Zone Accelerator configuration files against schemas")
     parser.add_argument("--version", default="main", help="Landing Zone Accelerator version/branch/commit to use for schemas")
     parser.add_argument("--config-dir", default="config", help="Directory containing configuration files")
     parser.add_argument("--schema-source", default=os.environ.get("LZA_SCHEMA_SOURCE", "github"), 
                         help="Source for schemas: 'github' or 'schemastore'")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write a cProfile dump and Chrome trace of the run (same as LZA_PROFILE=1)")
     args = parser.parse_args()
 
+    import tempfile
+
     # Create temporary directory
     with tempfile.TemporaryDirectory() as temp_dir:
         print(f"Created temporary directory: {temp_dir}")
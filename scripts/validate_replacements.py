@@ -7,15 +7,20 @@ Fails if:
 - Any referenced key is missing from replacements-config.yaml
 - Any key in replacements-config.yaml is not referenced in any config file
 
-Usage: python scripts/validate_replacements.py
+Usage: python scripts/validate_replacements.py [--profile]
 """
 
+import argparse
 import re
 import sys
 from pathlib import Path
 from typing import Set, List
 import yaml
 
+# Allow running as `python scripts/<name>.py` from the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from preflight_checks.profiling import profiled, span
+
 CONFIG_DIR = Path(__file__).parent.parent / "config"
 REPLACEMENTS_FILE = CONFIG_DIR / "replacements-config.yaml"
 
@@ -38,7 +43,8 @@ def extract_replacement_keys_from_yaml_files(config_dir: Path, exclude: List[str
         except Exception as e:
             print(f"Error reading {yaml_file}: {e}", file=sys.stderr)
             continue
-        found = RE_KEY_PATTERN.findall(text)
+        with span("scan", cat="file", file=yaml_file.name):
+            found = RE_KEY_PATTERN.findall(text)
         keys.update(found)
     return keys
 
@@ -69,10 +75,16 @@ def extract_defined_keys_from_replacements(replacements_file: Path) -> Set[str]:
     return keys
 
 
+@profiled("validate_replacements")
 def main() -> None:
     """
     Main entry point for validation script.
     """
+    parser = argparse.ArgumentParser(description="Validate replacement keys used in config/*.yaml")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write a cProfile dump and Chrome trace of the run (same as LZA_PROFILE=1)")
+    parser.parse_args()
+
     referenced_keys = extract_replacement_keys_from_yaml_files(CONFIG_DIR, exclude=[REPLACEMENTS_FILE.name])
     defined_keys = extract_defined_keys_from_replacements(REPLACEMENTS_FILE)
 
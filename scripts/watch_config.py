@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Watch config/ and revalidate Landing Zone Accelerator configuration files on save.
+
+The watcher keeps the replacements, raw and rendered config files, parsed YAML
+trees and compiled JSON schemas in memory, so each save only re-renders and
+revalidates the files it affects:
+
+- Saving a config file re-renders, re-parses and revalidates that file.
+- Saving replacements-config.yaml re-renders only the files that reference
+  replacement keys whose values changed (or were added/removed).
+- Saving a JSON policy file under config/*/ re-parses that file.
+
+Diagnostics are printed one per line in the compact format most editors parse
+(vim errorformat, VS Code problem matchers, Emacs compilation-mode):
+
+    config/network-config.yaml:42:7: error: 'foo' is not of type 'integer'
+
+Changes are detected with inotify on Linux, falling back to polling elsewhere.
+
+Usage: python scripts/watch_config.py [--config-dir config] [--schema-dir DIR] [--once]
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import yaml
+
+# Allow running as `python scripts/<name>.py` from the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from preflight_checks.diagnostics import Diagnostic, locate, parse_yaml_with_nodes
+from preflight_checks.lza_config import (
+    RE_KEY_PATTERN,
+    REPLACEMENTS_FILE_NAME,
+    YAML_LOADER,
+    parse_replacements,
+    render,
+)
+from preflight_checks.profiling import profiled, span
+from preflight_checks.schema import CONFIG_SCHEMAS, load_validators
+
+POLL_INTERVAL_SECONDS = 0.5
+# Editors often write a file in several steps (truncate, write, rename); wait
+# this long after the first event so one save triggers one revalidation.
+DEBOUNCE_SECONDS = 0.05
+
+
+def _line_column(text: str, offset: int) -> Tuple[int, int]:
+    line = text.count("\n", 0, offset) + 1
+    return line, offset - (text.rfind("\n", 0, offset) + 1) + 1
+
+
+class ConfigValidationState:
+    """In-memory validation state for a config directory."""
+
+    def __init__(self, config_dir: Path, validators: Optional[Dict[str, Any]] = None) -> None:
+        self.config_dir = config_dir
+        self.validators = validators or {}
+        self.replacements: Dict[str, Any] = {}
+        self.raw: Dict[str, str] = {}
+        self.keys_by_file: Dict[str, Set[str]] = {}
+        self.rendered: Dict[str, str] = {}
+        self.parsed: Dict[str, Any] = {}
+        self.diagnostics: Dict[str, List[Diagnostic]] = {}
+
+    def display_path(self, name: str) -> str:
+        return str(self.config_dir / name)
+
+    def load_all(self) -> Dict[str, List[Diagnostic]]:
+        """Load and validate every watched file. Returns diagnostics per file."""
+        names = [REPLACEMENTS_FILE_NAME] + [
+            name for name in CONFIG_SCHEMAS if name != REPLACEMENTS_FILE_NAME
+        ]
+        names += [str(path.relative_to(self.config_dir)) for path in self._json_files()]
+        return self.handle_changes(names)
+
+    def _json_files(self) -> List[Path]:
+        return sorted(self.config_dir.glob("*/**/*.json"))
+
+    def handle_changes(self, names: Iterable[str]) -> Dict[str, List[Diagnostic]]:
+        """
+        Revalidate the given files (paths relative to config_dir) and anything they affect.
+
+        Returns the new diagnostics for every file that was revalidated.
+        """
+        names = set(names)
+        to_validate: Set[str] = set()
+
+        if REPLACEMENTS_FILE_NAME in names:
+            names.discard(REPLACEMENTS_FILE_NAME)
+            changed_keys = self._reload_replacements()
+            to_validate.add(REPLACEMENTS_FILE_NAME)
+            to_validate.update(
+                name for name, keys in self.keys_by_file.items() if keys & changed_keys
+            )
+
+        for name in names:
+            if name in CONFIG_SCHEMAS:
+                self._reload_raw(name)
+                to_validate.add(name)
+            elif name.endswith(".json"):
+                to_validate.add(name)
+
+        results: Dict[str, List[Diagnostic]] = {}
+        for name in sorted(to_validate):
+            with span("revalidate", cat="file", file=name):
+                if name.endswith(".json"):
+                    results[name] = self._validate_json(name)
+                else:
+                    results[name] = self._validate_config(name)
+            self.diagnostics[name] = results[name]
+        return results
+
+    def _reload_replacements(self) -> Set[str]:
+        """Reload replacements-config.yaml and return the keys whose values changed."""
+        path = self.config_dir / REPLACEMENTS_FILE_NAME
+        old = self.replacements
+        self.raw.pop(REPLACEMENTS_FILE_NAME, None)
+        new: Dict[str, Any] = {}
+        if path.exists():
+            text = path.read_text(encoding="utf-8")
+            self.raw[REPLACEMENTS_FILE_NAME] = text
+            try:
+                new = parse_replacements(yaml.load(text, Loader=YAML_LOADER))
+            except yaml.YAMLError:
+                # Reported by _validate_config; keep the last good values so a
+                # half-typed edit does not cascade errors into every file.
+                return set()
+        self.replacements = new
+        return {key for key in old.keys() | new.keys() if old.get(key) != new.get(key)}
+
+    def _reload_raw(self, name: str) -> None:
+        path = self.config_dir / name
+        if not path.exists():
+            self.raw.pop(name, None)
+            self.keys_by_file.pop(name, None)
+            return
+        text = path.read_text(encoding="utf-8")
+        self.raw[name] = text
+        self.keys_by_file[name] = set(RE_KEY_PATTERN.findall(text))
+
+    def _validate_config(self, name: str) -> List[Diagnostic]:
+        display_path = self.display_path(name)
+        text = self.raw.get(name)
+        self.rendered.pop(name, None)
+        self.parsed.pop(name, None)
+        if text is None:
+            return []
+
+        diagnostics: List[Diagnostic] = []
+        if name != REPLACEMENTS_FILE_NAME:
+            for match in RE_KEY_PATTERN.finditer(text):
+                if match.group(1) not in self.replacements:
+                    line, column = _line_column(text, match.start())
+                    diagnostics.append(Diagnostic(
+                        display_path, line, column, "error",
+                        f"replacement key '{match.group(1)}' is not defined in {REPLACEMENTS_FILE_NAME}",
+                    ))
+            with span("render", cat="file", file=name):
+                text = render(text, self.replacements)
+        self.rendered[name] = text
+
+        try:
+            with span("parse", cat="file", file=name):
+                data, node = parse_yaml_with_nodes(text)
+        except yaml.MarkedYAMLError as e:
+            mark = e.problem_mark or e.context_mark
+            line, column = (mark.line + 1, mark.column + 1) if mark else (1, 1)
+            diagnostics.append(Diagnostic(display_path, line, column, "error", f"YAML: {e.problem or e}"))
+            return diagnostics
+        self.parsed[name] = data
+
+        validator = self.validators.get(CONFIG_SCHEMAS[name])
+        if validator is not None:
+            with span("validate", cat="file", file=name):
+                errors = sorted(validator.iter_errors(data), key=lambda error: list(error.absolute_path))
+            for error in errors:
+                line, column = locate(node, error.absolute_path)
+                diagnostics.append(Diagnostic(display_path, line, column, "error", error.message))
+        return diagnostics
+
+    def _validate_json(self, name: str) -> List[Diagnostic]:
+        path = self.config_dir / name
+        if not path.exists():
+            return []
+        try:
+            json.loads(path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError as e:
+            return [Diagnostic(self.display_path(name), e.lineno, e.colno, "error", f"JSON: {e.msg}")]
+        return []
+
+
+class InotifyWatcher:
+    """Recursive directory watcher using the Linux inotify API via ctypes."""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_MODIFY
+    _EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[int, Path] = {}
+        for directory in [root] + [path for path in root.rglob("*") if path.is_dir()]:
+            self._add_watch(directory)
+
+    def _add_watch(self, directory: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(directory)), self.WATCH_MASK)
+        if wd >= 0:
+            self._dirs[wd] = directory
+
+    def _read_events(self) -> Set[Path]:
+        changed: Set[Path] = set()
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _cookie, length = self._EVENT_HEADER.unpack_from(buffer, offset)
+            offset += self._EVENT_HEADER.size
+            name = buffer[offset:offset + length].rstrip(b"\0").decode()
+            offset += length
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / name
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    self._add_watch(path)
+                continue
+            changed.add(path)
+        return changed
+
+    def wait(self) -> Set[Path]:
+        """Block until files change and return the changed paths."""
+        select.select([self._fd], [], [])
+        changed = self._read_events()
+        deadline = time.monotonic() + DEBOUNCE_SECONDS
+        while (remaining := deadline - time.monotonic()) > 0:
+            if select.select([self._fd], [], [], remaining)[0]:
+                changed |= self._read_events()
+        return changed
+
+
+class PollingWatcher:
+    """Portable fallback watcher comparing file mtimes and sizes."""
+
+    def __init__(self, root: Path, interval: float = POLL_INTERVAL_SECONDS) -> None:
+        self.root = root
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        for path in self.root.rglob("*"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if path.is_file():
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self) -> Set[Path]:
+        """Block until files change and return the changed paths."""
+        while True:
+            time.sleep(self.interval)
+            snapshot = self._scan()
+            changed = {
+                path for path in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = snapshot
+            if changed:
+                return changed
+
+
+def create_watcher(root: Path, force_polling: bool = False):
+    """Return an inotify watcher where available, otherwise a polling watcher."""
+    if not force_polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError) as e:
+            print(f"⚠️ inotify unavailable ({e}), falling back to polling", file=sys.stderr)
+    return PollingWatcher(root)
+
+
+def print_diagnostics(results: Dict[str, List[Diagnostic]], elapsed: float) -> int:
+    """Print diagnostics (stdout) and a status line (stderr). Returns the error count."""
+    error_count = 0
+    for name in sorted(results):
+        for diagnostic in results[name]:
+            print(diagnostic.format())
+            error_count += 1
+    files = ", ".join(sorted(results)) if len(results) <= 3 else f"{len(results)} files"
+    status = "ok" if error_count == 0 else f"{error_count} error(s)"
+    print(f"[{time.strftime('%H:%M:%S')}] revalidated {files}: {status} ({elapsed * 1000:.0f} ms)",
+          file=sys.stderr)
+    sys.stdout.flush()
+    return error_count
+
+
+@profiled("watch_config")
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Watch config/ and revalidate changed files on save")
+    parser.add_argument("--config-dir", default="config", help="Directory containing configuration files")
+    parser.add_argument("--version", default="main", help="Landing Zone Accelerator version/branch/commit to use for schemas")
+    parser.add_argument("--schema-source", default=os.environ.get("LZA_SCHEMA_SOURCE", "github"),
+                        help="Source for schemas: 'github' or 'schemastore'")
+    parser.add_argument("--schema-dir", type=Path,
+                        help="Load schemas from this directory instead of the network")
+    parser.add_argument("--no-schemas", action="store_true",
+                        help="Skip schema validation (parse and replacement checks only)")
+    parser.add_argument("--poll", action="store_true", help="Use polling instead of inotify")
+    parser.add_argument("--once", action="store_true", help="Validate everything once and exit")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write a cProfile dump and Chrome trace of the run (same as LZA_PROFILE=1)")
+    args = parser.parse_args()
+
+    config_dir = Path(args.config_dir)
+    validators = {} if args.no_schemas else load_validators(
+        CONFIG_SCHEMAS.values(), args.version, args.schema_source, args.schema_dir
+    )
+    state = ConfigValidationState(config_dir, validators)
+
+    start = time.perf_counter()
+    error_count = print_diagnostics(state.load_all(), time.perf_counter() - start)
+    if args.once:
+        sys.exit(1 if error_count else 0)
+
+    watcher = create_watcher(config_dir.resolve(), force_polling=args.poll)
+    print(f"Watching {config_dir} for changes (Ctrl+C to stop)...", file=sys.stderr)
+    root = config_dir.resolve()
+    try:
+        while True:
+            changed = watcher.wait()
+            start = time.perf_counter()
+            names = [str(path.relative_to(root)) for path in changed if path.is_relative_to(root)]
+            results = state.handle_changes(names)
+            if results:
+                print_diagnostics(results, time.perf_counter() - start)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+# tests/test_analyze_tgw_routing.py
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+
+import analyze_tgw_routing
+from analyze_tgw_routing import (
+    DELIVERED,
+    LOCAL,
+    LpmTable,
+    Route,
+    build_graph,
+    check_graph,
+    query,
+)
+from preflight_checks.lza_config import load_configs
+
+CONFIG_DIR = os.path.join(os.path.dirname(__file__), '..', 'config')
+REGION = "ap-southeast-2"
+AZS = ["a", "b"]
+TGW = {"name": "Main", "account": "Network"}
+
+
+def _vpc(name, account, cidr, routes, attachment=None, extra_subnets=()):
+    """A VPC with one workload subnet per AZ; attachment subnets get their own route table."""
+    subnets = [{"name": f"{name}-App-{az}", "availabilityZone": az, "routeTable": f"{name}-App"} for az in AZS]
+    route_tables = [{"name": f"{name}-App", "routes": routes}]
+    if attachment:
+        subnets += [{"name": f"{name}-Tgw-{az}", "availabilityZone": az, "routeTable": f"{name}-Tgw"} for az in AZS]
+        route_tables.append({"name": f"{name}-Tgw", "routes": attachment.pop("subnet_routes", [])})
+        attachment = {"name": name, "transitGateway": TGW, "subnets": [f"{name}-Tgw-{az}" for az in AZS], **attachment}
+    for subnet_name, route_table, routes_ in extra_subnets:
+        subnets += [{"name": f"{subnet_name}-{az}", "availabilityZone": az, "routeTable": f"{route_table}-{az}"} for az in AZS]
+        route_tables += [{"name": f"{route_table}-{az}", "routes": routes_(az)} for az in AZS]
+    return {
+        "name": name,
+        "account": account,
+        "region": REGION,
+        "cidrs": [cidr],
+        "subnets": subnets,
+        "routeTables": route_tables,
+        "transitGatewayAttachments": [attachment] if attachment else [],
+    }
+
+
+def _to_tgw(destination="10.0.0.0/8"):
+    return {"name": "Tgw", "destination": destination, "type": "transitGateway", "target": "Main"}
+
+
+def hub_and_spoke(spokes=2, prod_propagates_to_dev=False):
+    """Dev and Prod spokes whose traffic is sent through an inspection VPC by the transit gateway."""
+    inspection = _vpc(
+        "Inspection", "Network", "10.255.0.0/16", [],
+        attachment={
+            "routeTableAssociations": ["Firewall"],
+            "routeTablePropagations": [],
+            "subnet_routes": [{"name": "Nfw", "destination": "0.0.0.0/0", "type": "networkFirewall", "target": "nfw"}],
+        },
+        extra_subnets=[("Inspection-Nfw", "Inspection-Nfw", lambda az: [_to_tgw()])],
+    )
+    for route_table in inspection["routeTables"]:
+        if route_table["name"] == "Inspection-Tgw":
+            for route in route_table["routes"]:
+                route["targetAvailabilityZone"] = "a"
+    vpcs = [inspection]
+    accounts = []
+    for environment in ("Dev", "Prod"):
+        accounts.append({"name": environment, "organizationalUnit": f"Workloads/{environment}"})
+        for i in range(spokes):
+            propagations = ["Firewall"] + (["Dev"] if environment == "Prod" and prod_propagates_to_dev else [])
+            vpcs.append(_vpc(
+                f"{environment}{i}", environment, f"10.{1 if environment == 'Dev' else 2}.{i}.0/24",
+                [_to_tgw()],
+                attachment={"routeTableAssociations": [environment], "routeTablePropagations": propagations},
+            ))
+    inspection_attachment = {"vpcName": "Inspection", "account": "Network"}
+    network_config = {
+        "transitGateways": [{
+            **TGW,
+            "region": REGION,
+            "routeTables": [
+                {"name": "Firewall"},
+                {"name": "Dev", "routes": [{"destinationCidrBlock": "0.0.0.0/0", "attachment": inspection_attachment}]},
+                {"name": "Prod", "routes": [{"destinationCidrBlock": "0.0.0.0/0", "attachment": inspection_attachment}]},
+            ],
+        }],
+        "centralNetworkServices": {"networkFirewall": {"firewalls": [
+            {"name": "nfw", "vpc": "Inspection", "subnets": [f"Inspection-Nfw-{az}" for az in AZS]},
+        ]}},
+        "vpcs": vpcs,
+    }
+    accounts_config = {"mandatoryAccounts": [{"name": "Network", "organizationalUnit": "Infrastructure"}],
+                       "workloadAccounts": accounts}
+    return network_config, accounts_config
+
+
+def _route_table(network_config, name):
+    return next(rt for tgw in network_config["transitGateways"] for rt in tgw["routeTables"] if rt["name"] == name)
+
+
+def test_lpm_table_prefers_the_longest_prefix_and_the_first_route():
+    table = LpmTable()
+    table.add(Route("0.0.0.0/0", "default"))
+    table.add(Route("10.0.0.0/8", "wide"))
+    table.add(Route("10.1.0.0/16", "narrow"))
+    table.add(Route("10.1.0.0/16", "duplicate"))
+    assert not table.add(Route("fd00::/8", "ipv6"))
+    address = int.from_bytes(bytes([10, 1, 2, 3]), "big")
+    assert table.lookup(address).kind == "narrow"
+    assert table.lookup(address + (1 << 16)).kind == "wide"
+    assert table.lookup(1).kind == "default"
+
+
+def test_repository_config_routes_egress_through_the_firewall():
+    configs = load_configs(Path(CONFIG_DIR), ["network-config.yaml", "accounts-config.yaml"])
+    graph = build_graph(configs["network-config.yaml"], configs["accounts-config.yaml"])
+    assert check_graph(graph)["errors"] == []
+    [result] = query(graph, graph.resolve("Network-Egress"), graph.resolve("SomeEnv/Production"))
+    assert result.inspected
+    assert all(path.hops[-1].endswith(LOCAL + " " + graph.vpcs[result.destination].cidrs[0])
+               for _route_table, path in result.paths)
+
+
+def test_spokes_are_inspected_in_both_directions():
+    graph = build_graph(*hub_and_spoke())
+    findings = check_graph(graph)
+    assert findings == {"errors": [], "warnings": [], "info": []}
+    for source, destination in (("Workloads/Dev", "Workloads/Prod"), ("Prod", "Dev")):
+        results = query(graph, graph.resolve(source), graph.resolve(destination))
+        assert len(results) == 4
+        assert all(result.inspected and result.firewalls() == {"nfw"} for result in results)
+    # The firewall subnet route table is in the AZ the inspection VPC pins the route to
+    [result] = query(graph, [("Dev", "Dev0")], [("Prod", "Prod0")])
+    assert any("Inspection-Nfw-a" in hop for _route_table, path in result.paths for hop in path.hops)
+
+
+def test_propagating_past_the_firewall_makes_the_path_asymmetric():
+    graph = build_graph(*hub_and_spoke(spokes=1, prod_propagates_to_dev=True))
+    errors = check_graph(graph)["errors"]
+    assert errors == [
+        "asymmetric path: Dev0 (Dev) -> Prod0 (Prod) passes no firewall, the return path passes nfw"
+    ]
+
+
+def test_missing_and_explicit_blackholes():
+    network_config, accounts_config = hub_and_spoke(spokes=1)
+    _route_table(network_config, "Dev")["routes"] = []
+    _route_table(network_config, "Prod")["routes"].append({"destinationCidrBlock": "10.1.0.0/16", "blackhole": True})
+    findings = check_graph(build_graph(network_config, accounts_config))
+    assert findings["errors"] == []
+    assert findings["warnings"] == ["blackhole: Dev0 (Dev) [Dev0-App] -> Prod0 (Prod): Main/Dev: no route (blackhole)"]
+    assert findings["info"] == ["Prod0 (Prod) [Prod0-App] -> Dev0 (Dev): Main/Prod: 10.1.0.0/16 blackhole route"]
+
+
+def test_dangling_references_are_errors():
+    network_config, accounts_config = hub_and_spoke(spokes=1)
+    _route_table(network_config, "Dev")["routes"][0]["attachment"]["vpcName"] = "Gone"
+    dev = next(vpc for vpc in network_config["vpcs"] if vpc["name"] == "Dev0")
+    dev["routeTables"][0]["routes"].append({"name": "Nfw", "destination": "10.9.0.0/16", "type": "networkFirewall", "target": "missing"})
+    dev["transitGatewayAttachments"][0]["routeTablePropagations"].append("Shared")
+    errors = check_graph(build_graph(network_config, accounts_config))["errors"]
+    assert errors[:3] == [
+        "Dev0 (Dev): attachment Dev0 references unknown route table Shared of Main",
+        "Dev0 (Dev) route table Dev0-App: route to unknown firewall missing",
+        "Main/Dev: static route 0.0.0.0/0 to Gone (Network), which is not attached",
+    ]
+
+
+def test_hundreds_of_vpcs_are_analysed_in_milliseconds_per_query():
+    graph = build_graph(*hub_and_spoke(spokes=150))
+    start = time.perf_counter()
+    findings = check_graph(graph)
+    elapsed = time.perf_counter() - start
+    assert findings["errors"] == [] and findings["warnings"] == []
+    # 300 VPCs, 89,700 ordered pairs; the shared transit gateway walks are computed once
+    assert len(graph.attached_vpcs()) == 300
+    assert elapsed < 10
+    start = time.perf_counter()
+    [result] = query(graph, [("Dev", "Dev7")], [("Prod", "Prod42")])
+    assert result.inspected and time.perf_counter() - start < 0.05
+
+
+def test_main_fails_unmet_expectations(tmp_path, monkeypatch, capsys):
+    network_config, accounts_config = hub_and_spoke(spokes=1, prod_propagates_to_dev=True)
+    (tmp_path / "network-config.yaml").write_text(yaml.safe_dump(network_config))
+    (tmp_path / "accounts-config.yaml").write_text(yaml.safe_dump(accounts_config))
+    queries = tmp_path / "queries.txt"
+    queries.write_text("# source destination expectation\nProd Dev inspected\nDev Prod inspected\nProd Nothing\n")
+    monkeypatch.setattr(sys, "argv", ["analyze_tgw_routing.py", "--config-dir", str(tmp_path),
+                                      "--queries-file", str(queries)])
+    with pytest.raises(SystemExit) as exit_info:
+        analyze_tgw_routing.main()
+    assert exit_info.value.code == 1
+    out = capsys.readouterr().out
+    assert "✅ Prod0 (Prod) -> Dev0 (Dev): INSPECTED by nfw" in out
+    assert "❌ Dev0 (Dev) -> Prod0 (Prod): REACHABLE without inspection" in out
+    assert "❌ no VPCs match 'Nothing'" in out
+    # Hops are only printed for failed queries
+    assert out.count(DELIVERED) == 1
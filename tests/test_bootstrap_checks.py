@@ -0,0 +1,160 @@
+# tests/test_bootstrap_checks.py
+import datetime
+import json
+import os
+import sys
+import threading
+from unittest.mock import MagicMock
+
+import boto3
+import pytest
+from moto import mock_aws
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from preflight_checks import bootstrap_checks, credentials
+
+HOME_REGION = "ap-southeast-2"
+REGIONS = [HOME_REGION, "us-east-1"]
+MANAGEMENT_ACCOUNT_ID = "123456789012"
+ACCESS_ROLE = "AWSControlTowerExecution"
+TOOLKIT_TEMPLATE = json.dumps({
+    "Resources": {"Version": {"Type": "AWS::SSM::Parameter", "Properties": {
+        "Name": "/cdk-bootstrap/accel/version", "Type": "String", "Value": "21"
+    }}}
+})
+
+
+@pytest.fixture(autouse=True)
+def aws_credentials(monkeypatch):
+    """Fake AWS credentials for moto and an empty credential cache."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", HOME_REGION)
+    credentials.credential_cache.clear()
+    yield
+    credentials.credential_cache.clear()
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    (tmp_path / "global-config.yaml").write_text(
+        f"homeRegion: {HOME_REGION}\n"
+        f"enabledRegions:\n  - {REGIONS[0]}\n  - {REGIONS[1]}\n"
+        f"managementAccountAccessRole: {ACCESS_ROLE}\n"
+    )
+    (tmp_path / "accounts-config.yaml").write_text(
+        "mandatoryAccounts:\n"
+        "  - name: Management\n    email: management@example.com\n    organizationalUnit: Root\n"
+        "  - name: Audit\n    email: audit@example.com\n    organizationalUnit: Security\n"
+        "workloadAccounts:\n"
+        "  - name: Workload\n    email: workload@example.com\n    organizationalUnit: SomeEnv/Production\n"
+        "accountIds:\n"
+        f"  - email: management@example.com\n    accountId: '{MANAGEMENT_ACCOUNT_ID}'\n"
+    )
+    return tmp_path
+
+
+def _create_account(org_client, email):
+    status = org_client.create_account(AccountName=email.split("@")[0], Email=email)["CreateAccountStatus"]
+    return status["AccountId"]
+
+
+def _bootstrap(account_id, regions):
+    """Deploys the bootstrap stack into account_id (via the access role unless it is the caller)."""
+    session = boto3.Session()
+    if account_id != MANAGEMENT_ACCOUNT_ID:
+        session = credentials.AssumedRoleCredentialCache().session(
+            credentials.role_arn(account_id, ACCESS_ROLE), HOME_REGION
+        )
+    for region in regions:
+        session.client("cloudformation", region_name=region).create_stack(
+            StackName="AWSAccelerator-CDKToolkit", TemplateBody=TOOLKIT_TEMPLATE
+        )
+
+
+@mock_aws
+def test_all_accounts_bootstrapped(config_dir):
+    """Every account resolved through Organizations and bootstrapped in every region passes."""
+    org_client = boto3.client("organizations", region_name=HOME_REGION)
+    org_client.create_organization(FeatureSet="ALL")
+    for email in ["audit@example.com", "workload@example.com"]:
+        _bootstrap(_create_account(org_client, email), REGIONS)
+    _bootstrap(MANAGEMENT_ACCOUNT_ID, REGIONS)
+
+    assert bootstrap_checks.check_account_bootstrap(str(config_dir), max_workers=4) is True
+
+
+@mock_aws
+def test_missing_bootstrap_and_account(config_dir, caplog):
+    """Missing bootstrap stacks and accounts not in the organization are reported per account."""
+    org_client = boto3.client("organizations", region_name=HOME_REGION)
+    org_client.create_organization(FeatureSet="ALL")
+    _bootstrap(_create_account(org_client, "audit@example.com"), [HOME_REGION])
+    _bootstrap(MANAGEMENT_ACCOUNT_ID, REGIONS)
+
+    assert bootstrap_checks.check_account_bootstrap(str(config_dir)) is False
+    assert "bootstrap stack AWSAccelerator-CDKToolkit not found in us-east-1" in caplog.text
+    assert "Account Workload: no account with email workload@example.com in the organization" in caplog.text
+
+
+def test_account_timeout_stops_checking_regions(monkeypatch):
+    """An account that exceeds its time budget reports the regions it did not reach."""
+    clock = iter([0.0, 0.5, 2.0])
+    monkeypatch.setattr(bootstrap_checks.time, "monotonic", lambda: next(clock))
+    monkeypatch.setattr(bootstrap_checks, "get_aws_client", MagicMock())
+    monkeypatch.setattr(bootstrap_checks, "check_bootstrap_stack", MagicMock(return_value=None))
+
+    result = bootstrap_checks.check_account(
+        bootstrap_checks.AccountResult("Slow", MANAGEMENT_ACCOUNT_ID),
+        REGIONS, ACCESS_ROLE, "AWSAccelerator", MANAGEMENT_ACCOUNT_ID, "aws", timeout_seconds=1,
+    )
+
+    assert result.problems == ["timed out after 1s; regions not checked from us-east-1"]
+
+
+def test_sts_connection_error_is_reported_for_the_account_only(monkeypatch):
+    """A slow or unreachable STS endpoint fails one account, with its calls capped by the time left."""
+    from botocore.exceptions import EndpointConnectionError
+
+    configs = []
+
+    def assume_role_session(arn, region_name=None, config=None):
+        configs.append(config)
+        raise EndpointConnectionError(endpoint_url="https://sts.ap-southeast-2.amazonaws.com")
+
+    monkeypatch.setattr(bootstrap_checks, "assume_role_session", assume_role_session)
+    result = bootstrap_checks.check_account(
+        bootstrap_checks.AccountResult("Unreachable", "111111111111"),
+        REGIONS, ACCESS_ROLE, "AWSAccelerator", MANAGEMENT_ACCOUNT_ID, "aws", timeout_seconds=12,
+    )
+    assert result.problems == [
+        "cannot assume arn:aws:iam::111111111111:role/AWSControlTowerExecution: "
+        'Could not connect to the endpoint URL: "https://sts.ap-southeast-2.amazonaws.com"'
+    ]
+    config = configs[0]
+    assert config.retries["max_attempts"] * (config.connect_timeout + config.read_timeout) <= 12
+
+
+def test_credential_cache_assumes_once_until_expiry(monkeypatch):
+    """Credentials are shared between threads and refreshed only near expiry."""
+    now = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+    sts_client = MagicMock()
+    sts_client.assume_role.side_effect = lambda **kwargs: {"Credentials": {
+        "AccessKeyId": "AKIA", "SecretAccessKey": "secret", "SessionToken": "token",
+        "Expiration": now + datetime.timedelta(hours=1),
+    }}
+    monkeypatch.setattr(credentials, "get_aws_client", lambda *args, **kwargs: sts_client)
+    cache = credentials.AssumedRoleCredentialCache(clock=lambda: now)
+    arn = credentials.role_arn("111111111111", ACCESS_ROLE)
+
+    threads = [threading.Thread(target=cache.get_credentials, args=(arn,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sts_client.assume_role.call_count == 1
+
+    now += datetime.timedelta(minutes=56)
+    cache.get_credentials(arn)
+    assert sts_client.assume_role.call_count == 2
@@ -0,0 +1,89 @@
+# tests/test_compliance_checks.py
+import os
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from preflight_checks import compliance_checks
+
+REGION = "ap-southeast-2"
+OUS_BY_ACCOUNT = {"111111111111": "SomeEnv/Production", "222222222222": "Sandbox"}
+
+
+def _finding(account_id, severity, title):
+    return {"AwsAccountId": account_id, "Severity": {"Label": severity}, "Title": title, "Region": REGION}
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    """Config and Security Hub clients returning one page each; organization tree patched."""
+    config_client = MagicMock()
+    config_client.get_paginator.return_value.paginate.return_value = [{
+        "AggregateComplianceByConfigRules": [
+            {"ConfigRuleName": "s3-bucket-ssl-requests-only", "AccountId": "111111111111", "AwsRegion": REGION},
+            {"ConfigRuleName": "ec2-ebs-encryption-by-default", "AccountId": "222222222222", "AwsRegion": REGION},
+        ]
+    }]
+    securityhub_client = MagicMock()
+    securityhub_client.get_paginator.return_value.paginate.return_value = [{
+        "Findings": [_finding("222222222222", "CRITICAL", "Root account has access keys")]
+    }]
+    services = {"config": config_client, "securityhub": securityhub_client}
+    monkeypatch.setattr(compliance_checks, "get_aws_client", lambda service, **kwargs: services[service])
+    monkeypatch.setattr(compliance_checks, "account_ou_map", lambda: OUS_BY_ACCOUNT)
+    return services
+
+
+def test_queries_are_filtered_server_side(clients):
+    """Both services are queried once with server-side filters, not per account."""
+    assert compliance_checks.check_organization_compliance("org-aggregator", REGION) is False
+
+    clients["config"].get_paginator.return_value.paginate.assert_called_once_with(
+        ConfigurationAggregatorName="org-aggregator",
+        Filters={"ComplianceType": "NON_COMPLIANT"},
+    )
+    filters = clients["securityhub"].get_paginator.return_value.paginate.call_args.kwargs["Filters"]
+    # Only CRITICAL has a default threshold, so HIGH findings are not fetched
+    assert filters["SeverityLabel"] == [{"Value": "CRITICAL", "Comparison": "EQUALS"}]
+    assert filters["RecordState"] == [{"Value": "ACTIVE", "Comparison": "EQUALS"}]
+
+
+def test_per_ou_thresholds(clients, tmp_path, caplog):
+    """OU thresholds override the default for that OU and the OUs below it."""
+    thresholds = tmp_path / "thresholds.yaml"
+    thresholds.write_text(
+        "default:\n  nonCompliantRules: 0\n"
+        "organizationalUnits:\n"
+        "  Sandbox:\n    nonCompliantRules: 5\n    criticalFindings: 1\n"
+    )
+
+    assert compliance_checks.check_organization_compliance("org-aggregator", REGION, str(thresholds)) is False
+    assert "OU SomeEnv/Production: nonCompliantRules is 1, above the threshold of 0" in caplog.text
+    # Sandbox has one non-compliant rule and one critical finding, both within its thresholds
+    assert "OU Sandbox: nonCompliantRules is" not in caplog.text
+    assert "OU Sandbox: criticalFindings is" not in caplog.text
+
+
+def test_thresholds_for_nested_ous():
+    """The nearest OU entry wins and unset thresholds fall back to the default."""
+    thresholds = {
+        "default": dict(compliance_checks.DEFAULT_THRESHOLDS),
+        "organizationalUnits": {
+            "SomeEnv": {"criticalFindings": 3, "nonCompliantRules": 10},
+            "SomeEnv/Production": {"criticalFindings": 0},
+        },
+    }
+    assert compliance_checks.thresholds_for("SomeEnv/Production", thresholds) == {
+        "nonCompliantRules": 10, "criticalFindings": 0, "highFindings": None,
+    }
+    assert compliance_checks.thresholds_for("Sandbox", thresholds) == compliance_checks.DEFAULT_THRESHOLDS
+
+
+def test_unknown_threshold_is_rejected(tmp_path):
+    thresholds = tmp_path / "thresholds.yaml"
+    thresholds.write_text("default:\n  mediumFindings: 3\n")
+    with pytest.raises(ValueError, match="mediumFindings"):
+        compliance_checks.load_thresholds(str(thresholds))
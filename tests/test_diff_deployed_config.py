@@ -0,0 +1,162 @@
+# tests/test_diff_deployed_config.py
+import io
+import os
+import sys
+import time
+import zipfile
+from unittest.mock import MagicMock
+
+import boto3
+import pytest
+import yaml
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+
+import diff_deployed_config
+from preflight_checks import aws_checks
+from diff_deployed_config import (
+    ADDED,
+    CHANGED,
+    REMOVED,
+    REORDERED,
+    diff_bundles,
+    diff_values,
+    read_bundle,
+    referencing_configs,
+    stages_for,
+)
+
+REGION = "ap-southeast-2"
+
+
+def _bundle(network=None, replacements=None, organization=None, **files):
+    bundle = {
+        "replacements-config.yaml": yaml.safe_dump({"globalReplacements": [
+            {"key": key, "type": "String", "value": value} for key, value in (replacements or {}).items()
+        ]}),
+        "network-config.yaml": yaml.safe_dump(network or {}),
+        "organization-config.yaml": yaml.safe_dump(organization or {}),
+        **files,
+    }
+    return {name: text.encode() for name, text in bundle.items()}
+
+
+def _vpc(name, cidr="{{ Cidr }}"):
+    return {"name": name, "account": "Network", "region": REGION, "cidrs": [cidr],
+            "routeTables": [{"name": f"{name}-rt", "routes": [{"name": "Tgw", "destination": "0.0.0.0/0"}]}]}
+
+
+def _locations(changes):
+    return [(change.kind, change.location()) for change in changes]
+
+
+def test_list_items_are_matched_by_name():
+    """Inserting a VPC at the front reports one added VPC, not every later one as changed."""
+    old = {"vpcs": [_vpc("A"), _vpc("B")]}
+    new = {"vpcs": [_vpc("New"), _vpc("A"), _vpc("B")]}
+    new["vpcs"][2]["routeTables"][0]["routes"][0]["destination"] = "10.0.0.0/8"
+    changes = diff_values("network-config.yaml", old, new)
+    assert _locations(changes) == [
+        (CHANGED, "network-config.yaml:vpcs[name=B].routeTables[name=B-rt].routes[name=Tgw].destination"),
+        (ADDED, "network-config.yaml:vpcs[name=New]"),
+    ]
+    assert [stages_for(change, {}) for change in changes] == [
+        ("network-vpc", "network-associations"), ("network-vpc",),
+    ]
+
+
+def test_scalar_lists_and_repeated_identities():
+    old = {"regions": ["a", "b"], "order": [1, 2], "items": [{"key": "X", "v": 1}, {"key": "X", "v": 2}]}
+    new = {"regions": ["b", "c"], "order": [2, 1], "items": [{"key": "X", "v": 1}, {"key": "X", "v": 3}]}
+    changes = diff_values("f.yaml", old, new)
+    assert [(change.kind, change.path_text(), change.old, change.new) for change in changes] == [
+        (CHANGED, "regions", ["a"], ["c"]),
+        (REORDERED, "order", [1, 2], [2, 1]),
+        (CHANGED, "items[key=X#2].v", 2, 3),
+    ]
+
+
+def test_replacement_change_shows_in_every_rendered_node():
+    """Both bundles are rendered with their own replacements before they are compared."""
+    network = {"vpcs": [_vpc("A"), _vpc("B")]}
+    old = _bundle(network, {"Cidr": "10.0.0.0/16"})
+    new = _bundle(network, {"Cidr": "10.1.0.0/16"})
+    changes = diff_bundles(old, new)
+    assert _locations(changes) == [
+        (CHANGED, "network-config.yaml:vpcs[name=A].cidrs"),
+        (CHANGED, "network-config.yaml:vpcs[name=B].cidrs"),
+        (CHANGED, "replacements-config.yaml:globalReplacements[key=Cidr].value"),
+    ]
+    assert changes[0].old == ["10.0.0.0/16"] and changes[0].new == ["10.1.0.0/16"]
+    assert stages_for(changes[2], {}) == ()
+
+
+def test_referenced_files_map_to_the_stages_of_their_config(tmp_path):
+    organization = {"serviceControlPolicies": [{"name": "Guardrails", "policy": "service-control-policies/guardrails.json"}]}
+    old = _bundle(organization=organization, **{"service-control-policies/guardrails.json": "{}"})
+    new = _bundle(organization=organization, **{"service-control-policies/guardrails.json": '{"Version": "2012-10-17"}',
+                                                "README.md": "notes"})
+    # The previous bundle is read from a zip, as deployed
+    archive = tmp_path / "aws-accelerator-config.zip"
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        for name, content in old.items():
+            zip_file.writestr(name, content)
+    assert read_bundle(str(archive)) == old
+    changes = diff_bundles(read_bundle(str(archive)), new)
+    assert _locations(changes) == [(ADDED, "README.md"), (CHANGED, "service-control-policies/guardrails.json")]
+    referencing = referencing_configs(changes, new)
+    assert stages_for(changes[0], referencing) == ()
+    assert stages_for(changes[1], referencing) == ("prepare", "organization")
+
+
+def test_large_configs_are_diffed_in_linear_time():
+    old = {"vpcs": [_vpc(f"Vpc{i}", f"10.{i // 256}.{i % 256}.0/24") for i in range(20000)]}
+    new = {"vpcs": list(reversed(old["vpcs"][1:])) + [_vpc("Extra", "192.168.0.0/24")]}
+    start = time.perf_counter()
+    changes = diff_values("network-config.yaml", old, new)
+    assert time.perf_counter() - start < 2
+    assert _locations(changes) == [(REMOVED, "network-config.yaml:vpcs[name=Vpc0]"),
+                                   (ADDED, "network-config.yaml:vpcs[name=Extra]")]
+
+
+@mock_aws
+def test_main_reads_the_deployed_bundle_from_s3(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zip_file:
+        for name, content in _bundle({"vpcs": [_vpc("A", "10.0.0.0/16")]}).items():
+            zip_file.writestr(name, content)
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="lza-config")
+    s3.put_object(Bucket="lza-config", Key="main/aws-accelerator-config.zip", Body=buffer.getvalue())
+    for name, content in _bundle({"vpcs": [_vpc("A", "10.9.0.0/16")]}, organization={"enable": True}).items():
+        (tmp_path / name).write_bytes(content)
+
+    def run(*args):
+        monkeypatch.setattr(sys, "argv", ["diff_deployed_config.py", "--config-dir", str(tmp_path), *args])
+        with pytest.raises(SystemExit) as exit_info:
+            diff_deployed_config.main()
+        return exit_info.value.code, capsys.readouterr()
+
+    code, output = run("--previous", "s3://lza-config/main/aws-accelerator-config.zip", "--fail-on", "organization")
+    assert code == 1
+    assert "network-vpc: 1 change(s)" in output.out
+    assert '  ~ network-config.yaml:vpcs[name=A].cidrs: ["10.0.0.0/16"] -> ["10.9.0.0/16"]' in output.out
+    assert "❌ Changes touch organization" in output.err
+    # First deploy: nothing to compare with
+    code, output = run("--previous", "s3://lza-config/other/aws-accelerator-config.zip")
+    assert code == 0 and "No deployed bundle" in output.err
+
+
+def test_unreadable_deployed_bundle_is_treated_as_missing(monkeypatch, capsys):
+    """A deploy role without s3:GetObject or kms:Decrypt gets 403, which must not fail the deploy."""
+    s3 = MagicMock()
+    s3.get_object.side_effect = ClientError({"Error": {"Code": "AccessDenied", "Message": "Access Denied"}}, "GetObject")
+    monkeypatch.setattr(aws_checks, "get_aws_client", lambda service, **kwargs: s3)
+    assert read_bundle("s3://lza-config/main/aws-accelerator-config.zip") is None
+    assert "needs s3:GetObject" in capsys.readouterr().err
+    s3.get_object.side_effect = ClientError({"Error": {"Code": "SlowDown", "Message": "Slow Down"}}, "GetObject")
+    with pytest.raises(ClientError):
+        read_bundle("s3://lza-config/main/aws-accelerator-config.zip")
@@ -0,0 +1,173 @@
+# tests/test_estimate_stack_sizes.py
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+
+import estimate_stack_sizes
+from estimate_stack_sizes import MAX_RESOURCES, estimate_stacks, measure_template
+
+REGION = "ap-southeast-2"
+CONFIG_DIR = os.path.join(os.path.dirname(__file__), '..', 'config')
+
+ACCOUNTS_CONFIG = {
+    "mandatoryAccounts": [{"name": "Management", "organizationalUnit": "Root"}],
+    "workloadAccounts": [
+        {"name": "Network", "organizationalUnit": "Infrastructure"},
+        {"name": "Dev", "organizationalUnit": "Workloads/Dev"},
+    ],
+}
+
+
+def _vpc(name, subnets, routes_per_table):
+    return {
+        "name": name,
+        "account": "Network",
+        "region": REGION,
+        "subnets": [{"name": f"{name}-{i}", "routeTable": f"{name}-{i}"} for i in range(subnets)],
+        "routeTables": [
+            {"name": f"{name}-{i}", "routes": [{"name": f"r{j}", "type": "transitGateway"} for j in range(routes_per_table)]}
+            for i in range(subnets)
+        ],
+    }
+
+
+def _write_configs(config_dir, network_config, security_config=None, customizations_config=None):
+    files = {
+        "accounts-config.yaml": ACCOUNTS_CONFIG,
+        "global-config.yaml": {"homeRegion": REGION, "enabledRegions": [REGION]},
+        "network-config.yaml": network_config,
+        "security-config.yaml": security_config or {},
+        "customizations-config.yaml": customizations_config or {},
+    }
+    for name, content in files.items():
+        (config_dir / name).write_text(yaml.safe_dump(content))
+
+
+def _by_name(estimates):
+    return {(e.stack, e.account, e.region): e for e in estimates}
+
+
+def test_repository_config_is_within_limits():
+    """Every stack of the example configuration is well below the limits."""
+    estimates, problems = estimate_stacks(Path(CONFIG_DIR))
+    assert problems == []
+    stacks = _by_name(estimates)
+    vpc_stack = stacks[("AWSAccelerator-NetworkVpcStack-Network-ap-southeast-2", "Network", REGION)]
+    assert vpc_stack.entries["subnet"] == 9
+    assert vpc_stack.entries["nat_gateway"] == 3
+    # The OIDC provider template is measured rather than weighted
+    oidc = stacks[("GitHubOICDProvider", "Management", REGION)]
+    assert oidc.template == "customizations/github-oicd-provider.yaml"
+    assert oidc.resources == 2
+    assert all(estimate.utilisation() < 0.5 for estimate in estimates)
+
+
+def test_routes_land_in_the_stack_of_their_target(tmp_path):
+    """Firewall routes go to the endpoints stack; gateway endpoint routes create no resource."""
+    vpc = _vpc("Egress", 1, 0)
+    vpc["routeTables"][0]["routes"] = [
+        {"name": "tgw", "type": "transitGateway"},
+        {"name": "nfw", "type": "networkFirewall"},
+        {"name": "s3", "type": "gatewayEndpoint"},
+    ]
+    _write_configs(tmp_path, {"vpcs": [vpc]})
+    stacks = _by_name(estimate_stacks(tmp_path)[0])
+    assert stacks[("AWSAccelerator-NetworkVpcStack-Network-ap-southeast-2", "Network", REGION)].entries["route"] == 1
+    endpoints = stacks[("AWSAccelerator-NetworkVpcEndpointsStack-Network-ap-southeast-2", "Network", REGION)]
+    assert endpoints.entries["endpoint_route"] == 1
+
+
+def test_transit_gateway_associations_land_in_the_gateway_account(tmp_path):
+    """Attachment associations and propagations are counted in the transit gateway's account."""
+    vpc = _vpc("Workload", 1, 0)
+    vpc["account"] = "Dev"
+    vpc["transitGatewayAttachments"] = [{
+        "name": "Workload",
+        "transitGateway": {"name": "Main", "account": "Network"},
+        "routeTableAssociations": ["Core"],
+        "routeTablePropagations": ["Core", "Prod"],
+    }]
+    network_config = {
+        "transitGateways": [{"name": "Main", "account": "Network", "region": REGION, "routeTables": [{"name": "Core"}]}],
+        "vpcs": [vpc],
+    }
+    _write_configs(tmp_path, network_config)
+    stacks = _by_name(estimate_stacks(tmp_path)[0])
+    associations = stacks[("AWSAccelerator-NetworkAssociationsStack-Network-ap-southeast-2", "Network", REGION)]
+    assert associations.entries == {"transit_gateway_association": 1, "transit_gateway_propagation": 2}
+    assert stacks[("AWSAccelerator-NetworkVpcStack-Dev-ap-southeast-2", "Dev", REGION)].entries["transit_gateway_attachment"] == 1
+
+
+def test_large_network_config_is_flagged_quickly(tmp_path):
+    """Thousands of subnets and routes are projected quickly and flagged over the limit."""
+    vpcs = [_vpc(f"Vpc{i}", 100, 5) for i in range(30)]
+    _write_configs(tmp_path, {"vpcs": vpcs})
+    start = time.perf_counter()
+    estimates, _ = estimate_stacks(tmp_path)
+    elapsed = time.perf_counter() - start
+    vpc_stack = _by_name(estimates)[("AWSAccelerator-NetworkVpcStack-Network-ap-southeast-2", "Network", REGION)]
+    assert vpc_stack.entries["subnet"] == 3000
+    assert vpc_stack.entries["route"] == 15000
+    assert vpc_stack.resources > MAX_RESOURCES
+    assert estimates[0] is vpc_stack
+    # Config loading dominates; projecting 18,000 entries must not
+    assert elapsed < 5
+
+
+def test_measure_template_with_short_form_tags(tmp_path):
+    """Templates using !Ref / !Sub short forms are parsed with the CloudFormation loader."""
+    template = tmp_path / "template.yaml"
+    template.write_text(
+        "Resources:\n"
+        "  Role:\n"
+        "    Type: AWS::IAM::Role\n"
+        "    Properties:\n"
+        "      RoleName: !Sub '${AWS::StackName}-role'\n"
+        "  Param:\n"
+        "    Type: AWS::SSM::Parameter\n"
+        "    Properties:\n"
+        "      Value: !GetAtt Role.Arn\n"
+    )
+    assert measure_template(template) == (2, template.stat().st_size)
+
+
+def test_missing_custom_template_is_reported(tmp_path):
+    customizations = {"customizations": {"cloudFormationStacks": [{
+        "name": "Missing",
+        "template": "customizations/missing.yaml",
+        "deploymentTargets": {"accounts": ["Dev"]},
+        "regions": [REGION],
+    }]}}
+    _write_configs(tmp_path, {}, customizations_config=customizations)
+    _, problems = estimate_stacks(tmp_path)
+    assert len(problems) == 1 and "customizations/missing.yaml" in problems[0]
+
+
+def test_main_exits_non_zero_over_a_limit(tmp_path, monkeypatch, capsys):
+    _write_configs(tmp_path, {"vpcs": [_vpc("Big", 120, 2)]})
+    monkeypatch.setattr(sys, "argv", ["estimate_stack_sizes.py", "--config-dir", str(tmp_path)])
+    with pytest.raises(SystemExit) as exit_info:
+        estimate_stack_sizes.main()
+    assert exit_info.value.code == 1
+    assert "❌ AWSAccelerator-NetworkVpcStack-Network-ap-southeast-2" in capsys.readouterr().out
+
+
+def test_main_passes_a_stack_exactly_at_the_limit(monkeypatch, capsys):
+    estimate = estimate_stack_sizes.StackEstimate(
+        "AWSAccelerator-NetworkVpcStack-Network-ap-southeast-2", "Network", REGION,
+        resources=estimate_stack_sizes.MAX_RESOURCES, bytes=1_000,
+    )
+    monkeypatch.setattr(estimate_stack_sizes, "estimate_stacks", lambda config_dir, prefix: ([estimate], []))
+    monkeypatch.setattr(sys, "argv", ["estimate_stack_sizes.py"])
+    with pytest.raises(SystemExit) as exit_info:
+        estimate_stack_sizes.main()
+    assert exit_info.value.code == 0
+    output = capsys.readouterr()
+    assert "⚠️  AWSAccelerator-NetworkVpcStack-Network-ap-southeast-2" in output.out
+    assert "0 over a limit, 1 within" in output.err
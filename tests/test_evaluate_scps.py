@@ -0,0 +1,176 @@
+# tests/test_evaluate_scps.py
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+
+import evaluate_scps
+from evaluate_scps import ALLOWED, CONDITIONAL, DENIED, IMPLICIT_DENY, ActionTrie, PolicyEngine
+
+DENY_NETWORK = {
+    "Statement": [
+        {"Sid": "NET", "Effect": "Deny", "Action": ["ec2:CreateVpc", "ec2:*InternetGateway*"], "Resource": "*"},
+    ]
+}
+
+REGION_GUARD = {
+    "Statement": [
+        {
+            "Sid": "GBL",
+            "Effect": "Deny",
+            "NotAction": ["iam:*", "sts:*"],
+            "Resource": "*",
+            "Condition": {"StringNotEquals": {"aws:RequestedRegion": ["ap-southeast-2"]}},
+        },
+        {
+            "Sid": "EBS",
+            "Effect": "Deny",
+            "Action": "ec2:CreateVolume",
+            "Resource": "*",
+            "Condition": {"Bool": {"ec2:Encrypted": "false"}},
+        },
+    ]
+}
+
+BOUNDARY = {
+    "Statement": [{"Sid": "Allow", "Effect": "Allow", "Action": ["s3:*", "ec2:Describe*"], "Resource": "*"}]
+}
+
+
+@pytest.fixture
+def engine():
+    return PolicyEngine(
+        {"Deny-Network": DENY_NETWORK, "Region-Guard": REGION_GUARD, "Boundary": BOUNDARY},
+        {("ou", "Root"): ["Region-Guard"], ("ou", "Workloads"): ["Deny-Network"]},
+        {"Prod": "Workloads/Production"},
+    )
+
+
+def _decisions(engine, actions, targets, regions, boundary=None):
+    return {
+        (d.action, d.target, d.region): d
+        for d in engine.evaluate(actions, targets, regions, boundary)
+    }
+
+
+def test_action_trie_wildcards():
+    """Literal, '*' and '?' patterns match case-insensitively in one walk."""
+    trie = ActionTrie()
+    trie.add("ec2:Create*", 0b001)
+    trie.add("s3:?etObject", 0b010)
+    trie.add("*", 0b100)
+    assert trie.match("EC2:CreateVpc") == 0b101
+    assert trie.match("s3:GetObject") == 0b110
+    assert trie.match("s3:GetObjects") == 0b100
+    assert trie.match("ec2:Create") == 0b101
+
+
+@pytest.mark.parametrize("conditions, expected", [
+    ({"StringEquals": {"aws:RequestedRegion": "us-east-1"}}, True),
+    ({"StringNotEquals": {"aws:RequestedRegion": ["us-east-1", "us-west-2"]}}, False),
+    ({"StringLike": {"aws:PrincipalArn": "arn:aws:iam::*:role/Admin*"}}, True),
+    ({"ArnNotLike": {"aws:PrincipalArn": "arn:aws:iam::*:role/admin*"}}, True),
+    ({"Bool": {"ec2:Encrypted": "false"}}, None),
+    ({"StringEqualsIfExists": {"ec2:InstanceType": "t3.micro"}}, None),
+    ({"StringEqualsIfExists": {"aws:RequestedRegion": "eu-west-1"}}, False),
+    ({"Null": {"aws:PrincipalArn": "true"}}, False),
+])
+def test_evaluate_conditions(conditions, expected):
+    """Known keys evaluate to True/False; unknown keys make the result undecidable."""
+    context = {"aws:requestedregion": "us-east-1", "aws:principalarn": "arn:aws:iam::111111111111:role/AdminRole"}
+    assert evaluate_scps.evaluate_conditions(conditions, context) is expected
+
+
+def test_deny_statements_and_levels(engine):
+    """Denies are reported with the statement and the level they are attached at."""
+    results = _decisions(
+        engine,
+        ["ec2:CreateVpc", "ec2:AttachInternetGateway", "s3:PutObject", "iam:CreateRole"],
+        ["Workloads/Production", "Security"],
+        ["ap-southeast-2", "us-east-1"],
+    )
+    vpc = results[("ec2:CreateVpc", "Workloads/Production", "ap-southeast-2")]
+    assert (vpc.decision, vpc.statement, vpc.level) == (DENIED, "Deny-Network/NET", "ou:Workloads")
+    assert results[("ec2:AttachInternetGateway", "Workloads/Production", "ap-southeast-2")].decision == DENIED
+    assert results[("ec2:CreateVpc", "Security", "ap-southeast-2")].decision == ALLOWED
+
+    out_of_region = results[("s3:PutObject", "Security", "us-east-1")]
+    assert (out_of_region.decision, out_of_region.statement, out_of_region.level) == (
+        DENIED, "Region-Guard/GBL", "ou:Root"
+    )
+    assert results[("s3:PutObject", "Security", "ap-southeast-2")].decision == ALLOWED
+    # NotAction exempts global services from the region guard
+    assert results[("iam:CreateRole", "Security", "us-east-1")].decision == ALLOWED
+
+
+def test_unknown_condition_keys_are_conditional(engine):
+    """A deny depending on request context the engine cannot know is CONDITIONAL."""
+    [decision] = engine.evaluate(["ec2:CreateVolume"], ["Security"], ["ap-southeast-2"])
+    assert (decision.decision, decision.statement) == (CONDITIONAL, "Region-Guard/EBS")
+
+
+def test_account_targets_use_their_ou(engine):
+    """Accounts inherit the SCPs of their OU and its ancestors."""
+    [decision] = engine.evaluate(["ec2:CreateVpc"], ["Prod"], ["ap-southeast-2"])
+    assert decision.decision == DENIED
+
+
+def test_missing_allow_is_implicit_deny():
+    """Without FullAWSAccess, a level with no matching Allow denies implicitly."""
+    engine = PolicyEngine(
+        {"Allow-S3": {"Statement": [{"Effect": "Allow", "Action": "s3:*", "Resource": "*"}]}},
+        {("ou", "Root"): ["Allow-S3"], ("ou", "Workloads"): ["Allow-S3"]},
+        full_aws_access=False,
+    )
+    results = _decisions(engine, ["s3:GetObject", "ec2:RunInstances"], ["Workloads"], ["us-east-1"])
+    assert results[("s3:GetObject", "Workloads", "us-east-1")].decision == ALLOWED
+    implicit = results[("ec2:RunInstances", "Workloads", "us-east-1")]
+    assert (implicit.decision, implicit.level) == (IMPLICIT_DENY, "ou:Root")
+
+
+def test_permission_boundary(engine):
+    """Actions outside the boundary's Allow statements are implicitly denied."""
+    results = _decisions(engine, ["s3:PutObject", "ec2:RunInstances"], ["Security"], ["ap-southeast-2"], "Boundary")
+    assert results[("s3:PutObject", "Security", "ap-southeast-2")].decision == ALLOWED
+    boundary = results[("ec2:RunInstances", "Security", "ap-southeast-2")]
+    assert (boundary.decision, boundary.level) == (IMPLICIT_DENY, "boundary:Boundary")
+
+
+def test_build_engine_from_config(tmp_path):
+    """SCPs are loaded from organization-config.yaml with LZA policy variables substituted."""
+    (tmp_path / "replacements-config.yaml").write_text(
+        "globalReplacements:\n  - key: Home\n    type: String\n    value: ap-southeast-2\n"
+    )
+    (tmp_path / "global-config.yaml").write_text(
+        "homeRegion: {{ Home }}\nenabledRegions:\n  - {{ Home }}\n  - us-east-1\n"
+    )
+    (tmp_path / "accounts-config.yaml").write_text(
+        "mandatoryAccounts:\n  - name: Network\n    organizationalUnit: Infrastructure\n"
+    )
+    (tmp_path / "organization-config.yaml").write_text(
+        "organizationalUnits:\n  - name: Infrastructure\n"
+        "serviceControlPolicies:\n"
+        "  - name: Guard\n    policy: scp/guard.json\n"
+        "    deploymentTargets:\n      organizationalUnits:\n        - Infrastructure\n"
+    )
+    (tmp_path / "scp").mkdir()
+    (tmp_path / "scp" / "guard.json").write_text(json.dumps({
+        "Statement": [{
+            "Sid": "Home",
+            "Effect": "Deny",
+            "Action": "ec2:*",
+            "Resource": "*",
+            "Condition": {"StringNotEquals": {"aws:RequestedRegion": "${HOME_REGION}"}},
+        }]
+    }))
+
+    engine, ous, regions = evaluate_scps.build_engine(tmp_path)
+
+    assert ous == ["Infrastructure"]
+    assert regions == ["ap-southeast-2", "us-east-1"]
+    results = _decisions(engine, ["ec2:CreateVpc"], ["Network"], regions)
+    assert results[("ec2:CreateVpc", "Network", "ap-southeast-2")].decision == ALLOWED
+    assert results[("ec2:CreateVpc", "Network", "us-east-1")].decision == DENIED
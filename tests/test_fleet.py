@@ -0,0 +1,97 @@
+# tests/test_fleet.py
+import json
+import os
+import sys
+
+import pytest
+import yaml
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from preflight_checks import aws_checks, fleet
+from preflight_checks.aws_checks import ContextThreadPoolExecutor, get_aws_client
+from preflight_checks.credentials import credential_cache
+from preflight_checks.fleet import load_inventory
+
+INVENTORY = {"landingZones": [
+    {"name": "prod", "roleArn": "arn:aws:iam::111111111111:role/Preflight",
+     "regions": ["ap-southeast-2", "us-east-1"], "configDir": "prod/config"},
+    {"name": "staging", "roleArn": "arn:aws:iam::222222222222:role/Preflight",
+     "regions": "eu-west-1", "ctHomeRegion": "eu-west-2", "stackPrefix": "LZA"},
+    {"name": "broken", "roleArn": "arn:aws:iam::333333333333:role/Preflight", "regions": ["us-east-1"]},
+]}
+
+
+@pytest.fixture
+def inventory(tmp_path):
+    path = tmp_path / "landing-zones.yaml"
+    path.write_text(yaml.safe_dump(INVENTORY))
+    return path
+
+
+def test_inventory_defaults_and_validation(inventory, tmp_path):
+    prod, staging, _ = load_inventory(str(inventory))
+    assert prod.account_id == "111111111111"
+    assert (prod.settings.ct_home_region, prod.settings.stack_prefix) == ("ap-southeast-2", "AWSAccelerator-prod")
+    assert prod.settings.config_dir == str(tmp_path / "prod" / "config")
+    assert (staging.settings.regions, staging.settings.ct_home_region) == (["eu-west-1"], "eu-west-2")
+    assert staging.settings.stack_prefix == "LZA" and staging.settings.config_dir is None
+
+    invalid = tmp_path / "invalid.yaml"
+    invalid.write_text(yaml.safe_dump({"landingZones": INVENTORY["landingZones"][:1] * 2}))
+    with pytest.raises(ValueError, match="Duplicate landing zone"):
+        load_inventory(str(invalid))
+    invalid.write_text(yaml.safe_dump({"landingZones": [{"name": "x", "roleArn": "Preflight", "regions": ["a"]}]}))
+    with pytest.raises(ValueError, match="not an IAM role ARN"):
+        load_inventory(str(invalid))
+
+
+@mock_aws
+def test_landing_zones_are_checked_in_their_own_sessions(inventory, monkeypatch, capsys):
+    """Every check, and every worker task it submits, sees the account of its own landing zone."""
+    for name, value in (("AWS_ACCESS_KEY_ID", "testing"), ("AWS_SECRET_ACCESS_KEY", "testing")):
+        monkeypatch.setenv(name, value)
+    credential_cache.clear()
+    seen = []
+
+    def _caller_account(region):
+        return get_aws_client("sts", region_name=region).get_caller_identity()["Account"]
+
+    def check_cloudformation_stacks(region, stack_prefix):
+        if stack_prefix == "AWSAccelerator-broken":
+            raise ClientError({"Error": {"Code": "ExpiredToken", "Message": "expired"}}, "ListStacks")
+        with ContextThreadPoolExecutor(max_workers=2) as executor:
+            seen.append((stack_prefix, region, executor.submit(_caller_account, region).result()))
+        return True
+
+    monkeypatch.setattr(aws_checks, "check_cloudformation_stacks", check_cloudformation_stacks)
+    monkeypatch.setattr(aws_checks, "check_control_tower_landing_zone", lambda region: region != "eu-west-2")
+    # Keep the config-driven checks out of this test
+    landing_zones = [{key: value for key, value in entry.items() if key != "configDir"}
+                     for entry in INVENTORY["landingZones"]]
+    inventory.write_text(yaml.safe_dump({"landingZones": landing_zones}))
+
+    monkeypatch.setattr(sys, "argv", ["fleet.py", str(inventory)])
+    with pytest.raises(SystemExit) as exit_info:
+        fleet.main()
+    assert exit_info.value.code == 1
+    records = {record["landingZone"]: record for record in map(json.loads, capsys.readouterr().out.splitlines())}
+    assert records["prod"]["passed"] is True
+    assert records["prod"]["checks"] == {"cloudformation": True, "control_tower": True}
+    assert records["staging"]["checks"] == {"cloudformation": True, "control_tower": False}
+    assert records["broken"]["passed"] is False and "ExpiredToken" in records["broken"]["error"]
+    assert sorted(seen) == [
+        ("AWSAccelerator-prod", "ap-southeast-2", "111111111111"),
+        ("AWSAccelerator-prod", "us-east-1", "111111111111"),
+        ("LZA", "eu-west-1", "222222222222"),
+    ]
+    # The pipeline's own session is untouched
+    assert get_aws_client("sts", region_name="us-east-1").get_caller_identity()["Account"] == "123456789012"
+
+    monkeypatch.setattr(sys, "argv", ["fleet.py", str(inventory), "--only", "prod"])
+    with pytest.raises(SystemExit) as exit_info:
+        fleet.main()
+    assert exit_info.value.code == 0
+    assert [json.loads(line)["landingZone"] for line in capsys.readouterr().out.splitlines()] == ["prod"]
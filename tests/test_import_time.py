@@ -0,0 +1,75 @@
+# tests/test_import_time.py
+"""
+Cold-start budget for the command line entry points.
+
+Each entry point is imported in a fresh interpreter with ``-X importtime`` and
+its cumulative import time is compared against a budget. Heavy dependencies
+(boto3, requests, jsonschema) must only be imported by the code paths that
+use them, so they are also checked explicitly.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+WORKSPACE_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SCRIPTS_DIR = os.path.join(WORKSPACE_ROOT, 'scripts')
+
+# Cumulative import time budget per entry point, in milliseconds.
+IMPORT_TIME_BUDGET_MS = {
+    "preflight_checks.aws_checks": 100,
+    "preflight_checks.fleet": 100,
+    "validate_landing_zone_schema": 100,
+    "validate_replacements": 100,
+    "validate_json_configs": 100,
+    "watch_config": 100,
+    "evaluate_scps": 100,
+    "validate_domain_lists": 100,
+    "estimate_stack_sizes": 100,
+    "validate_environments": 100,
+    "validate_cfn_templates": 100,
+    "analyze_tgw_routing": 100,
+    "diff_deployed_config": 100,
+}
+
+# Modules that must not be imported at startup by any entry point.
+DEFERRED_MODULES = {"boto3", "requests", "jsonschema", "jinja2"}
+
+
+def _import_profile(module_name):
+    """Imports module_name in a fresh interpreter and returns {module: cumulative_us}."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([WORKSPACE_ROOT, SCRIPTS_DIR])
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+        cwd=WORKSPACE_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            timings[name.strip()] = int(cumulative)
+    return timings
+
+
+@pytest.mark.parametrize("module_name", sorted(IMPORT_TIME_BUDGET_MS))
+def test_entry_point_import_time_budget(module_name):
+    """Entry point cold start stays within budget and defers heavy imports."""
+    timings = _import_profile(module_name)
+    assert module_name in timings
+
+    eagerly_imported = DEFERRED_MODULES & set(timings)
+    assert not eagerly_imported, f"{module_name} imports {sorted(eagerly_imported)} at startup"
+
+    import_ms = timings[module_name] / 1000
+    budget_ms = IMPORT_TIME_BUDGET_MS[module_name]
+    assert import_ms <= budget_ms, (
+        f"{module_name} took {import_ms:.1f} ms to import (budget {budget_ms} ms)"
+    )
@@ -0,0 +1,104 @@
+# tests/test_organization_checks.py
+import logging
+import os
+import sys
+from unittest.mock import patch
+
+import boto3
+import pytest
+from moto import mock_aws
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from preflight_checks import organization_checks
+
+HOME_REGION = "ap-southeast-2"
+
+
+@pytest.fixture(autouse=True)
+def aws_credentials(monkeypatch):
+    """Fake AWS credentials for moto and an empty tree cache."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", HOME_REGION)
+    organization_checks._tree_cache.clear()
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    (tmp_path / "global-config.yaml").write_text(f"homeRegion: {HOME_REGION}\n")
+    (tmp_path / "organization-config.yaml").write_text(
+        "organizationalUnits:\n"
+        "  - name: Security\n"
+        "  - name: SomeEnv\n"
+        "  - name: SomeEnv/Production\n"
+        "  - name: Sandbox\n"
+        "  - name: Suspended\n"
+        "    ignore: true\n"
+    )
+    (tmp_path / "accounts-config.yaml").write_text(
+        "mandatoryAccounts:\n"
+        "  - name: Audit\n    email: audit@example.com\n    organizationalUnit: Security\n"
+        "workloadAccounts:\n"
+        "  - name: Production\n    email: production@example.com\n    organizationalUnit: SomeEnv/Production\n"
+        "  - name: Future\n    email: future@example.com\n    organizationalUnit: Sandbox\n"
+    )
+    return tmp_path
+
+
+def _build_organization(production_ou="SomeEnv/Production"):
+    """Creates Security, SomeEnv/Production, Suspended and Legacy OUs with three accounts."""
+    org_client = boto3.client("organizations", region_name=HOME_REGION)
+    org_client.create_organization(FeatureSet="ALL")
+    root_id = org_client.list_roots()["Roots"][0]["Id"]
+    ou_ids = {}
+    for path in ["Security", "SomeEnv", "SomeEnv/Production", "Suspended", "Legacy"]:
+        parent, _, name = path.rpartition("/")
+        parent_id = ou_ids[parent] if parent else root_id
+        ou_ids[path] = org_client.create_organizational_unit(ParentId=parent_id, Name=name)["OrganizationalUnit"]["Id"]
+    for email, ou in [
+        ("audit@example.com", "Security"),
+        ("production@example.com", production_ou),
+        ("old@example.com", "Suspended"),
+    ]:
+        account_id = org_client.create_account(AccountName=email.split("@")[0], Email=email)["CreateAccountStatus"]["AccountId"]
+        org_client.move_account(AccountId=account_id, SourceParentId=root_id, DestinationParentId=ou_ids[ou])
+    return org_client
+
+
+@mock_aws
+def test_fetch_organization_tree_builds_paths_and_memoizes():
+    """The live tree is keyed by OU path and fetched once per run."""
+    org_client = _build_organization()
+
+    tree = organization_checks.fetch_organization_tree(org_client, max_workers=4)
+
+    assert set(tree.ous) == {"Security", "SomeEnv", "SomeEnv/Production", "Suspended", "Legacy"}
+    assert tree.accounts["production@example.com"].ou == "SomeEnv/Production"
+    with patch.object(organization_checks, "_expand") as expand:
+        assert organization_checks.fetch_organization_tree(org_client) is tree
+        expand.assert_not_called()
+
+
+@mock_aws
+def test_matching_organization_passes(config_dir, caplog):
+    """Extra and missing OUs/accounts are reported without failing the check."""
+    caplog.set_level(logging.INFO)
+    _build_organization()
+
+    assert organization_checks.check_organization_structure(str(config_dir)) is True
+    assert "OU 'Legacy' is not in organization-config.yaml" in caplog.text
+    assert "OU 'Sandbox' does not exist yet" in caplog.text
+    assert "account 'Future' (future@example.com) does not exist yet" in caplog.text
+    # Accounts and OUs under ignored OUs are not reported
+    assert "old@example.com" not in caplog.text
+    assert "OU 'Suspended'" not in caplog.text
+
+
+@mock_aws
+def test_misplaced_account_fails(config_dir, caplog):
+    """An account in a different OU than accounts-config.yaml says fails the check."""
+    _build_organization(production_ou="SomeEnv")
+
+    assert organization_checks.check_organization_structure(str(config_dir)) is False
+    assert "is in OU 'SomeEnv', accounts-config.yaml expects 'SomeEnv/Production'" in caplog.text
@@ -0,0 +1,103 @@
+# tests/test_profiling.py
+import glob
+import json
+import os
+import sys
+import threading
+
+import boto3
+import pytest
+from moto import mock_aws
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from preflight_checks import profiling
+
+TEST_REGION = "us-east-1"
+
+
+@pytest.fixture(autouse=True)
+def aws_credentials(monkeypatch):
+    """Set fake AWS credentials for moto and clear profiling variables."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", TEST_REGION)
+    monkeypatch.delenv(profiling.PROFILE_ENV_VAR, raising=False)
+    monkeypatch.delenv(profiling.PROFILE_DIR_ENV_VAR, raising=False)
+
+
+def _load_trace(output_dir):
+    trace_files = glob.glob(os.path.join(output_dir, "*.trace.json"))
+    assert len(trace_files) == 1
+    with open(trace_files[0]) as f:
+        return json.load(f)["traceEvents"]
+
+
+def test_profiling_requested_env_and_flag(monkeypatch):
+    """Profiling is requested via LZA_PROFILE or --profile."""
+    assert profiling.profiling_requested([]) is False
+    assert profiling.profiling_requested(["--profile"]) is True
+    monkeypatch.setenv(profiling.PROFILE_ENV_VAR, "1")
+    assert profiling.profiling_requested([]) is True
+
+
+def test_span_is_noop_when_disabled(tmp_path):
+    """Spans outside a session record nothing and write no files."""
+    with profiling.profile_session("noop", enabled=False, output_dir=str(tmp_path)) as recorder:
+        with profiling.span("work"):
+            pass
+    assert recorder is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_session_writes_profile_and_trace(tmp_path):
+    """A session writes a cProfile dump and a trace with nested and worker spans."""
+    def worker_task():
+        with profiling.span("in-worker", cat="worker"):
+            pass
+
+    with profiling.profile_session("unit", enabled=True, output_dir=str(tmp_path)):
+        with profiling.span("outer", cat="check"):
+            with profiling.span("inner", cat="file", file="a.yaml"):
+                pass
+            worker = threading.Thread(target=worker_task, name="pool-worker")
+            worker.start()
+            worker.join()
+
+    assert len(glob.glob(os.path.join(tmp_path, "unit-*.prof"))) == 1
+    events = _load_trace(str(tmp_path))
+    spans = {event["name"]: event for event in events if event["ph"] == "X"}
+    assert {"unit", "outer", "inner", "in-worker"} <= set(spans)
+    assert spans["inner"]["args"] == {"file": "a.yaml"}
+    assert spans["inner"]["ts"] >= spans["outer"]["ts"]
+    thread_names = [event["args"]["name"] for event in events if event["ph"] == "M"]
+    assert {"MainThread", "pool-worker"} <= set(thread_names)
+    assert spans["in-worker"]["tid"] != spans["inner"]["tid"]
+
+
+def test_session_writes_files_on_system_exit(tmp_path):
+    """Files are still written when the profiled entry point calls sys.exit."""
+
+    @profiling.profiled("exiting")
+    def entry_point():
+        sys.exit(1)
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv(profiling.PROFILE_ENV_VAR, "1")
+        mp.setenv(profiling.PROFILE_DIR_ENV_VAR, str(tmp_path))
+        with pytest.raises(SystemExit):
+            entry_point()
+    assert len(glob.glob(os.path.join(tmp_path, "exiting-*.prof"))) == 1
+
+
+@mock_aws
+def test_instrumented_client_records_api_spans(tmp_path):
+    """Each AWS API call made through an instrumented client becomes a span."""
+    with profiling.profile_session("api", enabled=True, output_dir=str(tmp_path)):
+        client = profiling.instrument_client(boto3.client("cloudformation", region_name=TEST_REGION))
+        client.list_stacks()
+    events = _load_trace(str(tmp_path))
+    api_spans = [event for event in events if event.get("cat") == "aws_api"]
+    assert [event["name"] for event in api_spans] == ["cloudformation.ListStacks"]
+    assert api_spans[0]["args"]["region"] == TEST_REGION
+    assert api_spans[0]["args"]["status"] == 200
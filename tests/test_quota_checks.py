@@ -0,0 +1,169 @@
+# tests/test_quota_checks.py
+import os
+import sys
+from collections import Counter
+from unittest.mock import MagicMock
+
+import boto3
+import pytest
+from moto import mock_aws
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from preflight_checks import quota_checks
+
+REGION = "ap-southeast-2"
+
+NETWORK_CONFIG = {
+    "transitGateways": [{"name": "Main", "account": "Network", "region": REGION, "routeTables": [
+        {"name": "Core", "routes": []},
+        {"name": "Segregated", "routes": [{"destinationCidrBlock": "10.0.0.0/8"}, {"destinationCidrBlock": "0.0.0.0/0"}]},
+    ]}],
+    "centralNetworkServices": {"networkFirewall": {"firewalls": [{"name": "fw", "vpc": "Egress"}]}},
+    "vpcs": [{
+        "name": "Egress",
+        "account": "Network",
+        "region": REGION,
+        "internetGateway": True,
+        "subnets": [
+            {"name": "Pub-A", "availabilityZone": "a"},
+            {"name": "Pub-B", "availabilityZone": "b"},
+        ],
+        "natGateways": [{"name": "Nat-A", "subnet": "Pub-A"}, {"name": "Nat-B", "subnet": "Pub-B"}],
+        "routeTables": [{"name": "Pub", "routes": [{"name": "a"}, {"name": "b"}, {"name": "c"}]}],
+        "transitGatewayAttachments": [{"name": "Egress", "transitGateway": {"name": "Main", "account": "Network"}}],
+    }],
+    "vpcTemplates": [{
+        "name": "Workload",
+        "region": REGION,
+        "deploymentTargets": {"organizationalUnits": ["Workloads"]},
+        "interfaceEndpoints": {"endpoints": [{"service": "ec2"}, {"service": "ssm"}]},
+        "transitGatewayAttachments": [{"name": "Workload", "transitGateway": {"name": "Main", "account": "Network"}}],
+    }],
+}
+
+ACCOUNTS_CONFIG = {
+    "workloadAccounts": [
+        {"name": "Network", "organizationalUnit": "Infrastructure"},
+        {"name": "Dev", "organizationalUnit": "Workloads/Dev"},
+        {"name": "Prod", "organizationalUnit": "Workloads/Prod"},
+    ]
+}
+
+
+def _quota_client(values):
+    """A service-quotas client whose applied quotas are {code: value}."""
+    client = MagicMock()
+
+    def paginate(ServiceCode):
+        return [{"Quotas": [
+            {"QuotaCode": code, "QuotaName": f"quota {code}", "Value": value}
+            for code, value in values.items()
+        ]}]
+
+    client.get_paginator.return_value.paginate.side_effect = paginate
+    return client
+
+
+def test_project_network_usage():
+    """Resources are counted per account and region, including every vpcTemplates target."""
+    projection = quota_checks.project_network_usage(NETWORK_CONFIG, ACCOUNTS_CONFIG)
+
+    network = projection[("Network", REGION)]
+    assert network[("vpcs", "")] == 1
+    assert network[("internet_gateways", "")] == 1
+    assert network[("subnets", "Egress")] == 2
+    assert network[("nat_gateways", f"{REGION}a")] == 1
+    assert network[("routes", "Egress/Pub")] == 3
+    assert network[("transit_gateways", "")] == 1
+    assert network[("transit_gateway_routes", "Main/Segregated")] == 2
+    assert ("transit_gateway_routes", "Main/Core") not in network
+    assert network[("firewalls", "")] == 1
+    # One attachment from the Egress VPC and one from each vpcTemplates target
+    assert network[("transit_gateway_attachments", "Main")] == 3
+    assert projection[("Dev", REGION)] == Counter({("vpcs", ""): 1, ("interface_endpoints", "Workload"): 2})
+    assert ("Prod", REGION) in projection
+
+
+def test_quota_cache_fetches_each_service_once():
+    """Quotas are listed once per account, region and service and looked up by code or name."""
+    cache = quota_checks.ServiceQuotaCache()
+    client = _quota_client({"L-F678F1CE": 5.0, "L-OTHER": 7.0})
+
+    assert cache.get(client, "111111111111", REGION, quota_checks.QUOTAS["vpcs"]) == 5.0
+    assert cache.get(client, "111111111111", REGION, quota_checks.QuotaSpec("vpc", "", "quota L-OTHER")) == 7.0
+    # Default and applied listings, for one service
+    assert client.get_paginator.call_count == 2
+
+
+@mock_aws
+def test_existing_unmanaged_vpcs_count_towards_quota(monkeypatch):
+    """VPCs that exist but are not in the config are added to the projected count."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    ec2_client = boto3.client("ec2", region_name=REGION)
+    for name, cidr in [("Egress", "10.0.0.0/16"), ("Legacy", "10.1.0.0/16")]:
+        ec2_client.create_vpc(
+            CidrBlock=cidr, TagSpecifications=[{"ResourceType": "vpc", "Tags": [{"Key": "Name", "Value": name}]}]
+        )
+    quota_client = _quota_client({"L-F678F1CE": 2.0, "L-407747CB": 200.0})
+    monkeypatch.setattr(
+        quota_checks, "get_aws_client",
+        lambda service, **kwargs: quota_client if service == "service-quotas" else ec2_client,
+    )
+    monkeypatch.setattr(quota_checks, "quota_cache", quota_checks.ServiceQuotaCache())
+    counts = Counter({("vpcs", ""): 2, ("subnets", "Egress"): 170})
+
+    messages = quota_checks.check_location(
+        "Network", "111111111111", REGION, counts, {"vpcs": {"Egress"}, "nat_gateways": set(), "transit_gateways": set(),
+                                                    "transit_gateway_attachments": set()}, None
+    )
+
+    assert messages == [
+        ("warning", f"Network {REGION} Egress: Subnets per VPC would be 170 of 200"),
+        ("error", f"Network {REGION}: VPCs per Region would be 3, quota is 2"),
+    ]
+
+
+@mock_aws
+def test_existing_unmanaged_transit_gateway_attachments(monkeypatch):
+    """Attachments to a configured transit gateway that are not in the config use its attachment quota."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    ec2_client = boto3.client("ec2", region_name=REGION)
+
+    tgw_id = ec2_client.create_transit_gateway(TagSpecifications=[
+        {"ResourceType": "transit-gateway", "Tags": [{"Key": "Name", "Value": "Main"}]}
+    ])["TransitGateway"]["TransitGatewayId"]
+    for name, cidr in [("Egress", "10.0.0.0/16"), ("Legacy", "10.1.0.0/16")]:
+        vpc_id = ec2_client.create_vpc(CidrBlock=cidr)["Vpc"]["VpcId"]
+        subnet_id = ec2_client.create_subnet(VpcId=vpc_id, CidrBlock=cidr.replace("/16", "/24"))["Subnet"]["SubnetId"]
+        attachment = ec2_client.create_transit_gateway_vpc_attachment(TransitGatewayId=tgw_id, VpcId=vpc_id, SubnetIds=[subnet_id])
+        ec2_client.create_tags(Resources=[attachment["TransitGatewayVpcAttachment"]["TransitGatewayAttachmentId"]],
+                               Tags=[{"Key": "Name", "Value": name}])
+    counts = Counter({("transit_gateways", ""): 1, ("transit_gateway_attachments", "Main"): 3})
+    config_names = {"vpcs": set(), "nat_gateways": set(), "transit_gateways": {"Main"},
+                    "transit_gateway_attachments": {"Egress", "Workload"}}
+
+    extra = quota_checks.existing_unmanaged(ec2_client, counts, config_names, "123456789012")
+
+    assert +extra == Counter({("transit_gateway_attachments", "Main"): 1})
+
+
+def test_cross_account_transit_gateway_attachments_are_not_counted():
+    """Attachments of VPCs in other accounts carry their Name tag there, so they are not counted as unmanaged."""
+    ec2_client = MagicMock()
+    ec2_client.describe_transit_gateways.return_value = {"TransitGateways": [
+        {"TransitGatewayId": "tgw-1", "State": "available", "Tags": [{"Key": "Name", "Value": "Main"}]},
+    ]}
+    ec2_client.get_paginator.return_value.paginate.return_value = [{"TransitGatewayAttachments": [
+        {"TransitGatewayId": "tgw-1", "ResourceOwnerId": "222222222222", "ResourceId": "vpc-workload"},
+        {"TransitGatewayId": "tgw-1", "ResourceOwnerId": "111111111111", "ResourceId": "vpc-legacy"},
+    ]}]
+    counts = Counter({("transit_gateway_attachments", "Main"): 2})
+    config_names = {"vpcs": set(), "nat_gateways": set(), "transit_gateways": {"Main"},
+                    "transit_gateway_attachments": {"Workload"}}
+
+    extra = quota_checks.existing_unmanaged(ec2_client, counts, config_names, "111111111111")
+
+    assert +extra == Counter({("transit_gateway_attachments", "Main"): 1})
@@ -0,0 +1,127 @@
+# tests/test_rate_limiting.py
+import os
+import sys
+
+import pytest
+from botocore.awsrequest import AWSResponse
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from preflight_checks import rate_limiting
+from preflight_checks.aws_checks import get_aws_client
+from preflight_checks.rate_limiting import MIN_RATE_RATIO, RateLimiter, TokenBucket, parse_rates
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    """A fresh process-wide limiter with low CloudFormation rates, and fake credentials."""
+    for name, value in (("AWS_ACCESS_KEY_ID", "testing"), ("AWS_SECRET_ACCESS_KEY", "testing")):
+        monkeypatch.setenv(name, value)
+    limiter = RateLimiter({("cloudformation", None): (2.0, 1.0)})
+    monkeypatch.setattr(rate_limiting, "_rate_limiter", limiter)
+    return limiter
+
+
+def test_token_bucket_allows_a_burst_then_paces_callers():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=4, burst=2, clock=clock, sleep=clock.sleep)
+    assert [bucket.acquire() for _ in range(4)] == [0.0, 0.0, 0.25, 0.25]
+    # Idle time refills the bucket up to the burst size only
+    clock.now += 10
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.25]
+
+
+def test_throttling_halves_the_rate_and_success_restores_it():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=8, clock=clock, sleep=clock.sleep)
+    bucket.throttled()
+    assert bucket.rate == 4
+    # The bucket is drained, so the next caller waits at the lowered rate
+    assert bucket.acquire() == pytest.approx(0.25)
+    for _ in range(10):
+        bucket.throttled()
+    assert bucket.rate == 8 * MIN_RATE_RATIO
+    for _ in range(100):
+        bucket.succeeded()
+    assert bucket.rate == 8
+
+
+def test_bucket_keys_and_configured_rates():
+    limiter = RateLimiter(parse_rates("cloudformation.DescribeStackEvents=3/6, organizations=1,*=0,bad"))
+    events = limiter.bucket("cloudformation", "DescribeStackEvents", "ap-southeast-2", "111111111111")
+    assert (events.rate, events.burst) == (3, 6)
+    # Member accounts and regions have their own buckets
+    assert limiter.bucket("cloudformation", "DescribeStackEvents", "ap-southeast-2", "222222222222") is not events
+    assert limiter.bucket("cloudformation", "DescribeStackEvents", "us-east-1", "111111111111") is not events
+    assert limiter.bucket("cloudformation", "DescribeStackEvents", "ap-southeast-2", "111111111111") is events
+    # Organizations limits apply to the organization, in every region
+    organizations = limiter.bucket("organizations", "ListAccounts", None, "111111111111")
+    assert organizations.rate == 1
+    assert limiter.bucket("organizations", "ListAccounts", "us-east-1", "222222222222") is organizations
+    # ...unless the session names the organization, as fleet runs do for each landing zone
+    assert limiter.bucket("organizations", "ListAccounts", None, "111111111111", "prod") is not organizations
+    # Defaults still apply to services that are not overridden; "*=0" turns off the rest
+    assert limiter.bucket("controltower", "ListLandingZones", "us-east-1", None).rate == 2
+    assert limiter.bucket("ec2", "DescribeVpcs", "us-east-1", None) is None
+
+
+class Responder:
+    """Answers every request attempt with the next canned (status, body) before it is sent."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+
+    def __call__(self, request=None, **kwargs):
+        status, body = self.responses.pop(0)
+        return AWSResponse(request.url, status, {}, _Raw(body))
+
+
+class _Raw:
+    def __init__(self, body):
+        self.body = body
+
+    def stream(self, **kwargs):
+        yield self.body
+
+
+STACKS = b"<DescribeStacksResponse><DescribeStacksResult><Stacks/></DescribeStacksResult></DescribeStacksResponse>"
+THROTTLED = b"<ErrorResponse><Error><Type>Sender</Type><Code>Throttling</Code><Message>Rate exceeded</Message></Error></ErrorResponse>"
+
+
+def test_get_aws_client_waits_for_tokens_and_backs_off_on_throttling(limiter, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiting.TokenBucket, "__init__", _with_clock(clock))
+    client = get_aws_client("cloudformation", region_name="us-east-1", config=Config(retries={"total_max_attempts": 1}))
+    client.meta.events.register("before-send", Responder([(200, STACKS)] * 3 + [(400, THROTTLED)]))
+    for _ in range(3):
+        client.describe_stacks()
+    # A burst of one at 2 requests per second
+    assert clock.sleeps == [0.5, 0.5]
+    with pytest.raises(ClientError):
+        client.describe_stacks()
+    assert limiter.bucket("cloudformation", "DescribeStacks", "us-east-1", None).rate == 1.0
+    assert limiter.bucket("cloudformation", "DescribeStacks", "us-east-1", "111111111111") is not None
+
+
+def _with_clock(clock):
+    original = TokenBucket.__init__
+
+    def __init__(self, rate, burst=None, **kwargs):
+        original(self, rate, burst, clock=clock, sleep=clock.sleep)
+
+    return __init__
@@ -0,0 +1,118 @@
+# tests/test_stackset_checks.py
+import logging
+import os
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+import yaml
+from botocore.exceptions import ClientError
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from preflight_checks import stackset_checks
+from preflight_checks.stackset_checks import UNHEALTHY_STATUSES, check_stackset_instances
+
+REGION = "ap-southeast-2"
+
+
+def _instance(account, status, operation_id="op-1"):
+    return {
+        "StackSetId": "GitHubOICDProvider:1", "Account": account, "Region": REGION,
+        "Status": "OUTDATED", "StackInstanceStatus": {"DetailedStatus": status},
+        "OrganizationalUnitId": "ou-abcd-12345678", "LastOperationId": operation_id,
+        "StatusReason": "Account was not found",
+    }
+
+
+class FakeCloudFormation:
+    """Answers the StackSet listings from in-memory instances, recording every call."""
+
+    def __init__(self, instances=None, operations=None, results=None, error=None):
+        self.instances = instances or {}
+        self.operations = operations or []
+        self.results = results or {}
+        self.error = error
+        self.calls = []
+
+    def get_paginator(self, operation):
+        paginator = MagicMock()
+        paginator.paginate.side_effect = lambda **kwargs: self._paginate(operation, kwargs)
+        return paginator
+
+    def _paginate(self, operation, kwargs):
+        self.calls.append((operation, kwargs))
+        if self.error:
+            raise ClientError({"Error": {"Code": self.error, "Message": self.error}}, operation)
+        if operation == "list_stack_instances":
+            status = kwargs["Filters"][0]["Values"]
+            # Server-side filtering: only matching instances are returned
+            return [{"Summaries": [i for i in self.instances.get(kwargs["StackSetName"], [])
+                                   if i["StackInstanceStatus"]["DetailedStatus"] == status]}]
+        return [{"Summaries": self.results.get(kwargs["OperationId"], [])}]
+
+    def list_stack_set_operations(self, **kwargs):
+        self.calls.append(("list_stack_set_operations", kwargs))
+        if self.error:
+            raise ClientError({"Error": {"Code": self.error, "Message": self.error}}, "ListStackSetOperations")
+        return {"Summaries": self.operations}
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    stacksets = [{"name": name, "template": "t.yaml"} for name in ("GitHubOICDProvider", "Baseline")]
+    (tmp_path / "customizations-config.yaml").write_text(
+        yaml.safe_dump({"customizations": {"cloudFormationStackSets": stacksets}})
+    )
+    (tmp_path / "global-config.yaml").write_text(yaml.safe_dump({"homeRegion": REGION}))
+    return str(tmp_path)
+
+
+def _use(monkeypatch, client):
+    regions = []
+    monkeypatch.setattr(stackset_checks, "get_aws_client",
+                        lambda service, region_name=None: regions.append(region_name) or client)
+    return regions
+
+
+def test_healthy_stacksets_are_listed_with_server_side_filters(monkeypatch, config_dir):
+    """Each StackSet is listed once per unhealthy status; healthy instances are never fetched."""
+    client = FakeCloudFormation(instances={"Baseline": [_instance(str(i).zfill(12), "SUCCEEDED") for i in range(2000)]})
+    regions = _use(monkeypatch, client)
+    assert check_stackset_instances(config_dir, "us-east-1") is True
+    assert regions == [REGION]
+    listings = [kwargs for operation, kwargs in client.calls if operation == "list_stack_instances"]
+    assert len(listings) == 2 * len(UNHEALTHY_STATUSES)
+    assert {(kwargs["StackSetName"], kwargs["Filters"][0]["Values"]) for kwargs in listings} == {
+        (name, status) for name in ("GitHubOICDProvider", "Baseline") for status in UNHEALTHY_STATUSES
+    }
+    assert not any(operation == "list_stack_set_operation_results" for operation, _ in client.calls)
+
+
+def test_unhealthy_instances_report_their_operation_failure(monkeypatch, config_dir, caplog):
+    """Operation results are fetched once per distinct last operation and preferred over the summary reason."""
+    instances = [_instance("111111111111", "FAILED"), _instance("222222222222", "FAILED"),
+                 _instance("333333333333", "INOPERABLE", operation_id="op-2")]
+    results = {"op-1": [{"Account": "111111111111", "Region": REGION, "Status": "FAILED",
+                         "StatusReason": "ResourceLogicalId:GitHubOIDCProvider, ResourceStatusReason:Provider exists"}]}
+    client = FakeCloudFormation(instances={"GitHubOICDProvider": instances}, results=results,
+                                operations=[{"OperationId": "op-3", "Action": "UPDATE", "Status": "RUNNING"}])
+    _use(monkeypatch, client)
+    assert check_stackset_instances(config_dir, REGION) is False
+    fetched = sorted(kwargs["OperationId"] for operation, kwargs in client.calls
+                     if operation == "list_stack_set_operation_results")
+    assert fetched == ["op-1", "op-2"]
+    assert "StackSet GitHubOICDProvider: 3 unhealthy stack instance(s) (FAILED=2, INOPERABLE=1)" in caplog.text
+    assert "FAILED OUTDATED: 111111111111 (ou-abcd-12345678) ap-southeast-2: ResourceLogicalId:GitHubOIDCProvider" in caplog.text
+    assert "FAILED OUTDATED: 222222222222 (ou-abcd-12345678) ap-southeast-2: Account was not found" in caplog.text
+    assert "operation op-3 (UPDATE) is RUNNING" in caplog.text
+
+
+@pytest.mark.parametrize("code, passed", [("StackSetNotFoundException", True), ("AccessDeniedException", True),
+                                          ("ThrottlingException", False)])
+def test_missing_or_inaccessible_stacksets(monkeypatch, config_dir, caplog, code, passed):
+    caplog.set_level(logging.INFO)
+    _use(monkeypatch, FakeCloudFormation(error=code))
+    assert check_stackset_instances(config_dir, REGION) is passed
+    if code == "StackSetNotFoundException":
+        assert "StackSet Baseline does not exist yet" in caplog.text
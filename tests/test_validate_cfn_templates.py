@@ -0,0 +1,202 @@
+# tests/test_validate_cfn_templates.py
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+
+import validate_cfn_templates
+from validate_cfn_templates import SpecIndex, TemplateChecker, check_customization_parameters, load_template
+
+CONFIG_DIR = Path(os.path.dirname(__file__)) / '..' / 'config'
+
+# A trimmed resource specification in the published format
+SPEC = {
+    "ResourceSpecificationVersion": "1.0.0",
+    "PropertyTypes": {
+        "AWS::IAM::Role.Policy": {"Properties": {
+            "PolicyDocument": {"Required": True, "PrimitiveType": "Json"},
+            "PolicyName": {"Required": True, "PrimitiveType": "String"},
+        }},
+        "Tag": {"Properties": {
+            "Key": {"Required": True, "PrimitiveType": "String"},
+            "Value": {"Required": True, "PrimitiveType": "String"},
+        }},
+    },
+    "ResourceTypes": {
+        "AWS::IAM::Role": {
+            "Attributes": {"Arn": {"PrimitiveType": "String"}, "RoleId": {"PrimitiveType": "String"}},
+            "Properties": {
+                "AssumeRolePolicyDocument": {"Required": True, "PrimitiveType": "Json"},
+                "Description": {"Required": False, "PrimitiveType": "String"},
+                "ManagedPolicyArns": {"Required": False, "Type": "List", "PrimitiveItemType": "String"},
+                "Policies": {"Required": False, "Type": "List", "ItemType": "Policy"},
+                "RoleName": {"Required": False, "PrimitiveType": "String"},
+                "Tags": {"Required": False, "Type": "List", "ItemType": "Tag"},
+            },
+        },
+        "AWS::IAM::OIDCProvider": {
+            "Attributes": {"Arn": {"PrimitiveType": "String"}},
+            "Properties": {
+                "ClientIdList": {"Required": False, "Type": "List", "PrimitiveItemType": "String"},
+                "ThumbprintList": {"Required": False, "Type": "List", "PrimitiveItemType": "String"},
+                "Url": {"Required": False, "PrimitiveType": "String"},
+            },
+        },
+        "AWS::SSM::Parameter": {
+            "Attributes": {"Type": {"PrimitiveType": "String"}, "Value": {"PrimitiveType": "String"}},
+            "Properties": {
+                "Description": {"Required": False, "PrimitiveType": "String"},
+                "Name": {"Required": False, "PrimitiveType": "String"},
+                "Tier": {"Required": False, "PrimitiveType": "String"},
+                "Type": {"Required": True, "PrimitiveType": "String"},
+                "Value": {"Required": True, "PrimitiveType": "String"},
+            },
+        },
+    },
+}
+
+BROKEN_TEMPLATE = """\
+AWSTemplateFormatVersion: 2010-09-09
+Parameters:
+  Env:
+    Type: String
+Conditions:
+  IsProd: !Equals [!Ref Env, prod]
+Resources:
+  Role:
+    Type: AWS::IAM::Role
+    Properties:
+      RoleName: !Sub "${Env}-${Missing}-${AWS::Region}"
+      Policies:
+        - PolicyName: inline
+      Tags:
+        - Key: env
+          Value: !If [IsStaging, a, b]
+      Colour: blue
+  Param:
+    Type: AWS::SSM::Parameter
+    DependsOn: Nothing
+    Properties:
+      Type: String
+      Value: !GetAtt Role.Nope
+  Lambda:
+    Type: AWS::Lambda::Whatever
+  Custom:
+    Type: Custom::Thing
+    Properties:
+      Anything: !Ref Nowhere
+Outputs:
+  Arn:
+    Value: !GetAtt [Role, Arn]
+"""
+
+
+@pytest.fixture
+def spec(tmp_path):
+    path = tmp_path / "spec.json"
+    path.write_text(json.dumps(SPEC))
+    return path
+
+
+def _messages(report):
+    return sorted((d.line, d.message) for d in report.diagnostics)
+
+
+def test_loader_expands_short_form_tags():
+    template, _node = load_template(
+        "A: !Ref X\nB: !GetAtt R.Endpoint.Address\nC: !Sub ['${a}', {a: !Ref Y}]\nD: 2010-09-09\n"
+    )
+    assert template == {
+        "A": {"Ref": "X"},
+        "B": {"Fn::GetAtt": ["R", "Endpoint.Address"]},
+        "C": {"Fn::Sub": ["${a}", {"a": {"Ref": "Y"}}]},
+        "D": "2010-09-09",
+    }
+
+
+def test_spec_index_is_built_once_and_cached(spec):
+    index = SpecIndex.load(spec)
+    assert index.resources["AWS::IAM::Role"]["properties"]["Policies"] == [False, "AWS::IAM::Role.Policy", "List"]
+    assert index.resources["AWS::IAM::Role"]["properties"]["Tags"][1] == "Tag"
+    index_path = spec.with_name("spec.index.json")
+    assert index_path.exists()
+    # Later loads read the index, not the specification
+    spec_json = json.loads(index_path.read_text())
+    spec_json["version"] = "from-index"
+    index_path.write_text(json.dumps(spec_json))
+    assert SpecIndex.load(spec).version == "from-index"
+    # A changed specification rebuilds the index
+    spec.write_text(json.dumps({**SPEC, "ResourceSpecificationVersion": "2.0.0"}))
+    assert SpecIndex.load(spec).version == "2.0.0"
+    assert SpecIndex.load(spec.with_name("absent.json")) is None
+
+
+def test_checker_reports_template_problems(spec, tmp_path):
+    path = tmp_path / "broken.yaml"
+    path.write_text(BROKEN_TEMPLATE)
+    report = TemplateChecker(SpecIndex.load(spec)).check(path)
+    assert _messages(report) == [
+        (11, "Fn::Sub references unknown parameter or resource 'Missing'"),
+        (11, "resource 'Role' is missing required property 'AssumeRolePolicyDocument'"),
+        (13, "resource 'Role' is missing required property 'PolicyDocument'"),
+        (16, "Fn::If uses unknown condition 'IsStaging'"),
+        (17, "resource 'Role' has unknown property 'Colour'"),
+        (20, "resource 'Param' depends on unknown resource 'Nothing'"),
+        (23, "'AWS::IAM::Role' has no attribute 'Nope'"),
+        (25, "resource 'Lambda' has unknown type 'AWS::Lambda::Whatever'"),
+        (29, "Ref to unknown parameter or resource 'Nowhere'"),
+    ]
+    assert report.parameters == {"Env": {"Type": "String"}}
+
+
+def test_checker_without_specification_checks_references_only(tmp_path):
+    path = tmp_path / "broken.yaml"
+    path.write_text(BROKEN_TEMPLATE)
+    messages = [message for _line, message in _messages(TemplateChecker(None).check(path))]
+    assert "Ref to unknown parameter or resource 'Nowhere'" in messages
+    assert not any("unknown property" in message or "unknown type" in message for message in messages)
+
+
+def test_repository_templates_and_parameters_pass(spec):
+    checker = TemplateChecker(SpecIndex.load(spec))
+    reports = {path: checker.check(path) for path in validate_cfn_templates.find_templates(CONFIG_DIR)}
+    assert len(reports) == 2
+    assert [d for report in reports.values() for d in report.diagnostics] == []
+    assert check_customization_parameters(CONFIG_DIR, reports, checker) == []
+
+
+def test_customization_parameters_must_match(tmp_path, spec):
+    config_dir = tmp_path / "config"
+    shutil.copytree(CONFIG_DIR / "customizations", config_dir / "customizations")
+    (config_dir / "customizations-config.yaml").write_text(
+        (CONFIG_DIR / "customizations-config.yaml").read_text()
+        .replace("name: GitHubClaim", "name: GitHubBranch")
+        .replace("template: customizations/github-oicd-provider.yaml", "template: customizations/missing.yaml")
+    )
+    messages = [d.message for d in check_customization_parameters(config_dir, {}, TemplateChecker(SpecIndex.load(spec)))]
+    assert messages == [
+        "github-tnhtnh-container-pipeline-sydney-summit-2025: parameter 'GitHubBranch' is not declared in "
+        "customizations/github-repository-deployment-role.yaml",
+        "github-tnhtnh-container-pipeline-sydney-summit-2025: customizations/github-repository-deployment-role.yaml "
+        "parameter 'GitHubClaim' has no Default and is not passed",
+        "GitHubOICDProvider: template 'customizations/missing.yaml' does not exist",
+    ]
+
+
+def test_dozens_of_templates_in_under_a_second(spec, tmp_path):
+    source = (CONFIG_DIR / "customizations" / "github-repository-deployment-role.yaml").read_text()
+    paths = []
+    for index in range(50):
+        path = tmp_path / f"template-{index}.yaml"
+        path.write_text(source)
+        paths.append(path)
+    start = time.perf_counter()
+    checker = TemplateChecker(SpecIndex.load(spec))
+    assert all(not checker.check(path).diagnostics for path in paths)
+    assert time.perf_counter() - start < 1
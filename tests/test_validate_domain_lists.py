@@ -0,0 +1,136 @@
+# tests/test_validate_domain_lists.py
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+
+import validate_domain_lists
+from validate_domain_lists import DomainTrie, normalise_domain, validate_domain_list
+
+
+@pytest.mark.parametrize("raw, expected", [
+    (b"Example.COM.\n", ("example.com", None)),
+    (b"  *.example.com  # tracker\n", ("*.example.com", None)),
+    (b"_dmarc.example.com", ("_dmarc.example.com", None)),
+    ("bücher.example".encode(), ("xn--bcher-kva.example", None)),
+    (b"# comment\n", (None, None)),
+    (b"\n", (None, None)),
+])
+def test_normalise_domain(raw, expected):
+    """Entries are lower-cased, stripped of comments and trailing dots, and IDNs are punycoded."""
+    assert normalise_domain(raw) == expected
+
+
+@pytest.mark.parametrize("raw, message", [
+    (b"www.*.example.com", "'*' is only allowed"),
+    (b"*example.com", "'*' is only allowed"),
+    (b"*", "not a valid domain"),
+    (b"bad..example.com", "empty label"),
+    (b"-bad.example.com", "may only contain"),
+    (b"bad!.example.com", "may only contain"),
+    (b"a" * 64 + b".com", "longer than 63"),
+    ((b"a" * 60 + b".") * 5 + b"com", "longer than 255"),
+])
+def test_invalid_domains(raw, message):
+    """Invalid entries are rejected with a reason."""
+    domain, error = normalise_domain(raw)
+    assert domain is None
+    assert message in error
+
+
+def test_trie_duplicates_and_wildcard_coverage():
+    """The trie detects duplicates and entries below a wildcard, but not the wildcard's apex."""
+    trie = DomainTrie()
+    for domain in ["www.example.com", "*.example.com", "example.com", "*.cdn.example.com", "other.com"]:
+        assert trie.add(domain)
+    assert not trie.add("www.example.com")
+    assert not trie.add("*.example.com")
+    covered = [domain for domain in ["www.example.com", "*.example.com", "example.com", "*.cdn.example.com"]
+               if trie.mark(domain, validate_domain_lists.EMITTED_EXACT)[1]]
+    assert covered == ["www.example.com", "*.cdn.example.com"]
+
+
+def test_validate_reports_issues_with_line_numbers(tmp_path):
+    """Duplicates, covered entries and invalid lines are reported against their line."""
+    path = tmp_path / "list.txt"
+    path.write_text("www.example.com\nbad..com\n*.example.com\nWWW.example.com.\nother.com")
+
+    report = validate_domain_list(path)
+
+    assert (report.lines, report.entries, report.unique) == (5, 4, 3)
+    assert (report.duplicates, report.covered, report.invalid) == (1, 1, 1)
+    assert report.has_errors
+    issues = [(issue.line, issue.severity) for issue in report.issues]
+    assert issues == [(2, "error"), (1, "warning"), (4, "warning")]
+
+
+def test_sharded_lists_find_duplicates_and_covered_entries_across_shards(tmp_path, monkeypatch):
+    """Entries are deduplicated per shard; single-label wildcards cover entries in every shard."""
+    monkeypatch.setattr(validate_domain_lists, "SHARD_BYTES", 16)
+    path = tmp_path / "list.txt"
+    domains = [f"host{index}.example{index % 7}.org" for index in range(50)] + ["*.org", "host3.example3.org", "a.net"]
+    path.write_text("\n".join(domains) + "\n")
+
+    report = validate_domain_list(path, max_reports=100)
+
+    assert (report.entries, report.duplicates, report.covered, report.remaining) == (53, 1, 50, 2)
+    assert [issue.line for issue in report.issues] == list(range(1, 51)) + [52]
+
+
+def test_domain_limit(tmp_path):
+    """Lists over the per-list limit are errors, with a hint if compaction would fit."""
+    path = tmp_path / "list.txt"
+    path.write_text("a.example.com\nb.example.com\n*.example.com\n")
+
+    report = validate_domain_list(path, max_domains=2)
+
+    assert report.has_errors
+    assert "3 domains exceeds the limit of 2 per domain list; 1 after compaction" in report.issues[0].message
+
+
+def test_write_compacted_keeps_first_occurrences_in_order(tmp_path):
+    """Compaction drops duplicates and covered entries, keeps comments and keeps the original order."""
+    path = tmp_path / "list.txt"
+    path.write_text("b.com\n# comment\nwww.a.com\nB.com\n*.a.com\nA.com. # apex")
+
+    report = validate_domain_list(path, write_compacted=True)
+
+    assert report.compacted
+    assert path.read_text() == "b.com\n# comment\n*.a.com\na.com # apex\n"
+    assert not (tmp_path / "list.txt.compacting").exists()
+
+
+def test_write_compacted_skips_invalid_lists(tmp_path):
+    """Lists with invalid entries are not rewritten."""
+    path = tmp_path / "list.txt"
+    path.write_text("a.com\na.com\nbad..com\n")
+
+    report = validate_domain_list(path, write_compacted=True)
+
+    assert not report.compacted
+    assert path.read_text() == "a.com\na.com\nbad..com\n"
+
+
+def test_find_domain_lists_reports_missing_references(tmp_path):
+    """Lists referenced by customDomainList in network-config.yaml must exist."""
+    lists_dir = tmp_path / "dns-firewall-domain-lists"
+    lists_dir.mkdir()
+    (lists_dir / "present.txt").write_text("a.com\n")
+    (tmp_path / "network-config.yaml").write_text(
+        "centralNetworkServices:\n"
+        "  route53Resolver:\n"
+        "    firewallRuleGroups:\n"
+        "      - name: block\n"
+        "        rules:\n"
+        "          - name: present\n"
+        "            customDomainList: dns-firewall-domain-lists/present.txt\n"
+        "          - name: missing\n"
+        "            customDomainList: dns-firewall-domain-lists/missing.txt\n"
+    )
+
+    paths, missing = validate_domain_lists.find_domain_lists(tmp_path)
+
+    assert paths == [lists_dir / "present.txt"]
+    assert missing == ["block/missing: dns-firewall-domain-lists/missing.txt"]
@@ -0,0 +1,129 @@
+# tests/test_validate_environments.py
+import os
+import sys
+from pathlib import Path
+
+import jsonschema
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+
+import validate_environments
+from preflight_checks.lza_config import ConfigTemplate, load_config, load_replacements, load_template
+from validate_environments import MatrixValidator, discover_environments, validate_environments as validate_all
+
+CONFIG_DIR = Path(os.path.dirname(__file__)) / '..' / 'config'
+
+NETWORK_CONFIG = """\
+homeRegion: &HOME_REGION {{ HomeRegion }}
+transitGateways:
+  - name: Main
+    account: Network
+    region: *HOME_REGION
+    asn: {{ Asn }}
+vpcs:
+  - name: "{{ Prefix }}-egress"
+    cidrs:
+      - {{ Cidr }}
+"""
+
+NETWORK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "transitGateways": {
+            "type": "array",
+            "items": {"type": "object", "properties": {"asn": {"type": "integer", "minimum": 64512}}},
+        },
+    },
+}
+
+
+def _replacements(**values):
+    return "globalReplacements:\n" + "".join(
+        f"  - key: {key}\n    type: String\n    value: '{value}'\n" for key, value in values.items()
+    )
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    (config_dir / "network-config.yaml").write_text(NETWORK_CONFIG)
+    (config_dir / "replacements-config.yaml").write_text(
+        _replacements(HomeRegion="ap-southeast-2", Asn=65521, Prefix="lza")
+    )
+    environments_dir = tmp_path / "environments"
+    for name, values in {
+        "dev": {"Cidr": "10.1.0.0/16", "Prefix": "dev"},
+        "prod": {"Cidr": "10.2.0.0/16", "Asn": 100},
+        "broken": {"Unused": "x"},
+    }.items():
+        (environments_dir / name).mkdir(parents=True)
+        (environments_dir / name / "replacements-config.yaml").write_text(_replacements(**values))
+    return config_dir, environments_dir
+
+
+def test_template_render_matches_render_then_parse():
+    """Rendering the parsed template gives the same documents as rendering the text first."""
+    replacements = load_replacements(CONFIG_DIR)
+    for name in ["network-config.yaml", "global-config.yaml", "organization-config.yaml", "iam-config.yaml"]:
+        template = load_template(CONFIG_DIR, name)
+        assert not template.fallback
+        assert template.render(replacements) == load_config(CONFIG_DIR, name, replacements)
+
+
+def test_template_render_types_and_sharing():
+    """Plain placeholders are re-resolved, quoted ones stay strings, and untouched nodes are shared."""
+    template = ConfigTemplate(NETWORK_CONFIG + "tags:\n  - key: Owner\n    value: '{{ Asn }}'\nother: [1, 2]\n")
+    first = template.render({"HomeRegion": "us-east-1", "Asn": "65000", "Prefix": "a", "Cidr": "10.0.0.0/8"})
+    second = template.render({"HomeRegion": "eu-west-1", "Asn": "65001", "Prefix": "b", "Cidr": "10.0.0.0/8"})
+    assert first["transitGateways"][0]["asn"] == 65000
+    assert first["transitGateways"][0]["region"] == "us-east-1"
+    assert first["tags"][0]["value"] == "65000"
+    assert second["vpcs"][0]["name"] == "b-egress"
+    assert first["other"] is second["other"]
+    # The parsed template itself is never modified
+    assert template.render({})["homeRegion"] == "{{ HomeRegion }}"
+
+
+def test_template_falls_back_for_placeholder_keys():
+    template = ConfigTemplate("{{ Key }}: value\n")
+    assert template.fallback
+    assert template.render({"Key": "name"}) == {"name": "value"}
+
+
+def test_matrix_reports_per_environment(workspace):
+    config_dir, environments_dir = workspace
+    environments = discover_environments(environments_dir)
+    assert sorted(environments) == ["broken", "dev", "prod"]
+    validator = jsonschema.Draft7Validator(NETWORK_SCHEMA)
+    matrix = MatrixValidator(config_dir, {"network-config.json": validator})
+
+    reports = {report.name: report for report in validate_all(matrix, environments)}
+
+    assert reports["dev"].diagnostics == []
+    # prod's ASN override fails the schema, located at the line of the placeholder
+    (error,) = reports["prod"].diagnostics
+    assert error.path.endswith("network-config.yaml") and error.line == 6
+    assert "64512" in error.message
+    # broken defines no Cidr and an unused key
+    messages = [(d.severity, d.line, d.message) for d in reports["broken"].diagnostics]
+    assert ("warning", 1, "replacement key 'Unused' is not used by any config file") in messages
+    assert ("error", 10, "replacement key 'Cidr' is not defined for environment 'broken'") in messages
+    assert reports["broken"].errors == 1
+
+
+def test_main_exit_code(workspace, monkeypatch, capsys):
+    config_dir, environments_dir = workspace
+    argv = ["validate_environments.py", "--config-dir", str(config_dir),
+            "--environments-dir", str(environments_dir), "--no-schemas"]
+    monkeypatch.setattr(sys, "argv", argv + ["--env", "dev"])
+    with pytest.raises(SystemExit) as exit_info:
+        validate_environments.main()
+    assert exit_info.value.code == 0
+
+    monkeypatch.setattr(sys, "argv", argv)
+    with pytest.raises(SystemExit) as exit_info:
+        validate_environments.main()
+    assert exit_info.value.code == 1
+    assert "[broken]" in capsys.readouterr().out
@@ -0,0 +1,112 @@
+# tests/test_watch_config.py
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+
+import watch_config
+from preflight_checks.schema import load_validators
+
+REPLACEMENTS = """globalReplacements:
+  - key: Prefix
+    type: String
+    value: lza
+  - key: HomeRegion
+    type: String
+    value: ap-southeast-2
+"""
+
+GLOBAL_CONFIG = """homeRegion: {{ HomeRegion }}
+enabledRegions:
+  - {{ HomeRegion }}
+"""
+
+ORGANIZATION_CONFIG = """enable: true
+serviceControlPolicies:
+  - name: "{{ Prefix }}-Policy"
+"""
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    """A minimal config directory with two files using different replacement keys."""
+    (tmp_path / "replacements-config.yaml").write_text(REPLACEMENTS)
+    (tmp_path / "global-config.yaml").write_text(GLOBAL_CONFIG)
+    (tmp_path / "organization-config.yaml").write_text(ORGANIZATION_CONFIG)
+    (tmp_path / "service-control-policies").mkdir()
+    (tmp_path / "service-control-policies" / "policy.json").write_text('{"Version": "2012-10-17"}')
+    return tmp_path
+
+
+def test_load_all_renders_and_parses(config_dir):
+    """Initial load renders replacements and keeps parsed trees in memory."""
+    state = watch_config.ConfigValidationState(config_dir)
+    results = state.load_all()
+    assert all(diagnostics == [] for diagnostics in results.values())
+    assert state.parsed["global-config.yaml"] == {
+        "homeRegion": "ap-southeast-2",
+        "enabledRegions": ["ap-southeast-2"],
+    }
+    assert state.parsed["organization-config.yaml"]["serviceControlPolicies"][0]["name"] == "lza-Policy"
+    assert "service-control-policies/policy.json" in results
+
+
+def test_replacement_change_rerenders_only_affected_files(config_dir):
+    """Changing one replacement value only revalidates the files using that key."""
+    state = watch_config.ConfigValidationState(config_dir)
+    state.load_all()
+
+    (config_dir / "replacements-config.yaml").write_text(REPLACEMENTS.replace("value: lza", "value: acme"))
+    results = state.handle_changes(["replacements-config.yaml"])
+
+    assert set(results) == {"replacements-config.yaml", "organization-config.yaml"}
+    assert state.parsed["organization-config.yaml"]["serviceControlPolicies"][0]["name"] == "acme-Policy"
+
+
+def test_unchanged_replacements_revalidate_nothing_else(config_dir):
+    """Saving replacements-config.yaml without value changes only rechecks that file."""
+    state = watch_config.ConfigValidationState(config_dir)
+    state.load_all()
+    results = state.handle_changes(["replacements-config.yaml"])
+    assert set(results) == {"replacements-config.yaml"}
+
+
+def test_diagnostics_have_editor_positions(config_dir):
+    """Undefined keys, YAML and JSON errors are reported as path:line:col."""
+    state = watch_config.ConfigValidationState(config_dir)
+    state.load_all()
+
+    (config_dir / "global-config.yaml").write_text("homeRegion: {{ Unknown }}\nbad: [\n")
+    (config_dir / "service-control-policies" / "policy.json").write_text("{bad")
+    results = state.handle_changes(["global-config.yaml", "service-control-policies/policy.json"])
+
+    messages = [d.format() for d in results["global-config.yaml"]]
+    assert messages[0] == (
+        f"{config_dir / 'global-config.yaml'}:1:13: error: "
+        "replacement key 'Unknown' is not defined in replacements-config.yaml"
+    )
+    assert ": error: YAML:" in messages[1]
+    json_diagnostic = results["service-control-policies/policy.json"][0]
+    assert (json_diagnostic.line, json_diagnostic.column) == (1, 2)
+
+
+def test_schema_errors_are_located_in_yaml(config_dir, tmp_path_factory):
+    """Schema validation errors point at the offending YAML node."""
+    schema_dir = tmp_path_factory.mktemp("schemas")
+    (schema_dir / "global-config.json").write_text(json.dumps({
+        "$schema": "http://json-schema.org/draft-07/schema#",
+        "type": "object",
+        "properties": {"enabledRegions": {"type": "array", "items": {"type": "integer"}}},
+    }))
+    validators = load_validators(["global-config.json"], "main", "github", Path(schema_dir))
+    state = watch_config.ConfigValidationState(config_dir, validators)
+
+    results = state.load_all()
+
+    [diagnostic] = results["global-config.yaml"]
+    assert (diagnostic.line, diagnostic.column) == (3, 5)
+    assert "is not of type 'integer'" in diagnostic.message